@@ -102,9 +102,13 @@ class AIExplainer:
         write = metrics.get('write_speed', 0)
         iops = metrics.get('iops', 0)
         latency = metrics.get('avg_latency', 0)
+        p50 = metrics.get('latency_p50', 0)
+        p99 = metrics.get('latency_p99', 0)
+        p999 = metrics.get('latency_p99_9', 0)
         
         used_metrics = ['Read Speed', 'Write Speed', 'IOPS', 'Latency']
         evidence = []
+        rules_applied = ['Performance benchmark']
         
         # Benchmarking
         if read < 50 or write < 50:
@@ -125,12 +129,25 @@ class AIExplainer:
             evidence.append(f"Latência: {latency}ms")
             evidence.append(f"IOPS: {iops}")
         
+        # Latência de cauda: é o p99/p99.9 que afeta aplicações, não a média
+        if p99:
+            used_metrics.append('Latency Percentiles')
+            rules_applied.append('Tail latency')
+            evidence.append(f"Latência p50 {p50}ms | p99 {p99}ms | p99.9 {p999}ms")
+            if p50 and p999 > p50 * 20:
+                decision += f" - Cauda de latência elevada (p99.9 {p999 / p50:.0f}x o p50)"
+                evidence.append("⚠️ p99.9 muito acima da mediana: possíveis pausas de GC, throttling ou erros de leitura com retry")
+            elif p99 > 10:
+                evidence.append(f"⚠️ p99 de {p99}ms acima do esperado para SSD")
+            else:
+                evidence.append("✅ Latência de cauda consistente")
+        
         return AIReasoning(
             used_metrics=used_metrics,
             decision=decision,
             confidence=confidence,
             evidence=evidence,
-            rules_applied=['Performance benchmark']
+            rules_applied=rules_applied
         )
     
     def explain_temperature(self, metrics: Dict, is_usb: bool = False) -> AIReasoning:
@@ -198,7 +215,14 @@ class AIExplainer:
                 'used_metrics': perf_explanation.used_metrics,
                 'decision': perf_explanation.decision,
                 'confidence': perf_explanation.confidence,
-                'evidence': perf_explanation.evidence
+                'evidence': perf_explanation.evidence,
+                'latency_percentiles': {
+                    'p50': metrics.get('latency_p50', 0),
+                    'p90': metrics.get('latency_p90', 0),
+                    'p99': metrics.get('latency_p99', 0),
+                    'p99_9': metrics.get('latency_p99_9', 0),
+                    'max': metrics.get('latency_max', 0)
+                }
             },
             'temperature': {
                 'value': metrics.get('temperature', 0),
@@ -0,0 +1,93 @@
+"""
+Gravação e Reprodução de Comandos Externos
+Grava a saída de smartctl/nvme/lsblk/udevadm por dispositivo e a reproduz sem executar processos,
+para rodar o pipeline de análise sem discos reais (benchmarks, reprodução de incidentes)
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_MODES = ('off', 'record', 'replay')
+CAPTURE_MODE = os.environ.get('COMMAND_CAPTURE_MODE', 'off').lower()
+CAPTURE_DIR = os.environ.get('COMMAND_CAPTURE_DIR', 'captures')
+# Comandos sem dispositivo (lsblk, lsusb, nvme --version) ficam neste diretório
+HOST_SCOPE = '_host'
+
+class CommandCapture:
+    """
+    Armazena resultados de comandos em <diretório>/<dispositivo>/<comando>-<hash>.json
+    Um arquivo por linha de comando; gravar de novo a mesma linha substitui o arquivo anterior.
+    """
+
+    def __init__(self, mode: str = CAPTURE_MODE, directory: str = CAPTURE_DIR):
+        if mode not in CAPTURE_MODES:
+            raise ValueError(f"Modo de captura inválido: {mode} (use {', '.join(CAPTURE_MODES)})")
+        self.mode = mode
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.cache: Dict[str, Optional[Dict]] = {}
+        if mode != 'off':
+            logger.info(f"Captura de comandos em modo {mode}: {os.path.abspath(directory)}")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    def path_for(self, args: List[str], device: Optional[str] = None) -> str:
+        """Arquivo da gravação de `args` (nome legível + hash da linha de comando completa)"""
+        scope = re.sub(r'[^A-Za-z0-9_.-]+', '_', device.strip('/')) if device else HOST_SCOPE
+        digest = hashlib.sha1('\0'.join(args).encode()).hexdigest()[:12]
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', '-'.join([os.path.basename(args[0])] + args[1:2]))
+        return os.path.join(self.directory, scope, f'{name}-{digest}.json')
+
+    def record(self, args: List[str], device: Optional[str], result: Dict):
+        """Grava o resultado de um comando (escrita atômica)"""
+        path = self.path_for(args, device)
+        entry = {**result, 'args': list(args), 'device': device, 'recorded_at': datetime.now().isoformat()}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            with self.lock:
+                self.cache[path] = entry
+        except OSError as e:
+            logger.error(f"Erro ao gravar captura {path}: {e}")
+
+    def replay(self, args: List[str], device: Optional[str] = None) -> Optional[Dict]:
+        """Resultado gravado para `args`, ou None se não houver gravação"""
+        path = self.path_for(args, device)
+        with self.lock:
+            if path in self.cache:
+                return self.cache[path]
+        entry = None
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Sem gravação para {' '.join(args)} ({device or HOST_SCOPE})")
+        except (OSError, ValueError) as e:
+            logger.error(f"Gravação inválida {path}: {e}")
+        with self.lock:
+            self.cache[path] = entry
+        return entry
+
+    def devices(self) -> List[str]:
+        """Dispositivos com gravações no diretório"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory) if name != HOST_SCOPE)
+
+command_capture = CommandCapture()
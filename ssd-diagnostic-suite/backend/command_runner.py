@@ -0,0 +1,149 @@
+"""
+Executor Assíncrono de Comandos Externos
+smartctl, nvme, lsblk, udevadm, lsusb etc. via asyncio com timeout, limite global de
+processos simultâneos e serialização por dispositivo, sem bloquear o event loop
+"""
+import asyncio
+import os
+import subprocess
+import time
+import logging
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from command_capture import CommandCapture, command_capture
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 15.0
+MAX_CONCURRENT_COMMANDS = int(os.environ.get('MAX_CONCURRENT_COMMANDS', '8'))
+
+@dataclass
+class CommandResult:
+    """Resultado de um comando externo (nunca lança exceção para o chamador)"""
+    args: List[str]
+    returncode: int
+    stdout: str = ''
+    stderr: str = ''
+    duration: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+def _missing(args: List[str], error: Exception) -> CommandResult:
+    """Binário ausente ou sem permissão: código 127, como no shell"""
+    return CommandResult(args, 127, stderr=f'{args[0]}: {error}')
+
+class CommandRunner:
+    """
+    Executa comandos externos no event loop da aplicação
+    Código síncrono (rodando em threads via asyncio.to_thread) usa run_sync, que agenda o
+    comando no loop; sem loop associado (CLI, scripts) executa com subprocess diretamente.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_COMMANDS, default_timeout: float = DEFAULT_TIMEOUT,
+                 capture: CommandCapture = command_capture):
+        self.max_concurrency = max(1, max_concurrency)
+        self.default_timeout = default_timeout
+        # Gravação/reprodução (COMMAND_CAPTURE_MODE): em replay nenhum processo é criado
+        self.capture = capture
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.device_locks: Dict[str, asyncio.Lock] = {}
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Associa o runner ao event loop da aplicação (chamado no startup)"""
+        self.loop = loop
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.device_locks = {}
+
+    async def run(self, args: List[str], timeout: Optional[float] = None, device: Optional[str] = None) -> CommandResult:
+        """
+        Executa `args` sem bloquear o loop
+        Comandos com o mesmo `device` são serializados; o total simultâneo é limitado pelo semáforo.
+        """
+        if self.capture.replaying:
+            return self._replay(args, device)
+        if self.loop is None:
+            self.bind(asyncio.get_running_loop())
+        timeout = self.default_timeout if timeout is None else timeout
+        if device is None:
+            async with self.semaphore:
+                return self._recorded(await self._execute(args, timeout), device)
+        lock = self.device_locks.setdefault(device, asyncio.Lock())
+        async with lock:
+            async with self.semaphore:
+                return self._recorded(await self._execute(args, timeout), device)
+
+    async def _execute(self, args: List[str], timeout: float) -> CommandResult:
+        start = time.monotonic()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            return _missing(args, e)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            logger.warning(f"Comando excedeu {timeout}s e foi encerrado: {' '.join(args)}")
+            return CommandResult(args, -9, duration=time.monotonic() - start, timed_out=True,
+                                 stderr=f'timeout após {timeout}s')
+        return CommandResult(
+            args, process.returncode,
+            stdout.decode(errors='replace'), stderr.decode(errors='replace'),
+            time.monotonic() - start
+        )
+
+    def run_sync(self, args: List[str], timeout: Optional[float] = None, device: Optional[str] = None) -> CommandResult:
+        """Versão bloqueante para código síncrono; nunca deve ser chamada na thread do event loop"""
+        if self.capture.replaying:
+            return self._replay(args, device)
+        loop = self.loop
+        if loop is not None and loop.is_running():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                raise RuntimeError(f"run_sync chamado no event loop; use await run() ou asyncio.to_thread: {args}")
+            return asyncio.run_coroutine_threadsafe(self.run(args, timeout, device), loop).result()
+        return self._recorded(self._run_blocking(args, self.default_timeout if timeout is None else timeout), device)
+
+    def _recorded(self, result: CommandResult, device: Optional[str]) -> CommandResult:
+        """Grava o resultado quando em modo record"""
+        if self.capture.recording:
+            self.capture.record(result.args, device, asdict(result))
+        return result
+
+    def _replay(self, args: List[str], device: Optional[str]) -> CommandResult:
+        """Resultado gravado; sem gravação o comando se comporta como binário ausente (127)"""
+        entry = self.capture.replay(args, device)
+        if entry is None:
+            return CommandResult(args, 127, stderr=f'{args[0]}: sem gravação em {self.capture.directory}')
+        return CommandResult(
+            args, entry.get('returncode', 0), entry.get('stdout', ''), entry.get('stderr', ''),
+            entry.get('duration', 0.0), entry.get('timed_out', False)
+        )
+
+    def _run_blocking(self, args: List[str], timeout: float) -> CommandResult:
+        """Sem event loop: subprocess direto, com o mesmo formato de resultado"""
+        start = time.monotonic()
+        try:
+            result = subprocess.run(args, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return CommandResult(args, -9, duration=time.monotonic() - start, timed_out=True,
+                                 stderr=f'timeout após {timeout}s')
+        except OSError as e:
+            return _missing(args, e)
+        return CommandResult(args, result.returncode, result.stdout, result.stderr, time.monotonic() - start)
+
+command_runner = CommandRunner()
+
+def run_command(args: List[str], timeout: Optional[float] = None, device: Optional[str] = None) -> CommandResult:
+    """Função helper"""
+    return command_runner.run_sync(args, timeout, device)
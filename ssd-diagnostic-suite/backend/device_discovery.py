@@ -0,0 +1,118 @@
+"""
+Descoberta de Dispositivos via sysfs
+Lê /sys/block diretamente (modelo, fabricante, tamanho, rotacional, removível e barramento pela
+cadeia de dispositivos) sem criar processos
+"""
+import os
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SYS_BLOCK = '/sys/block'
+SECTOR_SIZE = 512  # /sys/block/*/size é sempre em setores de 512 bytes
+# Prefixos que nunca são discos físicos de interesse
+SKIP_PREFIXES = ('loop', 'ram', 'zram', 'dm-', 'md', 'sr', 'fd')
+# Subdiretórios que marcam device-mapper e RAID de software, qualquer que seja o nome
+VIRTUAL_MARKERS = ('dm', 'md')
+# Ordem importa: um SSD SATA atrás de uma ponte USB tem "/ata" e "/usb" no caminho
+BUS_MARKERS = (
+    # Namespace NVMe com multipath nativo: disco real sob /sys/devices/virtual, filho do nvme-subsystem
+    ('/virtual/nvme-subsystem/', 'NVMe'),
+    ('/usb', 'USB'),
+    ('/nvme', 'NVMe'),
+    ('/mmc', 'MMC'),
+    ('/virtio', 'VirtIO'),
+    ('/end_device-', 'SAS'),
+    ('/ata', 'SATA'),
+)
+
+def _read(path: str) -> Optional[str]:
+    """Conteúdo de um atributo sysfs (None se não existir ou não for legível)"""
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _read_int(path: str) -> Optional[int]:
+    value = _read(path)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+def human_size(size_bytes: int) -> str:
+    """Tamanho no formato do lsblk (256G, 465.8G, 1.8T)"""
+    value = float(size_bytes)
+    for unit in ('B', 'K', 'M', 'G', 'T', 'P'):
+        if value < 1024 or unit == 'P':
+            break
+        value /= 1024
+    return f"{value:.0f}{unit}" if round(value, 1).is_integer() else f"{value:.1f}{unit}"
+
+def detect_bus(name: str, device_path: str) -> str:
+    """Barramento pela cadeia de dispositivos em /sys/devices (realpath de /sys/block/<nome>)"""
+    for marker, bus in BUS_MARKERS:
+        if marker in device_path:
+            return bus
+    if name.startswith('nvme'):
+        return 'NVMe'
+    return 'SCSI'
+
+def describe_device(name: str, sys_block: str = SYS_BLOCK) -> Optional[Dict]:
+    """Descrição de um dispositivo de bloco; None para dispositivos virtuais ou ignorados"""
+    if name.startswith(SKIP_PREFIXES):
+        return None
+    base = os.path.join(sys_block, name)
+    if any(os.path.isdir(os.path.join(base, marker)) for marker in VIRTUAL_MARKERS):
+        return None
+    real_path = os.path.realpath(base)
+    # Sem dispositivo pai não há disco por trás (zram, nbd...); a cabeça multipath NVMe tem o
+    # nvme-subsystem como pai, onde ficam modelo e serial
+    if not os.path.exists(os.path.join(base, 'device')):
+        return None
+
+    size_bytes = (_read_int(os.path.join(base, 'size')) or 0) * SECTOR_SIZE
+    model = _read(os.path.join(base, 'device', 'model')) or 'Unknown'
+    vendor = _read(os.path.join(base, 'device', 'vendor')) or ''
+    rotational = _read_int(os.path.join(base, 'queue', 'rotational'))
+    bus = detect_bus(name, real_path)
+
+    return {
+        'path': f"/dev/{name}",
+        'name': name,
+        'model': model,
+        'vendor': vendor,
+        'bus': bus,
+        'size': human_size(size_bytes) if size_bytes else 'Unknown',
+        'size_bytes': size_bytes,
+        'type': 'disk',
+        'rotational': bool(rotational),
+        # Pontes USB costumam reportar rotational=1 mesmo para SSD; o modelo desempata
+        'is_ssd': rotational == 0 or 'ssd' in model.lower(),
+        'removable': _read_int(os.path.join(base, 'removable')) == 1,
+        'serial': _read(os.path.join(base, 'device', 'serial')) or '',
+    }
+
+def discover_devices(sys_block: str = SYS_BLOCK) -> List[Dict]:
+    """Discos físicos presentes, ordenados pelo nome"""
+    try:
+        names = sorted(os.listdir(sys_block))
+    except OSError as e:
+        logger.error(f"Erro ao listar {sys_block}: {e}")
+        return []
+    devices = []
+    for name in names:
+        try:
+            device = describe_device(name, sys_block)
+        except Exception as e:
+            logger.warning(f"Erro ao ler {name} em {sys_block}: {e}")
+            continue
+        if device:
+            devices.append(device)
+    return devices
+
+def sysfs_available(sys_block: str = SYS_BLOCK) -> bool:
+    """sysfs montado (Linux); fora dele a descoberta usa lsblk"""
+    return os.path.isdir(sys_block)
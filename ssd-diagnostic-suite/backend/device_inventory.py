@@ -0,0 +1,136 @@
+"""
+Inventário de Dispositivos em Memória
+Mantém a lista de discos atualizada por eventos de hotplug (udev netlink via pyudev, opcional)
+ou, sem pyudev, por varredura periódica do sysfs; notifica mudanças (adicionados/removidos)
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from device_discovery import discover_devices
+
+try:
+    import pyudev
+except ImportError:
+    pyudev = None
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.environ.get('DEVICE_POLL_INTERVAL', '5'))
+# Um hotplug gera uma rajada de eventos (disco + partições); espera assentar antes de reler
+HOTPLUG_DEBOUNCE = 0.5
+
+class DeviceInventory:
+    """Lista de dispositivos servida da memória e relida só quando algo muda"""
+
+    def __init__(self, discover: Callable[[], List[Dict]] = discover_devices, poll_interval: float = POLL_INTERVAL):
+        self.discover = discover
+        self.poll_interval = poll_interval
+        self.devices: List[Dict] = []
+        self.version = 0
+        self.updated_at: Optional[str] = None
+        self.loaded = False
+        self.on_change: Optional[Callable[[Dict], Awaitable[None]]] = None
+        self.monitor = None
+        self.poll_task: Optional[asyncio.Task] = None
+        self.pending: Optional[asyncio.TimerHandle] = None
+        self.lock = asyncio.Lock()
+
+    @property
+    def mode(self) -> str:
+        if self.monitor is not None:
+            return 'udev'
+        return 'polling' if self.poll_task is not None else 'on-demand'
+
+    async def start(self, on_change: Optional[Callable[[Dict], Awaitable[None]]] = None):
+        """Carrega o inventário e passa a acompanhar hotplug (udev se disponível, senão polling)"""
+        self.on_change = on_change
+        await self.refresh()
+        loop = asyncio.get_running_loop()
+        if pyudev is not None:
+            try:
+                monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+                monitor.filter_by('block', device_type='disk')
+                monitor.start()
+                loop.add_reader(monitor.fileno(), self._on_udev_event)
+                self.monitor = monitor
+                logger.info("Inventário de dispositivos: eventos udev (netlink)")
+                return
+            except Exception as e:
+                logger.warning(f"udev netlink indisponível, usando polling do sysfs: {e}")
+        self.poll_task = asyncio.create_task(self._poll_loop())
+        logger.info(f"Inventário de dispositivos: polling do sysfs a cada {self.poll_interval}s")
+
+    def stop(self):
+        """Para o acompanhamento de hotplug"""
+        if self.monitor is not None:
+            asyncio.get_running_loop().remove_reader(self.monitor.fileno())
+            self.monitor = None
+        if self.poll_task is not None:
+            self.poll_task.cancel()
+            self.poll_task = None
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+
+    def _on_udev_event(self):
+        """Drena os eventos do netlink e agenda uma releitura (com debounce)"""
+        while self.monitor is not None and self.monitor.poll(timeout=0) is not None:
+            pass
+        if self.pending is None:
+            loop = asyncio.get_running_loop()
+            self.pending = loop.call_later(HOTPLUG_DEBOUNCE, lambda: asyncio.ensure_future(self._debounced_refresh()))
+
+    async def _debounced_refresh(self):
+        self.pending = None
+        await self.refresh()
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Erro no polling de dispositivos: {e}")
+
+    async def refresh(self) -> bool:
+        """Relê o sysfs; notifica e retorna True se a lista mudou"""
+        async with self.lock:
+            devices = await asyncio.to_thread(self.discover)
+            if self.loaded and devices == self.devices:
+                return False
+            previous = {device['path']: device for device in self.devices}
+            current = {device['path']: device for device in devices}
+            change = {
+                'added': [device for path, device in current.items() if path not in previous],
+                'removed': [device for path, device in previous.items() if path not in current],
+                # Mesmo caminho, outro disco (troca de disco na mesma baia) ou dados alterados
+                'changed': [device for path, device in current.items()
+                            if path in previous and previous[path] != device],
+            }
+            first_load = not self.loaded
+            self.devices = devices
+            self.version += 1
+            self.updated_at = datetime.now().isoformat()
+            self.loaded = True
+        if first_load:
+            return True
+        logger.info(f"Dispositivos alterados: +{len(change['added'])} -{len(change['removed'])} "
+                    f"~{len(change['changed'])}")
+        if self.on_change is not None:
+            try:
+                await self.on_change({**change, 'devices': devices, 'version': self.version,
+                                      'updated_at': self.updated_at})
+            except Exception as e:
+                logger.error(f"Erro ao notificar mudança de dispositivos: {e}")
+        return True
+
+    async def get(self) -> List[Dict]:
+        """Lista atual (carrega na primeira chamada se o acompanhamento não foi iniciado)"""
+        if not self.loaded:
+            await self.refresh()
+        return self.devices
+
+device_inventory = DeviceInventory()
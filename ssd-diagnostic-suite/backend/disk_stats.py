@@ -0,0 +1,141 @@
+"""
+Monitoramento Passivo de I/O via Contadores do Kernel
+Lê /sys/class/block/<dev>/stat (ou a linha do dispositivo em /proc/diskstats) sem criar processos
+e converte a diferença entre duas leituras em throughput, IOPS, utilização e tempo de serviço,
+como o iostat -x, sob a carga real do disco
+"""
+import os
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from io_engine import MB
+
+logger = logging.getLogger(__name__)
+
+SYS_CLASS_BLOCK = '/sys/class/block'
+PROC_DISKSTATS = '/proc/diskstats'
+DISK_STATS_INTERVAL = float(os.environ.get('DISK_STATS_INTERVAL', '0.5'))
+# Os contadores de setores do kernel são sempre em unidades de 512 bytes
+SECTOR_SIZE = 512
+# Em kernels 32 bits os contadores são unsigned long e podem dar a volta
+COUNTER_WRAP = 2 ** 32
+
+@dataclass
+class DiskCounters:
+    """Contadores acumulados de um dispositivo (Documentation/block/stat.rst)"""
+    timestamp: float
+    reads: int
+    read_sectors: int
+    read_ticks: int
+    writes: int
+    write_sectors: int
+    write_ticks: int
+    in_flight: int
+    io_ticks: int
+    time_in_queue: int
+
+    @classmethod
+    def from_fields(cls, fields, timestamp: float) -> 'DiskCounters':
+        values = [int(field) for field in fields[:11]]
+        return cls(
+            timestamp=timestamp,
+            reads=values[0],
+            read_sectors=values[2],
+            read_ticks=values[3],
+            writes=values[4],
+            write_sectors=values[6],
+            write_ticks=values[7],
+            in_flight=values[8],
+            io_ticks=values[9],
+            time_in_queue=values[10],
+        )
+
+def _delta(current: int, previous: int) -> int:
+    if current >= previous:
+        return current - previous
+    # Volta do contador (32 bits); acima disso foi um reset e a janela é descartada
+    wrapped = current + COUNTER_WRAP - previous
+    return wrapped if wrapped < COUNTER_WRAP // 2 else 0
+
+def device_name(device_path: str) -> str:
+    """Nome do kernel (/dev/disk/by-id/... e /dev/sda -> sda)"""
+    return os.path.basename(os.path.realpath(device_path))
+
+def compute_rates(previous: DiskCounters, current: DiskCounters) -> Dict:
+    """Taxas entre duas leituras: MB/s, IOPS, %util, await e tempo de serviço (ms)"""
+    elapsed = current.timestamp - previous.timestamp
+    if elapsed <= 0:
+        return {}
+    reads = _delta(current.reads, previous.reads)
+    writes = _delta(current.writes, previous.writes)
+    read_ticks = _delta(current.read_ticks, previous.read_ticks)
+    write_ticks = _delta(current.write_ticks, previous.write_ticks)
+    io_ticks = _delta(current.io_ticks, previous.io_ticks)
+    ios = reads + writes
+    return {
+        'interval': round(elapsed, 3),
+        'read_mb_s': round(_delta(current.read_sectors, previous.read_sectors) * SECTOR_SIZE / MB / elapsed, 2),
+        'write_mb_s': round(_delta(current.write_sectors, previous.write_sectors) * SECTOR_SIZE / MB / elapsed, 2),
+        'read_iops': round(reads / elapsed, 1),
+        'write_iops': round(writes / elapsed, 1),
+        'iops': round(ios / elapsed, 1),
+        # io_ticks: ms com ao menos uma requisição em andamento
+        'utilization': round(min(100.0, io_ticks / (elapsed * 1000) * 100), 1),
+        # Tempo médio por requisição, fila incluída (await do iostat)
+        'read_await_ms': round(read_ticks / reads, 3) if reads else 0.0,
+        'write_await_ms': round(write_ticks / writes, 3) if writes else 0.0,
+        'await_ms': round((read_ticks + write_ticks) / ios, 3) if ios else 0.0,
+        # Tempo de dispositivo ocupado por requisição (svctm)
+        'service_time_ms': round(io_ticks / ios, 3) if ios else 0.0,
+        'queue_depth': round(_delta(current.time_in_queue, previous.time_in_queue) / (elapsed * 1000), 2),
+        'in_flight': current.in_flight,
+    }
+
+class DiskStatsReader:
+    """Leitor dos contadores de um dispositivo; o arquivo stat fica aberto e é relido com seek(0)"""
+
+    def __init__(self, device_path: str, sys_class_block: str = SYS_CLASS_BLOCK, proc_diskstats: str = PROC_DISKSTATS):
+        self.device_path = device_path
+        self.name = device_name(device_path)
+        self.proc_diskstats = proc_diskstats
+        self.stat_file = None
+        try:
+            self.stat_file = open(os.path.join(sys_class_block, self.name, 'stat'), 'rb', buffering=0)
+        except OSError:
+            logger.info(f"{self.name} sem stat no sysfs; usando {proc_diskstats}")
+
+    @property
+    def available(self) -> bool:
+        return self.stat_file is not None or self._read_diskstats() is not None
+
+    def _read_diskstats(self) -> Optional[list]:
+        try:
+            with open(self.proc_diskstats) as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 14 and fields[2] == self.name:
+                        return fields[3:]
+        except OSError:
+            pass
+        return None
+
+    def read(self) -> Optional[DiskCounters]:
+        """Leitura atual dos contadores (None se o dispositivo sumiu)"""
+        timestamp = time.monotonic()
+        if self.stat_file is not None:
+            try:
+                self.stat_file.seek(0)
+                fields = self.stat_file.read(512).split()
+                if len(fields) >= 11:
+                    return DiskCounters.from_fields(fields, timestamp)
+            except (OSError, ValueError):
+                pass
+        fields = self._read_diskstats()
+        return DiskCounters.from_fields(fields, timestamp) if fields else None
+
+    def close(self):
+        if self.stat_file is not None:
+            self.stat_file.close()
+            self.stat_file = None
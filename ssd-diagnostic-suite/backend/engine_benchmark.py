@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Precisão dos Motores de I/O
+Executa cada motor contra arquivos de teste (disco local e tmpfs), compara com um laço mínimo
+de syscalls sobre o mesmo alvo e falha se o overhead do motor passar do limite
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from statistics import mean, median, pstdev
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+from io_engine import (
+    SequentialIOEngine, RandomIOEngine, ScratchFile, AlignedBuffer, open_direct, get_target_size,
+    DEFAULT_READ_BLOCK_SIZE, RANDOM_BLOCK_SIZE, MB
+)
+from surface_scan import SurfaceScanner, DEFAULT_SCAN_CHUNK_SIZE
+from workload_profiles import precondition
+
+DEFAULT_DIRS = ['.', '/dev/shm']
+DEFAULT_FILE_SIZE = 256 * MB
+DEFAULT_RUNS = 5
+DEFAULT_DURATION = 2.0
+# Overhead máximo aceito do motor em relação ao laço mínimo (%)
+DEFAULT_MAX_OVERHEAD_PCT = 25.0
+# Em memória cada I/O custa ~3µs e a contabilidade por operação (sob o GIL) pesa muito mais
+DEFAULT_MAX_OVERHEAD_MEMORY_PCT = 40.0
+MEMORY_FILESYSTEMS = {'tmpfs', 'ramfs'}
+ENGINE_INTERVAL = 0.5
+
+# (bytes, operações, segundos)
+Measurement = Tuple[int, int, float]
+
+@dataclass
+class EngineCase:
+    """Um motor configurado e o laço mínimo equivalente"""
+    name: str
+    run_engine: Callable[[str, float], Dict]
+    run_baseline: Callable[[str, float], Measurement]
+
+def _open(path: str, write: bool, mixed: bool = False) -> Tuple[int, int]:
+    """Abre o alvo com os mesmos flags dos motores; retorna (fd, tamanho)"""
+    flags = os.O_RDWR if mixed else os.O_WRONLY if write else os.O_RDONLY
+    fd, _ = open_direct(path, flags)
+    return fd, get_target_size(fd)
+
+def baseline_sequential(path: str, seconds: float, block_size: int, write: bool = False) -> Measurement:
+    """Laço sequencial sem histograma nem amostragem"""
+    fd, size = _open(path, write)
+    buffer = AlignedBuffer(block_size, fill_random=write)
+    try:
+        submit = os.pwritev if write else os.preadv
+        buffers = [buffer.view]
+        offset = nbytes = ops = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline:
+            n = submit(fd, buffers, offset)
+            nbytes += n
+            ops += 1
+            offset += n
+            if n < block_size or offset >= size:
+                offset = 0
+        return nbytes, ops, time.perf_counter() - start
+    finally:
+        buffer.close()
+        os.close(fd)
+
+def baseline_random(path: str, seconds: float, block_size: int, queue_depth: int = 1, read_pct: int = 100) -> Measurement:
+    """Laço aleatório com uma thread por slot da fila, sem histograma"""
+    fd, size = _open(path, read_pct < 100, 0 < read_pct < 100)
+    nblocks = size // block_size
+    buffers = [AlignedBuffer(block_size, fill_random=read_pct < 100) for _ in range(queue_depth)]
+    deadline = time.perf_counter() + seconds
+
+    def worker(slot: int) -> int:
+        rng = random.Random()
+        views = [buffers[slot].view]
+        ops = 0
+        while time.perf_counter() < deadline:
+            offset = rng.randrange(nblocks) * block_size
+            if rng.random() * 100 < read_pct:
+                os.preadv(fd, views, offset)
+            else:
+                os.pwritev(fd, views, offset)
+            ops += 1
+        return ops
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=queue_depth) as executor:
+            ops = sum(executor.map(worker, range(queue_depth)))
+        return ops * block_size, ops, time.perf_counter() - start
+    finally:
+        for buffer in buffers:
+            buffer.close()
+        os.close(fd)
+
+def baseline_scan(path: str, seconds: float, chunk_size: int = DEFAULT_SCAN_CHUNK_SIZE) -> Measurement:
+    """Uma leitura completa do alvo em blocos do scan"""
+    fd, size = _open(path, False)
+    buffer = AlignedBuffer(chunk_size)
+    try:
+        buffers = [buffer.view]
+        offset = ops = 0
+        start = time.perf_counter()
+        while offset < size:
+            os.preadv(fd, buffers, offset)
+            offset += min(chunk_size, size - offset)
+            ops += 1
+        return offset, ops, time.perf_counter() - start
+    finally:
+        buffer.close()
+        os.close(fd)
+
+def run_io_engine(factory: Callable[[str], object], path: str, seconds: float) -> Dict:
+    """Executa um motor em intervalos, como run_diagnostic, e verifica a contabilidade"""
+    with factory(path) as engine:
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            engine.run_interval(min(ENGINE_INTERVAL, seconds - (time.perf_counter() - start)))
+        wall = time.perf_counter() - start
+        queue_depth = getattr(engine, 'queue_depth', 1)
+        errors = []
+        if engine.total_bytes != engine.total_ops * engine.block_size:
+            errors.append(f'bytes ({engine.total_bytes}) != ops x bloco ({engine.total_ops * engine.block_size})')
+        if engine.histogram.total != engine.total_ops:
+            errors.append(f'histograma com {engine.histogram.total} amostras para {engine.total_ops} ops')
+        if sum(s.bytes for s in engine.samples) != engine.total_bytes:
+            errors.append('soma das amostras difere do total')
+        # Tempo somado de I/O não pode exceder o tempo de parede x I/Os em voo
+        if engine.histogram.sum_ns / 1e9 > wall * queue_depth * 1.05:
+            errors.append('latência acumulada maior que o tempo de execução')
+        return {
+            'bytes': engine.total_bytes,
+            'ops': engine.total_ops,
+            'elapsed': engine.total_time,
+            'timing_error_pct': 100 * abs(wall - engine.total_time) / wall,
+            'latency': engine.histogram.summary(),
+            'direct_io': engine.direct,
+            'errors': errors
+        }
+
+def run_scanner(path: str, seconds: float) -> Dict:
+    """Uma passada completa do SurfaceScanner (checkpoints em diretório temporário)"""
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        with SurfaceScanner(path, checkpoint_dir=checkpoint_dir) as scanner:
+            start = time.perf_counter()
+            while not scanner.complete:
+                scanner.run_interval(ENGINE_INTERVAL)
+            wall = time.perf_counter() - start
+            errors = []
+            if scanner.offset != scanner.size:
+                errors.append(f'scan parou em {scanner.offset}/{scanner.size}')
+            if scanner.bad_regions.sectors('error'):
+                errors.append('setores com erro em arquivo saudável')
+            return {
+                'bytes': scanner.offset,
+                'ops': scanner.histogram.total,
+                'elapsed': scanner.scan_time,
+                'timing_error_pct': 100 * abs(wall - scanner.scan_time) / wall,
+                'latency': scanner.histogram.summary(),
+                'direct_io': scanner.direct,
+                'errors': errors
+            }
+
+def build_cases() -> List[EngineCase]:
+    """Todos os motores usados por run_diagnostic, nas configurações padrão"""
+    seq, rnd = DEFAULT_READ_BLOCK_SIZE, RANDOM_BLOCK_SIZE
+    return [
+        EngineCase('sequential_read_1M',
+                   lambda p, s: run_io_engine(lambda t: SequentialIOEngine(t, seq), p, s),
+                   lambda p, s: baseline_sequential(p, s, seq)),
+        EngineCase('sequential_write_1M',
+                   lambda p, s: run_io_engine(lambda t: SequentialIOEngine(t, seq, write=True), p, s),
+                   lambda p, s: baseline_sequential(p, s, seq, write=True)),
+        EngineCase('random_read_4K_qd1',
+                   lambda p, s: run_io_engine(lambda t: RandomIOEngine(t, rnd, 1), p, s),
+                   lambda p, s: baseline_random(p, s, rnd, 1)),
+        EngineCase('random_read_4K_qd4',
+                   lambda p, s: run_io_engine(lambda t: RandomIOEngine(t, rnd, 4), p, s),
+                   lambda p, s: baseline_random(p, s, rnd, 4)),
+        EngineCase('random_write_4K_qd1',
+                   lambda p, s: run_io_engine(lambda t: RandomIOEngine(t, rnd, 1, write=True), p, s),
+                   lambda p, s: baseline_random(p, s, rnd, 1, read_pct=0)),
+        EngineCase('mixed_70_30_4K_qd4',
+                   lambda p, s: run_io_engine(lambda t: RandomIOEngine(t, rnd, 4, read_pct=70), p, s),
+                   lambda p, s: baseline_random(p, s, rnd, 4, read_pct=70)),
+        EngineCase('surface_scan_4M', run_scanner, baseline_scan),
+    ]
+
+def _cv_pct(values: List[float]) -> float:
+    """Coeficiente de variação entre execuções (%)"""
+    avg = mean(values)
+    return 100 * pstdev(values) / avg if avg else 0.0
+
+def filesystem_type(path: str) -> str:
+    """Tipo do filesystem que contém `path` (ex: ext4, tmpfs)"""
+    path = os.path.realpath(path)
+    best = None
+    for partition in psutil.disk_partitions(all=True):
+        if path == partition.mountpoint or path.startswith(partition.mountpoint.rstrip('/') + '/'):
+            if best is None or len(partition.mountpoint) > len(best.mountpoint):
+                best = partition
+    return best.fstype if best else 'unknown'
+
+def benchmark_case(case: EngineCase, path: str, runs: int, duration: float, max_overhead: float,
+                   max_cv: Optional[float]) -> Dict:
+    """
+    Alterna motor e laço mínimo `runs` vezes e compara as taxas de operações
+    O overhead é a mediana das razões de cada par (motor e laço rodados lado a lado), para que
+    uma execução ruidosa no runner compartilhado não decida o resultado
+    """
+    engine_runs, baseline_runs = [], []
+    for _ in range(runs):
+        baseline_runs.append(case.run_baseline(path, duration))
+        engine_runs.append(case.run_engine(path, duration))
+
+    engine_iops = [r['ops'] / r['elapsed'] for r in engine_runs]
+    engine_mbps = [r['bytes'] / MB / r['elapsed'] for r in engine_runs]
+    baseline_iops = [ops / elapsed for _, ops, elapsed in baseline_runs]
+    overhead = 100 * (1 - median(engine / baseline for engine, baseline in zip(engine_iops, baseline_iops)))
+
+    failures = sorted({error for r in engine_runs for error in r['errors']})
+    if overhead > max_overhead:
+        failures.append(f'overhead {overhead:.1f}% > {max_overhead:.1f}%')
+    cv = _cv_pct(engine_iops)
+    if max_cv is not None and cv > max_cv:
+        failures.append(f'variação entre execuções {cv:.1f}% > {max_cv:.1f}%')
+
+    return {
+        'engine': case.name,
+        'direct_io': engine_runs[-1]['direct_io'],
+        'mb_per_s': round(mean(engine_mbps), 1),
+        'iops': round(mean(engine_iops)),
+        'iops_cv_pct': round(cv, 2),
+        'baseline_iops': round(mean(baseline_iops)),
+        'baseline_cv_pct': round(_cv_pct(baseline_iops), 2),
+        'overhead_pct': round(overhead, 2),
+        'timing_error_pct': round(max(r['timing_error_pct'] for r in engine_runs), 2),
+        'latency': engine_runs[-1]['latency'],
+        'failures': failures
+    }
+
+def benchmark_target(directory: str, args) -> Dict:
+    """Roda todos os casos sobre um arquivo de teste pré-condicionado no diretório"""
+    target = {'directory': directory, 'filesystem': filesystem_type(directory), 'cases': []}
+    with ScratchFile(directory, args.size, free_fraction=0.5) as scratch:
+        target['file_size'] = scratch.size
+        max_overhead = args.max_overhead_memory if target['filesystem'] in MEMORY_FILESYSTEMS else args.max_overhead
+        target['max_overhead_pct'] = max_overhead
+        precondition(scratch.path)
+        for case in build_cases():
+            if args.engines and case.name not in args.engines:
+                continue
+            result = benchmark_case(case, scratch.path, args.runs, args.duration, max_overhead, args.max_cv)
+            target['cases'].append(result)
+            status = 'FALHOU' if result['failures'] else 'ok'
+            print(f"  {case.name:<22} {result['mb_per_s']:>9.1f} MB/s {result['iops']:>9} IOPS "
+                  f"cv {result['iops_cv_pct']:>5.1f}% | base {result['baseline_iops']:>9} IOPS "
+                  f"overhead {result['overhead_pct']:>6.1f}% | p99 {result['latency']['p99_ms']:.3f}ms  {status}")
+            for failure in result['failures']:
+                print(f"      ❌ {failure}")
+    return target
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de precisão dos motores de I/O em arquivos de teste')
+    parser.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help='Diretórios dos arquivos de teste (disco local, tmpfs)')
+    parser.add_argument('--size', type=int, default=DEFAULT_FILE_SIZE, help='Tamanho do arquivo de teste em bytes')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='Execuções por motor')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help='Segundos por execução')
+    parser.add_argument('--max-overhead', type=float, default=DEFAULT_MAX_OVERHEAD_PCT, help='Overhead máximo do motor (%%)')
+    parser.add_argument('--max-overhead-memory', type=float, default=DEFAULT_MAX_OVERHEAD_MEMORY_PCT,
+                        help='Overhead máximo em tmpfs/ramfs (%%)')
+    parser.add_argument('--max-cv', type=float, default=None, help='Variação máxima entre execuções (%%); padrão só reporta')
+    parser.add_argument('--engines', nargs='+', help='Executar apenas estes casos')
+    parser.add_argument('-o', '--output', help='Arquivo de saída JSON')
+    args = parser.parse_args()
+
+    targets = []
+    for directory in args.dirs:
+        if not os.path.isdir(directory) or not os.access(directory, os.W_OK):
+            print(f"⚠️  {directory}: diretório inexistente ou sem escrita, ignorado")
+            continue
+        print(f"📁 {directory} ({filesystem_type(directory)})")
+        try:
+            targets.append(benchmark_target(directory, args))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  {directory}: {e}, ignorado")
+
+    failed = not targets or any(case['failures'] for target in targets for case in target['cases'])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'targets': targets, 'passed': not failed}, f, indent=2)
+    if not targets:
+        print("❌ Nenhum alvo pôde ser testado")
+    print("❌ Benchmark falhou" if failed else "✅ Motores dentro dos limites")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
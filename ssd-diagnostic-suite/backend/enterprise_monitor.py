@@ -7,8 +7,22 @@ import logging
 from typing import Dict, List, Callable
 from datetime import datetime, timedelta
 
+from smart_cache import get_smart_snapshot
+from smart_delta import SmartDelta
+
 logger = logging.getLogger(__name__)
 
+# Contadores SMART que só deveriam crescer com degradação real: qualquer incremento gera alerta
+CRITICAL_COUNTERS = {
+    5: 'Reallocated_Sector_Ct',
+    184: 'End-to-End_Error',
+    187: 'Reported_Uncorrect',
+    196: 'Reallocated_Event_Count',
+    197: 'Current_Pending_Sector',
+    198: 'Offline_Uncorrectable',
+}
+NVME_CRITICAL_COUNTERS = ('media_errors', 'critical_warning', 'num_err_log_entries')
+
 class EnterpriseMonitor:
     """Monitoramento contínuo com alertas automáticos"""
     
@@ -50,22 +64,58 @@ class EnterpriseMonitor:
     
     async def _check_device(self):
         """Verifica dispositivo e dispara alertas se necessário"""
-        # Implementar check via smartctl
         logger.info("Executando check de dispositivo...")
         
+        # Leitura nova: o rastreador de deltas chama process_smart_delta se algo mudou
+        await asyncio.to_thread(get_smart_snapshot, self.device_path, 0)
+        self.last_check[self.device_path] = datetime.now().isoformat()
+    
+    def process_smart_delta(self, delta: SmartDelta) -> List[Dict]:
+        """Avalia apenas os atributos que mudaram desde a última leitura e dispara alertas"""
         alerts = []
-        
-        # Aqui implementaria leitura SMART e verificação de thresholds
-        # Por ora, é um placeholder para a arquitetura
+        for change in delta.changes:
+            if change['delta'] is None:
+                continue
+            
+            if change['id'] in CRITICAL_COUNTERS and change['field'] == 'raw' and change['delta'] > 0:
+                alerts.append(self._alert(delta, change, 'critical',
+                                          f"{change['name']} +{change['delta']} (agora {change['current']})"))
+            elif change['key'].startswith('nvme.') and change['field'] in NVME_CRITICAL_COUNTERS and change['delta'] > 0:
+                alerts.append(self._alert(delta, change, 'critical',
+                                          f"NVMe {change['field']} +{change['delta']} (agora {change['current']})"))
+            elif change['field'] == 'percentage_used' and change['current'] >= self.thresholds['wear_level'] > change['previous']:
+                alerts.append(self._alert(delta, change, 'warning', f"Desgaste atingiu {change['current']}%"))
+            elif change['key'] == 'temperature' and change['current'] >= self.thresholds['temperature'] > change['previous']:
+                alerts.append(self._alert(delta, change, 'warning', f"Temperatura atingiu {change['current']}°C"))
+            elif change['key'] == 'smart_status' and change['current'] == 0:
+                alerts.append(self._alert(delta, change, 'critical', "SMART overall-health passou para FAILED"))
         
         if alerts:
-            await self._send_alerts(alerts)
+            self._dispatch_alerts(alerts)
+        return alerts
+    
+    def _alert(self, delta: SmartDelta, change: Dict, severity: str, message: str) -> Dict:
+        return {
+            'device': delta.device,
+            'severity': severity,
+            'message': message,
+            'change': change,
+            'timestamp': delta.timestamp
+        }
     
     async def _send_alerts(self, alerts: List[Dict]):
         """Envia alertas"""
+        self._dispatch_alerts(alerts)
+    
+    def _dispatch_alerts(self, alerts: List[Dict]):
+        """Registra os alertas e repassa aos callbacks"""
         for alert in alerts:
             logger.warning(f"ALERTA: {alert}")
-            # Aqui implementaria notificações (email, Slack, etc.)
+            for callback in self.alert_callbacks:
+                try:
+                    callback(alert)
+                except Exception as e:
+                    logger.error(f"Erro em callback de alerta: {e}")
     
     def set_thresholds(self, thresholds: Dict):
         """Define thresholds personalizados"""
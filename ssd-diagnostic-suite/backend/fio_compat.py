@@ -0,0 +1,376 @@
+"""
+Compatibilidade com fio
+Importa um subconjunto de job files do fio (rw, bs, iodepth, size, runtime, numjobs), executa
+com o motor de I/O embutido e gera resultados no esquema JSON do fio (--output-format=json)
+"""
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from io_engine import SequentialIOEngine, RandomIOEngine, IOSample, validate_block_size, MB, MAX_QUEUE_DEPTH
+from latency_histogram import LatencyHistogram, merge_histograms
+
+logger = logging.getLogger(__name__)
+
+FIO_VERSION = 'fio-compat (ssd-diagnostic-suite)'
+# Percentis reportados pelo fio por padrão em clat_ns
+FIO_PERCENTILES = (1.0, 5.0, 10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0, 80.0, 90.0,
+                   95.0, 99.0, 99.5, 99.9, 99.95, 99.99)
+SUPPORTED_OPTIONS = {'rw', 'readwrite', 'rwmixread', 'rwmixwrite', 'bs', 'blocksize', 'iodepth',
+                     'size', 'runtime', 'numjobs', 'time_based'}
+# Padrões de acesso do fio -> (padrão do motor, percentual de leituras padrão)
+RW_MODES = {
+    'read': ('sequential', 100),
+    'write': ('sequential', 0),
+    'randread': ('random', 100),
+    'randwrite': ('random', 0),
+    'randrw': ('random', 50),
+}
+DEFAULT_BLOCK_SIZE = 4096
+# Sem runtime e sem size alcançado, nenhum job roda indefinidamente
+MAX_RUNTIME = 3600.0
+# Primeiro intervalo curto para estimar a taxa antes de dimensionar os seguintes
+PROBE_INTERVAL = 0.02
+MIN_INTERVAL = 0.01
+# Cada clone (numjobs) é um motor com iodepth threads: limita o total que um job file pode abrir
+MAX_NUMJOBS = 16
+MAX_JOB_THREADS = 1024
+
+_SIZE_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*([kmgtp]?)(?:i?b)?$', re.IGNORECASE)
+_TIME_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*(us|ms|s|m|h|d)?$', re.IGNORECASE)
+_TIME_UNITS = {'us': 1e-6, 'ms': 1e-3, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def parse_size(value: str) -> int:
+    """Tamanho no formato do fio (4k, 1m, 2GiB...) com base 1024, como o padrão kb_base do fio"""
+    match = _SIZE_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Tamanho inválido: {value}")
+    exponent = ' kmgtp'.index(match.group(2).lower() or ' ')
+    return int(float(match.group(1)) * 1024 ** exponent)
+
+def parse_time(value: str) -> float:
+    """Duração no formato do fio (segundos por padrão; us, ms, s, m, h, d)"""
+    match = _TIME_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Duração inválida: {value}")
+    return float(match.group(1)) * _TIME_UNITS[(match.group(2) or 's').lower()]
+
+@dataclass
+class FioJob:
+    """Job do fio resolvido (opções globais + da seção)"""
+    name: str
+    pattern: str
+    read_pct: int
+    block_size: int
+    iodepth: int = 1
+    size: Optional[int] = None
+    runtime: Optional[float] = None
+    numjobs: int = 1
+    time_based: bool = False
+    options: Dict[str, str] = field(default_factory=dict)
+    ignored: List[str] = field(default_factory=list)
+
+def _read_sections(text: str) -> List[tuple]:
+    """Seções [nome] e opções chave=valor, na ordem do arquivo"""
+    sections = []
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        line = raw.split(';', 1)[0].split('#', 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            sections.append((line[1:-1].strip(), {}))
+            continue
+        if not sections:
+            raise ValueError(f"Linha {lineno}: opção fora de uma seção: {raw.strip()}")
+        key, _, value = line.partition('=')
+        sections[-1][1][key.strip().lower()] = value.strip()
+    return sections
+
+def _build_job(name: str, options: Dict[str, str]) -> FioJob:
+    rw = options.get('rw', options.get('readwrite', 'read')).split(':', 1)[0].lower()
+    if rw not in RW_MODES:
+        raise ValueError(f"Job {name}: rw={rw} não suportado (suportados: {', '.join(RW_MODES)})")
+    pattern, read_pct = RW_MODES[rw]
+    if rw == 'randrw':
+        if 'rwmixread' in options:
+            read_pct = int(options['rwmixread'])
+        elif 'rwmixwrite' in options:
+            read_pct = 100 - int(options['rwmixwrite'])
+    # bs=4k,8k define leitura,escrita no fio; o motor usa um único tamanho
+    block_size = validate_block_size(parse_size(options.get('bs', options.get('blocksize', str(DEFAULT_BLOCK_SIZE))).split(',')[0]))
+    iodepth = max(1, int(options.get('iodepth', 1)))
+    numjobs = max(1, int(options.get('numjobs', 1)))
+    if iodepth > MAX_QUEUE_DEPTH:
+        raise ValueError(f"Job {name}: iodepth={iodepth} acima do máximo ({MAX_QUEUE_DEPTH})")
+    if numjobs > MAX_NUMJOBS:
+        raise ValueError(f"Job {name}: numjobs={numjobs} acima do máximo ({MAX_NUMJOBS})")
+    if pattern == 'random' and iodepth * numjobs > MAX_JOB_THREADS:
+        raise ValueError(f"Job {name}: iodepth × numjobs = {iodepth * numjobs} acima do máximo ({MAX_JOB_THREADS})")
+    return FioJob(
+        name=name,
+        pattern=pattern,
+        read_pct=max(0, min(100, read_pct)),
+        block_size=block_size,
+        iodepth=iodepth,
+        size=parse_size(options['size']) if 'size' in options else None,
+        runtime=parse_time(options['runtime']) if 'runtime' in options else None,
+        numjobs=numjobs,
+        time_based='time_based' in options and options['time_based'] not in ('0', 'false'),
+        options=dict(options),
+        ignored=sorted(set(options) - SUPPORTED_OPTIONS)
+    )
+
+def parse_fio_jobfile(text: str) -> Dict:
+    """Lê um job file do fio; retorna {'global': opções, 'jobs': [FioJob]}"""
+    global_options: Dict[str, str] = {}
+    jobs = []
+    for name, options in _read_sections(text):
+        if name == 'global':
+            global_options.update(options)
+            continue
+        job = _build_job(name, {**global_options, **options})
+        if job.ignored:
+            logger.warning(f"fio job {name}: opções ignoradas {job.ignored}")
+        jobs.append(job)
+    if not jobs:
+        raise ValueError("Job file sem jobs")
+    return {'global': global_options, 'jobs': jobs}
+
+class FioJobRunner:
+    """
+    Executa um FioJob com o motor embutido: numjobs motores em paralelo no mesmo arquivo,
+    iodepth como profundidade de fila (threads) nos padrões aleatórios.
+    """
+
+    def __init__(self, job: FioJob, path: str, sync: bool = False):
+        self.job = job
+        self.path = path
+        if job.pattern == 'sequential':
+            self.engines = [SequentialIOEngine(path, job.block_size, write=job.read_pct == 0, sync=sync)
+                            for _ in range(job.numjobs)]
+        else:
+            self.engines = [RandomIOEngine(path, job.block_size, job.iodepth, sync=sync, read_pct=job.read_pct)
+                            for _ in range(job.numjobs)]
+        self.executor = None
+        self.samples: List[IOSample] = []
+        self.started = None
+        self.cpu_start = None
+
+    def open(self):
+        try:
+            for engine in self.engines:
+                engine.open()
+        except Exception:
+            self.close()
+            raise
+        if len(self.engines) > 1:
+            self.executor = ThreadPoolExecutor(max_workers=len(self.engines), thread_name_prefix='fiojob')
+        self.started = time.time()
+        self.cpu_start = os.times()
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        for engine in self.engines:
+            engine.close()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(engine.total_bytes for engine in self.engines)
+
+    @property
+    def done(self) -> bool:
+        """Sem time_based, o job termina ao transferir `size` bytes por clone (como no fio)"""
+        size = self.job.size or self.engines[0].size
+        return not self.job.time_based and self.total_bytes >= size * len(self.engines)
+
+    def next_interval(self, interval: float) -> float:
+        """
+        Duração do próximo intervalo, encurtada pela taxa medida para não passar de `size`
+        Cobre metade do restante por vez, convergindo mesmo com a taxa variando.
+        """
+        if self.job.time_based:
+            return interval
+        if not self.samples:
+            return min(interval, PROBE_INTERVAL)
+        recent = self.samples[-3:]
+        rate = sum(s.bytes for s in recent) / sum(s.interval for s in recent)
+        remaining = (self.job.size or self.engines[0].size) * len(self.engines) - self.total_bytes
+        return max(MIN_INTERVAL, min(interval, remaining / rate / 2)) if rate else interval
+
+    def run_interval(self, seconds: float) -> IOSample:
+        """Executa todos os clones durante `seconds` e agrega as amostras (bloqueante)"""
+        if self.executor:
+            samples = list(self.executor.map(lambda engine: engine.run_interval(seconds), self.engines))
+        else:
+            samples = [self.engines[0].run_interval(seconds)]
+        ops = sum(s.ops for s in samples)
+        sample = IOSample(
+            timestamp=max(s.timestamp for s in samples),
+            interval=max(s.interval for s in samples),
+            bytes=sum(s.bytes for s in samples),
+            ops=ops,
+            mb_per_s=sum(s.mb_per_s for s in samples),
+            iops=sum(s.iops for s in samples),
+            avg_latency_ms=sum(s.avg_latency_ms * s.ops for s in samples) / ops if ops else 0.0,
+            p99_latency_ms=max(s.p99_latency_ms for s in samples),
+            max_latency_ms=max(s.max_latency_ms for s in samples)
+        )
+        self.samples.append(sample)
+        return sample
+
+    def _direction(self, nbytes: int, ops: int, runtime: float, histogram: LatencyHistogram, share: float) -> Dict:
+        """Seção read/write no formato do fio"""
+        if not ops:
+            return _empty_direction()
+        clat = _latency_stats(histogram, percentiles=True)
+        bw_samples = [s.bytes * share / 1024 / s.interval for s in self.samples if s.interval]
+        iops_samples = [s.ops * share / s.interval for s in self.samples if s.interval]
+        return {
+            'io_bytes': nbytes,
+            'io_kbytes': nbytes // 1024,
+            'bw_bytes': int(nbytes / runtime) if runtime else 0,
+            'bw': int(nbytes / 1024 / runtime) if runtime else 0,
+            'iops': ops / runtime if runtime else 0.0,
+            'runtime': int(runtime * 1000),
+            'total_ios': ops,
+            'short_ios': 0,
+            'drop_ios': 0,
+            # I/O síncrono: sem fila de submissão, então slat é zero e lat == clat
+            'slat_ns': {'min': 0, 'max': 0, 'mean': 0.0, 'stddev': 0.0, 'N': 0},
+            'clat_ns': clat,
+            'lat_ns': {k: v for k, v in clat.items() if k != 'percentile'},
+            'bw_min': int(min(bw_samples)) if bw_samples else 0,
+            'bw_max': int(max(bw_samples)) if bw_samples else 0,
+            'bw_agg': 100.0,
+            'bw_mean': sum(bw_samples) / len(bw_samples) if bw_samples else 0.0,
+            'bw_dev': _stddev(bw_samples),
+            'bw_samples': len(bw_samples),
+            'iops_min': int(min(iops_samples)) if iops_samples else 0,
+            'iops_max': int(max(iops_samples)) if iops_samples else 0,
+            'iops_mean': sum(iops_samples) / len(iops_samples) if iops_samples else 0.0,
+            'iops_stddev': _stddev(iops_samples),
+            'iops_samples': len(iops_samples)
+        }
+
+    def result(self) -> Dict:
+        """Entrada de `jobs` do JSON do fio (clones agregados, como group_reporting=1)"""
+        runtime = max(engine.total_time for engine in self.engines)
+        total_ops = sum(engine.total_ops for engine in self.engines)
+        write_ops = sum(getattr(engine, 'total_write_ops', engine.total_ops if engine.write else 0)
+                        for engine in self.engines)
+        read_ops = total_ops - write_ops
+        # Cargas mistas compartilham o histograma: a latência reportada é a combinada
+        histogram = merge_histograms([engine.histogram for engine in self.engines])
+        cpu = os.times()
+        cpu_wall = runtime or 1.0
+        block_size = self.job.block_size
+        job_options = dict(self.job.options)
+        return {
+            'jobname': self.job.name,
+            'groupid': 0,
+            'error': 0,
+            'eta': 0,
+            'elapsed': int(round(time.time() - self.started)) if self.started else 0,
+            'job options': job_options,
+            'read': self._direction(read_ops * block_size, read_ops, runtime, histogram,
+                                    read_ops / total_ops if total_ops else 0),
+            'write': self._direction(write_ops * block_size, write_ops, runtime, histogram,
+                                     write_ops / total_ops if total_ops else 0),
+            'trim': _empty_direction(),
+            'sync': {'total_ios': 0, 'lat_ns': {'min': 0, 'max': 0, 'mean': 0.0, 'stddev': 0.0, 'N': 0}},
+            'job_runtime': int(runtime * 1000),
+            'usr_cpu': 100 * (cpu.user - self.cpu_start.user) / cpu_wall if self.cpu_start else 0.0,
+            'sys_cpu': 100 * (cpu.system - self.cpu_start.system) / cpu_wall if self.cpu_start else 0.0,
+            'ctx': 0,
+            'majf': 0,
+            'minf': 0,
+            'iodepth_level': _iodepth_level(self.job.iodepth if self.job.pattern == 'random' else 1),
+            'latency_ns': {},
+            'latency_us': {},
+            'latency_ms': {},
+            'direct_io': all(engine.direct for engine in self.engines),
+            'ignored_options': self.job.ignored
+        }
+
+def _stddev(values: List[float]) -> float:
+    if len(values) < 2:
+        return 0.0
+    mean = sum(values) / len(values)
+    return (sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5
+
+def _latency_stats(histogram: LatencyHistogram, percentiles: bool = False) -> Dict:
+    stats = {
+        'min': histogram.min_ns,
+        'max': histogram.max_ns,
+        'mean': histogram.mean_ns,
+        'stddev': histogram.stddev_ns,
+        'N': histogram.total
+    }
+    if percentiles:
+        stats['percentile'] = {f'{p:.6f}': v for p, v in zip(FIO_PERCENTILES, histogram.percentiles(FIO_PERCENTILES))}
+    return stats
+
+def _empty_direction() -> Dict:
+    """Seção sem I/O (ex: write de um job só leitura)"""
+    empty = {'min': 0, 'max': 0, 'mean': 0.0, 'stddev': 0.0, 'N': 0}
+    return {
+        'io_bytes': 0, 'io_kbytes': 0, 'bw_bytes': 0, 'bw': 0, 'iops': 0.0, 'runtime': 0,
+        'total_ios': 0, 'short_ios': 0, 'drop_ios': 0,
+        'slat_ns': dict(empty), 'clat_ns': dict(empty), 'lat_ns': dict(empty),
+        'bw_min': 0, 'bw_max': 0, 'bw_agg': 0.0, 'bw_mean': 0.0, 'bw_dev': 0.0, 'bw_samples': 0,
+        'iops_min': 0, 'iops_max': 0, 'iops_mean': 0.0, 'iops_stddev': 0.0, 'iops_samples': 0
+    }
+
+def _iodepth_level(iodepth: int) -> Dict:
+    """Distribuição de profundidade de fila: o motor mantém sempre `iodepth` I/Os em voo"""
+    levels = ['1', '2', '4', '8', '16', '32', '>=64']
+    bucket = min(len(levels) - 1, max(0, iodepth.bit_length() - 1))
+    return {level: 100.0 if i == bucket else 0.0 for i, level in enumerate(levels)}
+
+def fio_output(global_options: Dict[str, str], job_results: List[Dict]) -> Dict:
+    """Documento completo no esquema JSON do fio"""
+    now = time.time()
+    return {
+        'fio version': FIO_VERSION,
+        'timestamp': int(now),
+        'timestamp_ms': int(now * 1000),
+        'time': time.strftime('%a %b %d %H:%M:%S %Y', time.localtime(now)),
+        'global options': dict(global_options),
+        'jobs': job_results,
+        'disk_util': []
+    }
+
+def scratch_size(jobs: List[FioJob], default: int) -> int:
+    """Tamanho do arquivo de teste compartilhado pelos jobs (o maior `size`)"""
+    sizes = [job.size for job in jobs if job.size]
+    return max(sizes) if sizes else default
+
+def needs_layout(jobs: List[FioJob]) -> bool:
+    """Jobs com leitura precisam do arquivo escrito antes (o fio faz 'Laying out IO file')"""
+    return any(job.read_pct > 0 for job in jobs)
+
+def job_budget(job: FioJob) -> float:
+    """Tempo máximo do job: runtime, ou MAX_RUNTIME quando limitado só por size"""
+    return job.runtime if job.runtime else MAX_RUNTIME
+
+def run_fio_job(job: FioJob, path: str, sync: bool = False, interval: float = 1.0) -> Dict:
+    """Executa um job até runtime/size (bloqueante) e retorna a entrada de `jobs`"""
+    with FioJobRunner(job, path, sync) as runner:
+        deadline = time.monotonic() + job_budget(job)
+        while time.monotonic() < deadline and not runner.done:
+            runner.run_interval(runner.next_interval(min(interval, deadline - time.monotonic())))
+        logger.info(f"fio job {job.name}: {runner.total_bytes / MB:.0f} MB em {len(runner.samples)} intervalos")
+        return runner.result()
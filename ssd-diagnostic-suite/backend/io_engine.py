@@ -0,0 +1,441 @@
+"""
+Motor de I/O Real com O_DIRECT
+Implementa leitura e escrita, sequencial e aleatória, com buffers alinhados e reutilizáveis.
+Escritas só acontecem em arquivos de teste (scratch) pré-alocados, nunca em blocos crus.
+"""
+import errno
+import mmap
+import os
+import random
+import stat
+import time
+import logging
+import psutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from latency_histogram import LatencyHistogram, merge_histograms
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = mmap.PAGESIZE
+# O_DIRECT só existe no Linux; em outros sistemas caímos para I/O bufferizado
+O_DIRECT = getattr(os, 'O_DIRECT', 0)
+# Alinhamento exigido por O_DIRECT (cobre setores lógicos de 512 e 4096 bytes)
+DIRECT_ALIGNMENT = 4096
+DEFAULT_READ_BLOCK_SIZE = 1024 * 1024
+RANDOM_BLOCK_SIZE = 4096
+DEFAULT_QUEUE_DEPTHS = [1, 32]
+# Uma thread por requisição em voo: limita o que um pedido pode abrir
+MAX_QUEUE_DEPTH = 256
+MB = 1024 * 1024
+DEFAULT_SCRATCH_SIZE = 1024 * MB
+MIN_SCRATCH_SIZE = 64 * MB
+# Fração máxima do espaço livre que o arquivo de teste pode ocupar
+SCRATCH_FREE_FRACTION = 0.1
+SCRATCH_PREFIX = '.ssd-diagnostic-scratch-'
+
+def align_up(value: int, alignment: int) -> int:
+    """Arredonda valor para cima até o múltiplo de alignment"""
+    return (value + alignment - 1) // alignment * alignment
+
+def align_down(value: int, alignment: int) -> int:
+    """Arredonda valor para baixo até o múltiplo de alignment"""
+    return value // alignment * alignment
+
+def validate_block_size(block_size: int) -> int:
+    """Garante bloco compatível com O_DIRECT"""
+    block_size = int(block_size)
+    if block_size <= 0 or block_size % DIRECT_ALIGNMENT:
+        raise ValueError(f"Tamanho de bloco inválido: {block_size} (deve ser múltiplo de {DIRECT_ALIGNMENT})")
+    return block_size
+
+class AlignedBuffer:
+    """Buffer alinhado à página (mmap anônimo), alocado uma vez e reutilizado"""
+
+    def __init__(self, size: int, fill_random: bool = False):
+        self.size = align_up(size, PAGE_SIZE)
+        self._mmap = mmap.mmap(-1, self.size)
+        self.view = memoryview(self._mmap)
+        if fill_random:
+            # Dados incompressíveis: controladoras com compressão/dedup não mascaram a escrita
+            self.view[:] = os.urandom(self.size)
+
+    def close(self):
+        """Libera o mapeamento"""
+        self.view.release()
+        self._mmap.close()
+
+def open_direct(path: str, flags: int = os.O_RDONLY) -> Tuple[int, bool]:
+    """
+    Abre arquivo/dispositivo com O_DIRECT
+    Retorna (fd, direct). Filesystems sem suporte (ex: tmpfs) caem para I/O bufferizado.
+    """
+    if O_DIRECT:
+        try:
+            return os.open(path, flags | O_DIRECT), True
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+            logger.warning(f"O_DIRECT não suportado em {path}, usando I/O bufferizado")
+    return os.open(path, flags), False
+
+def get_target_size(fd: int) -> int:
+    """Tamanho do alvo em bytes (funciona para arquivos e dispositivos de bloco)"""
+    return os.lseek(fd, 0, os.SEEK_END)
+
+@dataclass
+class IOSample:
+    """Amostra de throughput medida em um intervalo"""
+    timestamp: float  # time.monotonic() no fim do intervalo
+    interval: float
+    bytes: int
+    ops: int
+    mb_per_s: float
+    iops: float
+    avg_latency_ms: float = 0.0
+    p99_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+
+def _block_device_numbers(device_path: str) -> Set[int]:
+    """dev_t do disco e de todas as suas partições (ex: /dev/sda, /dev/sda1, ...)"""
+    name = os.path.basename(os.path.realpath(device_path))
+    sys_dir = f'/sys/class/block/{name}'
+    numbers = set()
+    # Partição informada: sobe para o disco inteiro
+    if os.path.exists(f'{sys_dir}/partition'):
+        sys_dir = os.path.dirname(os.path.realpath(sys_dir))
+    sys_dir = os.path.realpath(sys_dir)
+    candidates = [sys_dir] + [
+        os.path.join(sys_dir, entry) for entry in os.listdir(sys_dir)
+        if os.path.exists(os.path.join(sys_dir, entry, 'partition'))
+    ]
+    for path in candidates:
+        with open(os.path.join(path, 'dev')) as f:
+            major, minor = f.read().strip().split(':')
+        numbers.add(os.makedev(int(major), int(minor)))
+    return numbers
+
+def is_on_device(path: str, device_path: str) -> bool:
+    """Verifica se o filesystem que contém `path` está no disco `device_path`"""
+    try:
+        return os.stat(path).st_dev in _block_device_numbers(device_path)
+    except (OSError, ValueError):
+        return False
+
+def target_on_device(path: str, device_path: str) -> bool:
+    """Alvo de I/O pertence ao disco: o próprio disco, uma partição dele ou um arquivo em um de seus filesystems"""
+    try:
+        st = os.stat(path)
+        number = st.st_rdev if stat.S_ISBLK(st.st_mode) else st.st_dev
+        return number in _block_device_numbers(device_path)
+    except (OSError, ValueError):
+        return False
+
+def find_scratch_dir(device_path: str) -> Optional[str]:
+    """Localiza um ponto de montagem gravável em um filesystem do disco alvo"""
+    try:
+        devices = _block_device_numbers(device_path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Não foi possível resolver partições de {device_path}: {e}")
+        return None
+
+    for part in psutil.disk_partitions(all=False):
+        if 'ro' in part.opts.split(','):
+            continue
+        try:
+            if os.stat(part.mountpoint).st_dev in devices and os.access(part.mountpoint, os.W_OK):
+                return part.mountpoint
+        except OSError:
+            continue
+    return None
+
+class ScratchFile:
+    """
+    Arquivo de teste pré-alocado (fallocate) para benchmarks de escrita
+    Removido ao sair do contexto, mesmo em caso de erro.
+    """
+
+    def __init__(self, directory: str, size: int = DEFAULT_SCRATCH_SIZE,
+                 free_fraction: float = SCRATCH_FREE_FRACTION):
+        self.directory = directory
+        self.requested_size = size
+        self.free_fraction = free_fraction
+        self.path = None
+        self.size = 0
+
+    def __enter__(self):
+        free = psutil.disk_usage(self.directory).free
+        wanted = align_up(self.requested_size, DEFAULT_READ_BLOCK_SIZE)
+        available = align_down(int(free * self.free_fraction), DEFAULT_READ_BLOCK_SIZE)
+        # O mínimo só vale quando o espaço livre obriga a reduzir o arquivo; um tamanho pequeno pedido é aceito
+        if available < wanted and available < MIN_SCRATCH_SIZE:
+            raise ValueError(f"Espaço livre insuficiente em {self.directory} para arquivo de teste")
+        self.size = min(wanted, available)
+
+        self.path = os.path.join(self.directory, f'{SCRATCH_PREFIX}{os.getpid()}-{os.urandom(4).hex()}')
+        fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+        try:
+            os.posix_fallocate(fd, 0, self.size)
+        except Exception:
+            os.close(fd)
+            self._remove()
+            raise
+        os.close(fd)
+        logger.info(f"Arquivo de teste criado: {self.path} ({self.size} bytes)")
+        return self
+
+    def __exit__(self, *exc):
+        self._remove()
+
+    def _remove(self):
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+            logger.info(f"Arquivo de teste removido: {self.path}")
+
+class IOEngine:
+    """Base dos motores de I/O: abertura O_DIRECT, tamanho do alvo e acumuladores"""
+
+    def __init__(self, path: str, block_size: int, write: bool = False, sync: bool = False):
+        self.path = path
+        self.block_size = validate_block_size(block_size)
+        self.write = write
+        # Percentual de leituras (0-100); motores mistos sobrescrevem
+        self.read_pct = 0 if write else 100
+        self.sync = sync
+        self.fd = None
+        self.direct = False
+        self.size = 0
+        self.total_bytes = 0
+        self.total_ops = 0
+        self.total_time = 0.0
+        self.samples: List[IOSample] = []
+        # Latência por I/O de toda a execução
+        self.histogram = LatencyHistogram()
+
+    def open(self):
+        """Abre o alvo (somente leitura, a menos que haja escritas)"""
+        if self.write:
+            # Escrita só em arquivos regulares: nunca em blocos crus de um disco
+            if stat.S_ISBLK(os.stat(self.path).st_mode):
+                raise ValueError(f"Escrita direta em dispositivo de bloco não permitida: {self.path}")
+            flags = (os.O_RDWR if self.read_pct else os.O_WRONLY) | (os.O_DSYNC if self.sync else 0)
+        else:
+            flags = os.O_RDONLY
+        self.fd, self.direct = open_direct(self.path, flags)
+        try:
+            self.size = get_target_size(self.fd)
+            if self.size < self.block_size:
+                raise ValueError(f"Alvo {self.path} menor que o bloco de I/O ({self.size} bytes)")
+            self._allocate()
+        except Exception:
+            os.close(self.fd)
+            self.fd = None
+            raise
+
+    def _allocate(self):
+        """Aloca os recursos do motor (buffers, workers)"""
+
+    def _release(self):
+        """Libera os recursos alocados em _allocate"""
+
+    def close(self):
+        """Fecha o alvo e libera os recursos"""
+        self._release()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _record(self, nbytes: int, ops: int, elapsed: float, histogram: LatencyHistogram) -> IOSample:
+        """Acumula totais, mescla o histograma do intervalo e registra a amostra"""
+        self.total_bytes += nbytes
+        self.total_ops += ops
+        self.total_time += elapsed
+        self.histogram.merge(histogram)
+        p99 = histogram.percentile(99.0)
+        sample = IOSample(
+            timestamp=time.monotonic(),
+            interval=elapsed,
+            bytes=nbytes,
+            ops=ops,
+            mb_per_s=nbytes / MB / elapsed,
+            iops=ops / elapsed,
+            avg_latency_ms=histogram.mean_ns / 1e6,
+            p99_latency_ms=p99 / 1e6,
+            max_latency_ms=histogram.max_ns / 1e6
+        )
+        self.samples.append(sample)
+        return sample
+
+    def summary(self) -> Dict:
+        """Resumo da execução"""
+        speeds = [s.mb_per_s for s in self.samples]
+        return {
+            'target': self.path,
+            'block_size': self.block_size,
+            'operation': 'read' if self.read_pct == 100 else 'write' if self.read_pct == 0 else 'mixed',
+            'read_pct': self.read_pct,
+            'direct_io': self.direct,
+            'sync': self.sync,
+            'total_bytes': self.total_bytes,
+            'total_ops': self.total_ops,
+            'duration': round(self.total_time, 3),
+            'avg_mb_per_s': round(self.total_bytes / MB / self.total_time, 1) if self.total_time else 0,
+            'min_mb_per_s': round(min(speeds), 1) if speeds else 0,
+            'max_mb_per_s': round(max(speeds), 1) if speeds else 0,
+            'samples': len(self.samples),
+            'latency': self.histogram.summary()
+        }
+
+class SequentialIOEngine(IOEngine):
+    """I/O sequencial real com O_DIRECT (leitura por padrão)"""
+
+    def __init__(self, path: str, block_size: int = DEFAULT_READ_BLOCK_SIZE, write: bool = False, sync: bool = False):
+        super().__init__(path, block_size, write, sync)
+        self.offset = 0
+        self.buffer = None
+        self.interval_histogram = LatencyHistogram()
+
+    def _allocate(self):
+        self.buffer = AlignedBuffer(self.block_size, fill_random=self.write)
+        logger.info(f"I/O sequencial ({'escrita' if self.write else 'leitura'}) em {self.path}: "
+                    f"{self.size} bytes, bloco {self.block_size}, direct={self.direct}")
+
+    def _release(self):
+        if self.buffer:
+            self.buffer.close()
+            self.buffer = None
+
+    def run_interval(self, seconds: float) -> IOSample:
+        """Executa I/O sequencial durante `seconds` e retorna o throughput medido (bloqueante)"""
+        submit = os.pwritev if self.write else os.preadv
+        buffers = [self.buffer.view]
+        histogram = self.interval_histogram
+        histogram.reset()
+        nbytes = 0
+        ops = 0
+        start = time.perf_counter()
+        deadline = time.perf_counter_ns() + int(seconds * 1e9)
+
+        while True:
+            t0 = time.perf_counter_ns()
+            n = submit(self.fd, buffers, self.offset)
+            t1 = time.perf_counter_ns()
+            histogram.record(t1 - t0)
+            nbytes += n
+            ops += 1
+            self.offset += n
+            # Fim do dispositivo: recomeça do início
+            if n < self.block_size or self.offset >= self.size:
+                self.offset = 0
+            if t1 >= deadline:
+                break
+
+        return self._record(nbytes, ops, time.perf_counter() - start, histogram)
+
+class RandomIOEngine(IOEngine):
+    """
+    I/O aleatório real (4K por padrão) com profundidade de fila configurável
+    Cada slot da fila é uma thread com buffer próprio; os.preadv/pwritev liberam o GIL,
+    então queue_depth I/Os ficam realmente em voo ao mesmo tempo.
+    read_pct permite cargas mistas (ex: 70 = 70% leituras / 30% escritas).
+    """
+
+    def __init__(self, path: str, block_size: int = RANDOM_BLOCK_SIZE, queue_depth: int = 1,
+                 write: bool = False, sync: bool = False, read_pct: Optional[int] = None):
+        if read_pct is not None:
+            read_pct = max(0, min(100, int(read_pct)))
+            write = read_pct < 100
+        super().__init__(path, block_size, write, sync)
+        if read_pct is not None:
+            self.read_pct = read_pct
+        self.queue_depth = max(1, int(queue_depth))
+        self.total_write_ops = 0
+        self.buffers: List[AlignedBuffer] = []
+        self.rngs: List[random.Random] = []
+        self.executor = None
+        # Um histograma por slot: workers registram sem lock e são mesclados ao fim do intervalo
+        self.slot_histograms = [LatencyHistogram() for _ in range(self.queue_depth)]
+
+    def _allocate(self):
+        self.buffers = [AlignedBuffer(self.block_size, fill_random=self.write) for _ in range(self.queue_depth)]
+        self.rngs = [random.Random() for _ in range(self.queue_depth)]
+        self.executor = ThreadPoolExecutor(max_workers=self.queue_depth, thread_name_prefix='randio')
+        logger.info(f"I/O aleatório ({self.read_pct}% leitura) em {self.path}: "
+                    f"bloco {self.block_size}, QD{self.queue_depth}, direct={self.direct}")
+
+    def _release(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        for buffer in self.buffers:
+            buffer.close()
+        self.buffers = []
+
+    def _worker(self, slot: int, deadline: int) -> Tuple[int, int]:
+        """Emite I/Os aleatórios alinhados até o deadline (ns); retorna (operações, escritas)"""
+        read_pct = self.read_pct
+        submit = os.pwritev if read_pct == 0 else os.preadv
+        fd = self.fd
+        buffers = [self.buffers[slot].view]
+        rng = self.rngs[slot]
+        histogram = self.slot_histograms[slot]
+        histogram.reset()
+        block_size = self.block_size
+        nblocks = self.size // block_size
+        mixed = 0 < read_pct < 100
+        ops = 0
+        writes = 0
+
+        while True:
+            offset = rng.randrange(nblocks) * block_size
+            if mixed:
+                if rng.random() * 100 < read_pct:
+                    submit = os.preadv
+                else:
+                    submit = os.pwritev
+                    writes += 1
+            t0 = time.perf_counter_ns()
+            submit(fd, buffers, offset)
+            t1 = time.perf_counter_ns()
+            histogram.record(t1 - t0)
+            ops += 1
+            if t1 >= deadline:
+                break
+
+        if read_pct == 0:
+            writes = ops
+        return ops, writes
+
+    def run_interval(self, seconds: float) -> IOSample:
+        """Executa QD workers em paralelo durante `seconds` e retorna IOPS e latência (bloqueante)"""
+        start = time.perf_counter()
+        deadline = time.perf_counter_ns() + int(seconds * 1e9)
+        futures = [self.executor.submit(self._worker, slot, deadline) for slot in range(self.queue_depth)]
+        results = [f.result() for f in futures]
+        elapsed = time.perf_counter() - start
+        ops = sum(r[0] for r in results)
+        self.total_write_ops += sum(r[1] for r in results)
+
+        histogram = merge_histograms(self.slot_histograms)
+        return self._record(ops * self.block_size, ops, elapsed, histogram)
+
+    def summary(self) -> Dict:
+        """Resumo da execução incluindo IOPS e percentis de latência por I/O"""
+        summary = super().summary()
+        summary.update({
+            'queue_depth': self.queue_depth,
+            'read_ops': self.total_ops - self.total_write_ops,
+            'write_ops': self.total_write_ops,
+            'avg_iops': round(self.total_ops / self.total_time) if self.total_time else 0,
+            'avg_latency_ms': summary['latency']['mean_ms'],
+            'max_latency_ms': summary['latency']['max_ms']
+        })
+        return summary
@@ -0,0 +1,143 @@
+"""
+Histograma de Latência Log-Linear (estilo HDR)
+Registro O(1) em array de tamanho fixo, mesclável entre workers
+"""
+from array import array
+from typing import Dict, List, Optional
+
+# 2^SUB_BUCKET_BITS buckets lineares iniciais; depois HALF_COUNT buckets por potência de 2.
+# Erro relativo máximo de 1/HALF_COUNT (~0,8%).
+SUB_BUCKET_BITS = 8
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+HALF_COUNT = SUB_BUCKET_COUNT // 2
+# Maior valor rastreável: 2^40 ns (~18 minutos); acima disso o valor é saturado
+MAX_VALUE_BITS = 40
+MAX_TRACKABLE_NS = (1 << MAX_VALUE_BITS) - 1
+BUCKET_COUNT = SUB_BUCKET_COUNT + (MAX_VALUE_BITS - SUB_BUCKET_BITS) * HALF_COUNT
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+_ZEROS = array('Q', bytes(8 * BUCKET_COUNT))
+
+def _bucket_index(value: int) -> int:
+    """Índice do bucket para um valor em ns"""
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * HALF_COUNT + (value >> shift) - HALF_COUNT
+
+def _bucket_upper(index: int) -> int:
+    """Maior valor (ns) equivalente ao bucket"""
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift = (index - SUB_BUCKET_COUNT) // HALF_COUNT + 1
+    mantissa = (index - SUB_BUCKET_COUNT) % HALF_COUNT + HALF_COUNT
+    return ((mantissa + 1) << shift) - 1
+
+def _percentile_key(p: float) -> str:
+    """Nome do campo de percentil (50 -> p50, 99.9 -> p99_9)"""
+    return 'p' + f'{p:g}'.replace('.', '_')
+
+class LatencyHistogram:
+    """Histograma de latências em nanossegundos com buckets logarítmicos"""
+
+    __slots__ = ('counts', 'total', 'sum_ns', 'min_ns', 'max_ns')
+
+    def __init__(self):
+        self.counts = array('Q', _ZEROS)
+        self.reset()
+
+    def reset(self):
+        """Zera o histograma sem realocar o array"""
+        self.counts[:] = _ZEROS
+        self.total = 0
+        self.sum_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+
+    def record(self, value_ns: int):
+        """Registra uma latência em ns (O(1))"""
+        if value_ns < 0:
+            value_ns = 0
+        elif value_ns > MAX_TRACKABLE_NS:
+            value_ns = MAX_TRACKABLE_NS
+        self.counts[_bucket_index(value_ns)] += 1
+        if self.total == 0 or value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+        self.total += 1
+        self.sum_ns += value_ns
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Soma as contagens de outro histograma neste"""
+        if not other.total:
+            return
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        if self.total == 0 or other.min_ns < self.min_ns:
+            self.min_ns = other.min_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.total += other.total
+        self.sum_ns += other.sum_ns
+
+    def percentile(self, p: float) -> int:
+        """Valor (ns) abaixo do qual estão p% das amostras"""
+        return self.percentiles((p,))[0]
+
+    def percentiles(self, ps=DEFAULT_PERCENTILES) -> List[int]:
+        """Vários percentis em uma única passada pelos buckets"""
+        if not self.total:
+            return [0] * len(ps)
+        targets = sorted((max(1, int(self.total * p / 100.0 + 0.5)) if p < 100 else self.total, i)
+                         for i, p in enumerate(ps))
+        values = [self.max_ns] * len(ps)
+        seen = 0
+        pending = 0
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            seen += count
+            while pending < len(targets) and seen >= targets[pending][0]:
+                values[targets[pending][1]] = min(_bucket_upper(index), self.max_ns)
+                pending += 1
+            if pending == len(targets):
+                break
+        return values
+
+    @property
+    def mean_ns(self) -> float:
+        return self.sum_ns / self.total if self.total else 0.0
+
+    @property
+    def stddev_ns(self) -> float:
+        """Desvio padrão aproximado pelos buckets (erro da ordem da resolução do bucket)"""
+        if self.total < 2:
+            return 0.0
+        mean = self.mean_ns
+        squares = 0.0
+        for index, count in enumerate(self.counts):
+            if count:
+                squares += count * (min(_bucket_upper(index), self.max_ns) - mean) ** 2
+        return (squares / self.total) ** 0.5
+
+    def summary(self, ps=DEFAULT_PERCENTILES) -> Dict:
+        """Percentis, média, mínimo e máximo em milissegundos"""
+        result = {'count': self.total}
+        for p, value in zip(ps, self.percentiles(ps)):
+            result[f'{_percentile_key(p)}_ms'] = round(value / 1e6, 4)
+        result.update({
+            'mean_ms': round(self.mean_ns / 1e6, 4),
+            'min_ms': round(self.min_ns / 1e6, 4),
+            'max_ms': round(self.max_ns / 1e6, 4)
+        })
+        return result
+
+def merge_histograms(histograms: List[Optional[LatencyHistogram]]) -> LatencyHistogram:
+    """Mescla uma lista de histogramas em um novo"""
+    merged = LatencyHistogram()
+    for histogram in histograms:
+        if histogram is not None:
+            merged.merge(histogram)
+    return merged
@@ -4,26 +4,49 @@ from fastapi.responses import JSONResponse
 import asyncio
 import json
 import psutil
-# import pyudev  # Removido temporariamente
 from typing import Dict, List, Optional
-import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import time
 import logging
 from datetime import datetime
 import os
+import uuid
 import socketio
 import requests
 from groq import Groq
 from dotenv import load_dotenv
 import re
 from smart_analysis import analyze_smart_complete
+from smart_batch import analyze_smart_batch, batch_analyzer, BatchPoolError
 from report_generator import ReportGenerator
 from ai_explainer import generate_ai_explanation
-from temp_validator import validate_and_correct_temperature
+from temp_validator import validate_and_correct_temperature, temperature_validator
 from history_manager import history_manager
 from nvme_support import nvme_support
 from benchmark_database import benchmark_db
 from cmdb_api import router as cmdb_router
+from io_engine import (
+    SequentialIOEngine, RandomIOEngine, ScratchFile, find_scratch_dir, is_on_device, target_on_device,
+    validate_block_size, DEFAULT_READ_BLOCK_SIZE, DEFAULT_QUEUE_DEPTHS, MAX_QUEUE_DEPTH, DEFAULT_SCRATCH_SIZE, MB
+)
+from surface_scan import SurfaceScanner, DEFAULT_SCAN_CHUNK_SIZE, DEFAULT_SLOW_THRESHOLD_MS
+from workload_profiles import parse_profile, build_engine, precondition, point_result, list_profiles, DEFAULT_POINT_DURATION
+from sustained_write import (
+    detect_cache_cliff, build_time_series, DEFAULT_SUSTAINED_DURATION, DEFAULT_SUSTAINED_SIZE,
+    SUSTAINED_FREE_FRACTION, SUSTAINED_MAX_SIZE, SAMPLE_INTERVAL
+)
+from smart_cache import smart_cache, get_smart_snapshot, current_temperature
+from smart_delta import smart_delta_tracker
+from enterprise_monitor import enterprise_monitor
+from command_runner import command_runner
+from device_discovery import sysfs_available
+from device_inventory import device_inventory
+from thermal_sampler import ThermalSampler, workload_label
+from metrics_stream import MetricsStream
+from disk_stats import DiskStatsReader, compute_rates, DISK_STATS_INTERVAL
+from socket_publisher import SocketPublisher, FLEET_ROOM, job_room, device_room
+from fio_compat import parse_fio_jobfile, FioJobRunner, fio_output, scratch_size, needs_layout, job_budget
 
 # Carregar variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -73,20 +96,13 @@ else:
 sio = socketio.AsyncServer(cors_allowed_origins=allow_origins, async_mode='asgi')
 socket_app = socketio.ASGIApp(sio, app)
 
-# Monitor state
-monitor = {
-    'running': False,
-    'phase': None,
-    'progress': 0,
-    'message': 'Aguardando...',
-    'device_path': None,
-    'selected_device': None,
-    'results': {},
-    'metrics': {
+def initial_metrics() -> Dict:
+    """Métricas zeradas de um novo diagnóstico"""
+    return {
         'read_speed': 0,
         'write_speed': 0,
-        'temperature': 0,
-        'health': 0,
+        'temperature': 30,
+        'health': 100,
         'smart_data': {},
         'io_operations': 0,
         'error_rate': 0,
@@ -95,80 +111,384 @@ monitor = {
         'bad_blocks': 0,
         'wear_level': 0,
         'avg_latency': 0,
+        'latency_p50': 0,
+        'latency_p90': 0,
+        'latency_p99': 0,
+        'latency_p99_9': 0,
+        'latency_max': 0,
+        'steady_state_write_speed': 0,
         'iops': 0,
-    },
-    'config': {
-        'test_duration': 120,
-        'enable_advanced_analysis': True,
-        'enable_ai_insights': True,
-        'enable_deep_scan': False,
-        'enable_io_test': True,
-        'test_mode': 'simple',
-        'smart_test_depth': 'standard',
     }
+
+# Configuração padrão (GET/POST /config); cada job recebe uma cópia com os overrides do POST /run
+default_config = {
+    'test_duration': 120,
+    'enable_advanced_analysis': True,
+    'enable_ai_insights': True,
+    'enable_deep_scan': False,
+    'enable_io_test': True,
+    'test_mode': 'simple',
+    'smart_test_depth': 'standard',
+    'read_block_size': DEFAULT_READ_BLOCK_SIZE,
+    'io_target': None,  # Arquivo de teste opcional; padrão é o próprio dispositivo
+    'random_queue_depths': list(DEFAULT_QUEUE_DEPTHS),
+    'write_block_size': DEFAULT_READ_BLOCK_SIZE,
+    'write_sync': False,  # O_DSYNC nas escritas
+    'scratch_dir': None,  # Diretório do arquivo de teste; padrão é detectar no dispositivo
+    'scratch_file_size': DEFAULT_SCRATCH_SIZE,
+    'scan_chunk_size': DEFAULT_SCAN_CHUNK_SIZE,
+    'scan_slow_threshold_ms': DEFAULT_SLOW_THRESHOLD_MS,
+    'workload_profiles': [],  # Nomes de WORKLOAD_PROFILES ou definições customizadas
+    'profile_point_duration': DEFAULT_POINT_DURATION,
+    'enable_sustained_write': False,  # Escrita longa para detectar o fim do cache SLC
+    'sustained_write_duration': DEFAULT_SUSTAINED_DURATION,
+    'sustained_write_size': DEFAULT_SUSTAINED_SIZE,
+    'fio_job': None,  # Texto de um job file do fio (subconjunto: rw, bs, iodepth, size, runtime, numjobs)
 }
 
+# Jobs de diagnóstico por dispositivo: id -> estado (running, phase, progress, message, results, metrics, config)
+jobs: Dict[str, Dict] = {}
+# Dispositivo -> id do job mais recente
+device_jobs: Dict[str, str] = {}
+# Amostrador térmico (hwmon) de cada job em execução
+thermal_samplers: Dict[str, ThermalSampler] = {}
+# Métricas versionadas de cada job em execução (snapshot + deltas via Socket.IO)
+metric_streams: Dict[str, MetricsStream] = {}
+# Status + métricas de cada job mesclados em um frame por tick, com fila e limite de taxa por cliente;
+# entregues só a quem se inscreveu no job ou no dispositivo (evento 'subscribe')
+def metrics_snapshot(job_id: str) -> Optional[Dict]:
+    """Snapshot das métricas do job para resync dos clientes (None se ainda não há métricas)"""
+    stream = metric_streams.get(job_id)
+    return stream.snapshot() if stream else None
+
+publisher = SocketPublisher(sio.emit, snapshot=metrics_snapshot)
+# Resumo da frota (sala 'fleet'): campos de métricas incluídos e intervalo de publicação
+FLEET_METRICS = ('read_speed', 'write_speed', 'temperature', 'health', 'iops')
+FLEET_SUMMARY_INTERVAL = 1.0
+# Quantos dispositivos são diagnosticados ao mesmo tempo; os demais aguardam na fila
+MAX_PARALLEL_JOBS = max(1, int(os.environ.get('MAX_PARALLEL_JOBS', '4')))
+# Jobs concluídos mantidos em memória para /report
+MAX_FINISHED_JOBS = 100
+job_semaphore = asyncio.Semaphore(MAX_PARALLEL_JOBS)
+
+# Fração de config['test_duration'] dedicada a cada teste de I/O real
+PHASE_BUDGET = {
+    'sequential_read': 0.15,
+    'random_read': 0.15,  # Dividido entre as profundidades de fila configuradas
+    'sequential_write': 0.15,
+    'random_write': 0.15,
+    'latency': 0.1,
+}
+
+@app.on_event("startup")
+async def configure_executor():
+    """Dimensiona o executor padrão: cada job paralelo ocupa uma thread com o motor de I/O (asyncio.to_thread)"""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=MAX_PARALLEL_JOBS * 2 + 4))
+    # Comandos externos (smartctl, nvme, lsusb...) chamados de threads são agendados neste loop
+    command_runner.bind(loop)
+
+@app.on_event("startup")
+async def subscribe_smart_deltas():
+    """Deltas SMART (gerados na thread da coleta) vão para o Socket.IO e para os alertas do Enterprise Monitor"""
+    loop = asyncio.get_running_loop()
+    
+    def publish(delta):
+        asyncio.run_coroutine_threadsafe(
+            sio.emit('smart_delta', {**delta.to_dict(), 'device_path': delta.device}, room=device_room(delta.device)),
+            loop
+        )
+    
+    smart_delta_tracker.subscribe(publish)
+    smart_delta_tracker.subscribe(enterprise_monitor.process_smart_delta)
+
+@app.on_event("startup")
+async def start_device_inventory():
+    """Inventário de dispositivos em memória, atualizado por hotplug e publicado via Socket.IO"""
+    if command_runner.capture.replaying or not sysfs_available():
+        return
+    
+    async def publish(change: Dict):
+        # Disco removido ou trocado na mesma baia: snapshot SMART e base de deltas não valem mais
+        for device in change['removed'] + change['changed']:
+            smart_cache.invalidate(device['path'])
+            smart_delta_tracker.reset(device['path'])
+        # Bridge USB e hwmon são resolvidos de novo para qualquer disco que entrou, saiu ou mudou
+        for device in change['added'] + change['removed'] + change['changed']:
+            temperature_validator.invalidate(device['path'])
+        await sio.emit('devices_changed', change)
+    
+    await device_inventory.start(publish)
+
+@app.on_event("shutdown")
+def stop_device_inventory():
+    """Para o acompanhamento de hotplug"""
+    device_inventory.stop()
+
+@app.on_event("shutdown")
+def shutdown_batch_pool():
+    """Encerra o pool de processos da análise SMART em lote"""
+    batch_analyzer.shutdown()
+
+# Amostras (térmicas e de I/O) mantidas pelo monitor /ws
+THERMAL_HISTORY = 3600
+# Mensagens pendentes por conexão /ws; com a fila cheia a mais antiga é descartada
+WS_QUEUE_SIZE = 32
+WS_SEND_TIMEOUT = 5.0
+# Descartes seguidos (sem a fila esvaziar) antes de desconectar um cliente que não acompanha
+WS_MAX_OVERFLOWS = 64
+
+class WebSocketClient:
+    """Fila limitada e tarefa de envio de uma conexão /ws; um cliente travado não atrasa os demais"""
+    
+    def __init__(self, websocket: WebSocket, evict):
+        self.websocket = websocket
+        self.evict = evict
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WS_QUEUE_SIZE)
+        self.overflows = 0
+        self.task = asyncio.create_task(self._run())
+    
+    def offer(self, text: str) -> bool:
+        """Enfileira sem bloquear; False se o cliente está persistentemente atrasado"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.overflows += 1
+            if self.overflows >= WS_MAX_OVERFLOWS:
+                return False
+        self.queue.put_nowait(text)
+        return True
+    
+    async def _run(self):
+        while True:
+            text = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(text), WS_SEND_TIMEOUT)
+            except Exception as e:
+                reason = 'timeout de envio' if isinstance(e, asyncio.TimeoutError) else str(e)
+                asyncio.create_task(self.evict(self.websocket, reason))
+                return
+            if self.queue.empty():
+                self.overflows = 0
+    
+    def close(self):
+        self.task.cancel()
+
 class SSDMonitor:
     def __init__(self):
-        self.connected_clients: List[WebSocket] = []
+        self.clients: Dict[WebSocket, WebSocketClient] = {}
         self.monitoring: bool = False
         self.device_path: str = None
-        self.thermal_data: List[Dict] = []
-        self.performance_data: List[Dict] = []
+        self.monitor_task: Optional[asyncio.Task] = None
+        self.thermal_data: deque = deque(maxlen=THERMAL_HISTORY)
+        self.performance_data: deque = deque(maxlen=THERMAL_HISTORY)
+    
+    @property
+    def connected_clients(self) -> List[WebSocket]:
+        return list(self.clients)
         
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.connected_clients.append(websocket)
-        logger.info(f"Client connected. Total clients: {len(self.connected_clients)}")
+        self.clients[websocket] = WebSocketClient(websocket, self.evict)
+        logger.info(f"Client connected. Total clients: {len(self.clients)}")
         
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.connected_clients:
-            self.connected_clients.remove(websocket)
-            logger.info(f"Client disconnected. Total clients: {len(self.connected_clients)}")
+        client = self.clients.pop(websocket, None)
+        if client:
+            client.close()
+            logger.info(f"Client disconnected. Total clients: {len(self.clients)}")
+    
+    async def evict(self, websocket: WebSocket, reason: str):
+        """Remove um cliente que não acompanha as mensagens e fecha a conexão (1013: tente mais tarde)"""
+        if websocket not in self.clients:
+            return
+        logger.warning(f"Desconectando cliente /ws lento: {reason}")
+        self.disconnect(websocket)
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), WS_SEND_TIMEOUT)
+        except Exception:
+            pass
         
     async def broadcast(self, data: Dict):
-        for client in self.connected_clients[:]:  # copy list to avoid modification during iteration
-            try:
-                await client.send_json(data)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {e}")
-                self.disconnect(client)
+        """Serializa uma vez e enfileira para cada cliente; o envio é feito pela tarefa de cada conexão"""
+        if not self.clients:
+            return
+        text = json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+        for websocket, client in list(self.clients.items()):
+            if not client.offer(text):
+                asyncio.create_task(self.evict(websocket, f'{WS_MAX_OVERFLOWS} mensagens descartadas'))
+    
+    def start_monitoring(self, device_path: str):
+        """(Re)inicia o monitoramento passivo de um dispositivo"""
+        self.stop_monitoring()
+        self.device_path = device_path
+        self.monitoring = True
+        self.thermal_data.clear()
+        self.performance_data.clear()
+        self.monitor_task = asyncio.create_task(self.monitor_device())
+    
+    def stop_monitoring(self):
+        self.monitoring = False
+        if self.monitor_task is not None:
+            self.monitor_task.cancel()
+            self.monitor_task = None
+    
+    async def monitor_device(self):
+        """Amostra os contadores de I/O do kernel (sem subprocessos) e transmite as taxas via /ws"""
+        device_path = self.device_path
+        reader = DiskStatsReader(device_path)
+        try:
+            previous = reader.read()
+            if previous is None:
+                await self.broadcast({'type': 'error', 'device_path': device_path,
+                                      'message': 'Contadores de I/O do dispositivo não encontrados'})
+                self.monitoring = False
+                return
+            while self.monitoring:
+                await asyncio.sleep(DISK_STATS_INTERVAL)
+                current = reader.read()
+                if current is None:
+                    await self.broadcast({'type': 'error', 'device_path': device_path,
+                                          'message': 'Dispositivo removido'})
+                    break
+                sample = {'timestamp': datetime.now().isoformat(), **compute_rates(previous, current)}
+                previous = current
+                temp = temperature_validator.read_hwmon_temp(device_path)
+                if temp is not None:
+                    sample['temperature'] = round(temp, 1)
+                    self.thermal_data.append({'timestamp': sample['timestamp'], 'temperature': sample['temperature']})
+                self.performance_data.append(sample)
+                await self.broadcast({'type': 'disk_stats', 'device_path': device_path, **sample})
+        except Exception as e:
+            logger.error(f"Erro no monitoramento de {device_path}: {e}")
+        finally:
+            reader.close()
 
 ssd_monitor = SSDMonitor()
 
-def extract_temperature_from_sys(device_path: str):
+def extract_temperature_from_sys(device_path: str, metrics: Dict):
     """Extrai temperatura real do sistema"""
     try:
-        # Tentar obter temperatura do sysfs
-        temp_paths = [
-            f'/sys/block/{os.path.basename(device_path)}/device/hwmon/hwmon*/temp1_input',
-            f'/sys/block/{os.path.basename(device_path)}/queue/hw_sector_size',  # Indirect path
-        ]
-        # Para simplificar, obter de smartctl
-        result = subprocess.run(['smartctl', '-A', device_path], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            temp_match = re.search(r'Temperature.*?(\d+)', result.stdout)
+        # hwmon do dispositivo (caminho localizado uma vez): uma leitura de sysfs
+        temp = temperature_validator.read_hwmon_temp(device_path)
+        if temp is not None:
+            metrics['temperature'] = int(temp)
+            return
+        # Sem hwmon: snapshot SMART compartilhado
+        snapshot = get_smart_snapshot(device_path)
+        temp = current_temperature(snapshot)
+        if temp is not None:
+            metrics['temperature'] = int(temp)
+        elif snapshot.ok:
+            temp_match = re.search(r'Temperature.*?(\d+)', snapshot.text)
             if temp_match:
-                monitor['metrics']['temperature'] = int(temp_match.group(1))
+                metrics['temperature'] = int(temp_match.group(1))
     except:
         pass
 
 @sio.event
 async def connect(sid, environ):
     logger.info(f"Socket.IO client connected: {sid}")
-    await emit_status()
+    publisher.add_client(sid)
+
+def subscription_rooms(data: Dict) -> List[str]:
+    """Salas pedidas pelo cliente: job_id(s), device_path(s) e/ou fleet"""
+    data = data or {}
+    rooms = []
+    for key, room in (('job_id', job_room), ('device_path', device_room)):
+        values = data.get(key) or []
+        for value in [values] if isinstance(values, str) else values:
+            rooms.append(room(value))
+    if data.get('fleet'):
+        rooms.append(FLEET_ROOM)
+    return rooms
+
+@sio.event
+async def subscribe(sid, data):
+    """Inscreve o cliente nas salas de jobs/dispositivos (e no resumo da frota) e envia o estado atual"""
+    rooms = subscription_rooms(data)
+    for room in rooms:
+        await sio.enter_room(sid, room)
+        publisher.join(sid, room)
+    # Snapshot + status dos jobs em execução cobertos; os frames seguintes são deltas
+    for job in jobs.values():
+        if job['running'] and {job_room(job['id']), device_room(job['device_path'])} & set(rooms):
+            publisher.resync(job['id'], job['device_path'], sids=[sid])
+            publisher.publish(job['id'], job['device_path'], status=job_status(job), sids=[sid])
+    if FLEET_ROOM in rooms:
+        await sio.emit('fleet_summary', fleet_summary(), to=sid)
+    return {'rooms': rooms}
+
+@sio.event
+async def unsubscribe(sid, data):
+    """Remove o cliente das salas indicadas"""
+    rooms = subscription_rooms(data)
+    for room in rooms:
+        await sio.leave_room(sid, room)
+        publisher.leave(sid, room)
+    return {'rooms': rooms}
+
+@sio.event
+async def metrics_resync(sid, data):
+    """Cliente perdeu um delta (seq fora de ordem): reenvia o snapshot do job"""
+    stream = metric_streams.get((data or {}).get('job_id'))
+    if stream:
+        publisher.resync(stream.job_id, stream.device_path, sids=[sid])
 
 @sio.event
 async def disconnect(sid):
     logger.info(f"Socket.IO client disconnected: {sid}")
+    publisher.remove_client(sid)
+
+def fleet_summary() -> Dict:
+    """Visão geral leve de todos os jobs (sem métricas detalhadas nem resultados)"""
+    return {
+        'jobs': [
+            {**job_summary(job), **{key: job['metrics'].get(key) for key in FLEET_METRICS}}
+            for job in jobs.values()
+        ],
+        'running': sum(1 for job in jobs.values() if job['status'] == 'running'),
+        'queued': sum(1 for job in jobs.values() if job['status'] == 'queued'),
+    }
 
-async def emit_status():
-    """Broadcast current status to all connected clients"""
-    await sio.emit('status', {
-        'phase': monitor['phase'],
-        'progress': monitor['progress'],
-        'message': monitor['message']
-    })
+@app.on_event("startup")
+async def start_fleet_summary():
+    """Publica o resumo da frota na sala 'fleet' quando há inscritos e algo mudou"""
+    async def loop():
+        last = None
+        while True:
+            await asyncio.sleep(FLEET_SUMMARY_INTERVAL)
+            if not publisher.members(FLEET_ROOM):
+                last = None
+                continue
+            try:
+                summary = fleet_summary()
+                if summary != last:
+                    await sio.emit('fleet_summary', summary, room=FLEET_ROOM)
+                    last = summary
+            except Exception as e:
+                logger.error(f"Erro ao publicar resumo da frota: {e}")
+    
+    asyncio.create_task(loop())
+
+def job_status(job: Dict) -> Dict:
+    return {'phase': job['phase'], 'progress': job['progress'], 'message': job['message']}
+
+async def emit_status(job: Dict):
+    """Enfileira o status do job no frame do próximo tick de cada cliente"""
+    publisher.publish(job['id'], job['device_path'], status=job_status(job))
+
+async def emit_metrics(job: Dict):
+    """Enfileira os campos de métricas alterados desde o último envio (delta numerado por job)"""
+    sampler = thermal_samplers.get(job['id'])
+    temp = sampler.latest() if sampler else None
+    if temp is not None:
+        job['metrics']['temperature'] = round(temp, 1)
+    stream = metric_streams.get(job['id'])
+    if stream is None:
+        stream = metric_streams[job['id']] = MetricsStream(job['id'], job['device_path'])
+    delta = stream.delta(job['metrics'])
+    if delta:
+        publisher.publish(job['id'], job['device_path'], delta=delta)
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -176,12 +496,10 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_json()
-            if data.get('type') == 'start_monitoring':
-                ssd_monitor.device_path = data.get('device_path')
-                ssd_monitor.monitoring = True
-                asyncio.create_task(ssd_monitor.monitor_device())
+            if data.get('type') == 'start_monitoring' and data.get('device_path'):
+                ssd_monitor.start_monitoring(data['device_path'])
             elif data.get('type') == 'stop_monitoring':
-                ssd_monitor.monitoring = False
+                ssd_monitor.stop_monitoring()
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
     except Exception as e:
@@ -212,6 +530,8 @@ MÉTRICAS DE PERFORMANCE:
 - Ciclos de Energia: {metrics.get('power_cycle_count', 0)}
 - Bad Blocks: {metrics.get('bad_blocks', 0)}
 - Latência Média: {metrics.get('avg_latency', 0)}ms
+- Latência p50/p90/p99/p99.9/máx: {metrics.get('latency_p50', 0)}/{metrics.get('latency_p90', 0)}/{metrics.get('latency_p99', 0)}/{metrics.get('latency_p99_9', 0)}/{metrics.get('latency_max', 0)}ms
+- Escrita Sustentada (após cache SLC): {metrics.get('steady_state_write_speed', 0)} MB/s
 - IOPS: {metrics.get('iops', 0)}
 
 INSTRUÇÕES PARA A ANÁLISE:
@@ -354,104 +674,271 @@ OVERALL CONFIDENCE: {explanation.get('overall_confidence', 0) * 100:.1f}%
         logger.error(f"Error in AI analysis: {e}")
         return f"Erro na análise: {str(e)}"
 
+def parse_queue_depths(depths) -> List[int]:
+    """Profundidades de fila pedidas (int ou lista); ValueError se vazia, não inteira ou fora de 1..MAX_QUEUE_DEPTH"""
+    depths = depths if isinstance(depths, list) else [depths]
+    if not depths:
+        raise ValueError("Informe ao menos uma profundidade de fila")
+    for depth in depths:
+        if isinstance(depth, bool) or not isinstance(depth, int) or not 1 <= depth <= MAX_QUEUE_DEPTH:
+            raise ValueError(f"Profundidade de fila inválida: {depth!r} (inteiro de 1 a {MAX_QUEUE_DEPTH})")
+    # Repetidas gerariam o mesmo resultado qdN duas vezes
+    return list(dict.fromkeys(depths))
+
+# Overrides numéricos de POST /run: chave -> (só inteiros, mínimo, máximo)
+CONFIG_RANGES = {
+    'test_duration': (False, 1, 24 * 3600),
+    'profile_point_duration': (False, 0.1, 3600),
+    'sustained_write_duration': (False, 1, 24 * 3600),
+    'scan_slow_threshold_ms': (False, 0.001, 60000),
+    'scratch_file_size': (True, MB, 1024 * 1024 * MB),
+    'sustained_write_size': (True, MB, SUSTAINED_MAX_SIZE),
+}
+# Tamanhos usados como bloco de I/O com O_DIRECT
+BLOCK_SIZE_KEYS = ('read_block_size', 'write_block_size', 'scan_chunk_size')
+MAX_BLOCK_SIZE = 64 * MB
+
+def validate_config_value(key: str, value):
+    """Valida um override de POST /run; ValueError com a chave e o motivo"""
+    if key in CONFIG_RANGES or key in BLOCK_SIZE_KEYS:
+        integer, minimum, maximum = CONFIG_RANGES.get(key, (True, 1, MAX_BLOCK_SIZE))
+        if isinstance(value, bool) or not isinstance(value, int if integer else (int, float)):
+            raise ValueError(f"{key} deve ser {'inteiro' if integer else 'numérico'}: {value!r}")
+        if not minimum <= value <= maximum:
+            raise ValueError(f"{key} fora do intervalo {minimum}..{maximum}: {value}")
+        if key in BLOCK_SIZE_KEYS:
+            validate_block_size(value)
+    elif key in ('io_target', 'scratch_dir', 'fio_job'):
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{key} deve ser texto: {value!r}")
+    return value
+
+def apply_config(config: Dict, config_data: Dict):
+    """Aplica os overrides aceitos em POST /run sobre uma configuração (ValueError se algum for inválido)"""
+    if 'queue_depth' in config_data or 'random_queue_depths' in config_data:
+        depths = config_data.get('random_queue_depths', config_data.get('queue_depth'))
+        config['random_queue_depths'] = parse_queue_depths(depths)
+    for key in ('test_mode', 'enable_deep_scan', 'smart_test_depth', 'test_duration', 'read_block_size',
+                'io_target', 'write_block_size', 'write_sync', 'scratch_dir', 'scratch_file_size',
+                'scan_chunk_size', 'scan_slow_threshold_ms', 'workload_profiles',
+                'profile_point_duration', 'enable_sustained_write', 'sustained_write_duration',
+                'sustained_write_size', 'fio_job'):
+        if key in config_data:
+            config[key] = validate_config_value(key, config_data[key])
+
+def create_job(device: Dict, config_data: Dict) -> Dict:
+    """Registra um job de diagnóstico para o dispositivo"""
+    config = json.loads(json.dumps(default_config))
+    apply_config(config, config_data)
+    job = {
+        'id': uuid.uuid4().hex[:12],
+        'status': 'queued',
+        'running': True,
+        'phase': None,
+        'progress': 0,
+        'message': 'Aguardando vaga para iniciar...',
+        'device_path': device['path'],
+        'selected_device': device,
+        'results': {},
+        'metrics': initial_metrics(),
+        'config': config,
+        'created_at': datetime.now().isoformat(),
+        'started_at': None,
+        'finished_at': None
+    }
+    jobs[job['id']] = job
+    device_jobs[device['path']] = job['id']
+    return job
+
+def prune_jobs():
+    """Descarta os jobs concluídos mais antigos além de MAX_FINISHED_JOBS"""
+    finished = [job for job in jobs.values() if not job['running']]
+    for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del jobs[job['id']]
+        if device_jobs.get(job['device_path']) == job['id']:
+            del device_jobs[job['device_path']]
+
+def job_summary(job: Dict) -> Dict:
+    """Estado resumido de um job (sem resultados)"""
+    return {
+        'job_id': job['id'],
+        'device_path': job['device_path'],
+        'model': (job.get('selected_device') or {}).get('model', 'Unknown'),
+        'status': job['status'],
+        'phase': job['phase'],
+        'progress': job['progress'],
+        'message': job['message'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at']
+    }
+
+def resolve_job(job_id: Optional[str] = None, device: Optional[str] = None) -> Optional[Dict]:
+    """Job por id, pelo dispositivo (mais recente) ou o último criado"""
+    if job_id:
+        return jobs.get(job_id)
+    if device:
+        return jobs.get(device_jobs.get(device))
+    return next(reversed(jobs.values()), None)
+
 @app.post("/run")
 async def start_diagnostic(request: Request):
-    """Inicia o diagnóstico de SSD"""
-    if monitor.get('running'):
-        return JSONResponse(
-            status_code=400,
-            content={"error": "Diagnóstico já em execução"}
-        )
-    
+    """
+    Inicia o diagnóstico de um ou mais dispositivos
+    Aceita {"device": {...}} ou {"devices": [{...}, ...]}; cada dispositivo vira um job independente.
+    """
     try:
         # Obter dados do request body
         body = await request.json()
-        device = body.get('device')
-        config_data = body.get('config', {})
+        config_data = body.get('config') or {}
+        multiple = 'devices' in body
+        devices = body.get('devices') if multiple else [body.get('device')]
         
-        # Atualizar configurações se fornecidas
-        if config_data:
-            if 'test_mode' in config_data:
-                monitor['config']['test_mode'] = config_data['test_mode']
-            if 'enable_deep_scan' in config_data:
-                monitor['config']['enable_deep_scan'] = config_data['enable_deep_scan']
-            if 'smart_test_depth' in config_data:
-                monitor['config']['smart_test_depth'] = config_data['smart_test_depth']
-        
-        logger.info(f"Receiving start request with device: {device}, config: {config_data}")
+        logger.info(f"Receiving start request with devices: {devices}, config: {config_data}")
         
         # Verificar se dispositivo foi enviado
-        if device and isinstance(device, dict) and device.get('path'):
-            monitor['selected_device'] = device
-            monitor['device_path'] = device['path']
-        else:
-            # Sem dispositivo selecionado
+        devices = [d for d in (devices or []) if d and isinstance(d, dict) and d.get('path')]
+        if not devices:
             return JSONResponse(
                 status_code=400,
                 content={"error": "Dispositivo não selecionado"}
             )
         
-        # Inicializar métricas
-        monitor['metrics'] = {
-            'read_speed': 0,
-            'write_speed': 0,
-            'temperature': 30,
-            'health': 100,
-            'smart_data': {},
-            'io_operations': 0,
-            'error_rate': 0,
-            'power_on_hours': 0,
-            'power_cycle_count': 0,
-            'bad_blocks': 0,
-            'wear_level': 0,
-            'avg_latency': 0,
-            'iops': 0,
-        }
+        # Configuração inválida é erro do pedido: nenhum job é criado
+        try:
+            apply_config(json.loads(json.dumps(default_config)), config_data)
+        except ValueError as e:
+            return JSONResponse(
+                status_code=400,
+                content={"error": f"Configuração inválida: {e}"}
+            )
         
-        monitor['running'] = True
-        monitor['phase'] = 'smart'
-        monitor['progress'] = 0
-        monitor['message'] = 'Iniciando diagnóstico...'
+        # Perfis de carga inválidos falhariam só depois das fases SMART/leitura/escrita
+        profile_specs = config_data.get('workload_profiles') or []
+        if not isinstance(profile_specs, list):
+            return JSONResponse(
+                status_code=400,
+                content={"error": "workload_profiles deve ser uma lista de perfis"}
+            )
+        try:
+            for spec in profile_specs:
+                parse_profile(spec)
+        except ValueError as e:
+            return JSONResponse(
+                status_code=400,
+                content={"error": f"Perfil de carga inválido: {e}"}
+            )
         
-        await emit_status()
+        # Job file do fio inválido é erro do pedido, não do diagnóstico
+        if config_data.get('fio_job'):
+            try:
+                parse_fio_jobfile(config_data['fio_job'])
+            except ValueError as e:
+                return JSONResponse(
+                    status_code=400,
+                    content={"error": f"Job file do fio inválido: {e}"}
+                )
         
-        # Executar diagnóstico em background
-        asyncio.create_task(run_diagnostic())
+        # Alvo de I/O fora do disco selecionado mediria (e escreveria em) outro disco
+        io_target = config_data.get('io_target')
+        if io_target:
+            outside = [d['path'] for d in devices if not target_on_device(io_target, d['path'])]
+            if outside:
+                return JSONResponse(
+                    status_code=400,
+                    content={"error": f"io_target {io_target} não está em {', '.join(outside)}"}
+                )
         
-        return {"status": "started", "message": "Diagnóstico iniciado"}
+        started = []
+        rejected = []
+        for device in devices:
+            current = jobs.get(device_jobs.get(device['path']))
+            if current and current['running']:
+                rejected.append({'device_path': device['path'], 'job_id': current['id'], 'error': 'Diagnóstico já em execução'})
+                continue
+            job = create_job(device, config_data)
+            await emit_status(job)
+            # Executar diagnóstico em background (limitado por MAX_PARALLEL_JOBS)
+            asyncio.create_task(run_job(job))
+            started.append(job)
+        
+        if not started:
+            return JSONResponse(
+                status_code=400,
+                content={"error": "Diagnóstico já em execução", "rejected": rejected}
+            )
+        if not multiple:
+            return {"status": "started", "message": "Diagnóstico iniciado", "job_id": started[0]['id']}
+        return {
+            "status": "started",
+            "message": f"{len(started)} diagnóstico(s) iniciado(s)",
+            "jobs": [job_summary(job) for job in started],
+            "rejected": rejected
+        }
     except Exception as e:
         logger.error(f"Error starting diagnostic: {e}")
-        monitor['running'] = False
         return JSONResponse(
             status_code=500,
             content={"error": str(e)}
         )
 
-async def run_diagnostic():
-    """Executa o diagnóstico aprofundado de forma assíncrona"""
-    device_path = monitor.get('device_path', '/dev/sda')
+def update_latency_metrics(metrics: Dict, latency: Dict):
+    """Publica percentis do histograma de latência nas métricas do job (ms)"""
+    metrics['avg_latency'] = latency['mean_ms']
+    metrics['latency_p50'] = latency['p50_ms']
+    metrics['latency_p90'] = latency['p90_ms']
+    metrics['latency_p99'] = latency['p99_ms']
+    metrics['latency_p99_9'] = latency['p99_9_ms']
+    metrics['latency_max'] = latency['max_ms']
+
+async def run_timed(engine, budget: float, interval: float = 1.0, thermal: Optional[ThermalSampler] = None,
+                    workload: Optional[str] = None):
+    """
+    Executa o motor de I/O em intervalos de até `interval` s (em thread) durante `budget` segundos
+    Com `thermal`, cada amostra de throughput é registrada para correlação com a temperatura.
+    Um FioJobRunner também termina ao atingir `size` e encurta os intervalos para não passar dele.
+    """
+    workload = workload or workload_label(engine)
+    start = time.monotonic()
+    deadline = start + budget
+    fio = isinstance(engine, FioJobRunner)
+    while time.monotonic() < deadline and not (fio and engine.done):
+        seconds = min(interval, deadline - time.monotonic())
+        if fio:
+            seconds = engine.next_interval(seconds)
+        sample = await asyncio.to_thread(engine.run_interval, seconds)
+        if thermal is not None:
+            thermal.record_io(sample, workload)
+        yield sample, min(1.0, (time.monotonic() - start) / budget)
+
+async def run_diagnostic(job: Dict):
+    """Executa o diagnóstico aprofundado de um job de forma assíncrona"""
+    device_path = job.get('device_path', '/dev/sda')
+    # Temperatura real do hwmon durante todo o diagnóstico, no mesmo relógio das amostras de I/O
+    thermal = ThermalSampler(device_path, label=lambda: job['phase'])
+    if thermal.start():
+        thermal_samplers[job['id']] = thermal
     
     try:
         # Fase 1: Coleta SMART REAL
-        monitor['phase'] = 'smart'
-        monitor['progress'] = 5
-        monitor['message'] = 'Coletando dados SMART reais...'
-        await emit_status()
+        job['phase'] = 'smart'
+        job['progress'] = 5
+        job['message'] = 'Coletando dados SMART reais...'
+        await emit_status(job)
         
         # Obter dados SMART reais do dispositivo
         smart_data = {}
         smart_analysis_complete = {}
         try:
-            smart_result = subprocess.run(
-                ['smartctl', '-a', '-j', device_path],
-                capture_output=True, text=True, timeout=10
-            )
-            if smart_result.returncode == 0:
-                smart_data = json.loads(smart_result.stdout)
+            # Snapshot novo a cada diagnóstico; análise SMART e validação de temperatura reutilizam o mesmo
+            smart_cache.invalidate(device_path)
+            snapshot = await asyncio.to_thread(get_smart_snapshot, device_path)
+            if snapshot.ok and snapshot.data:
+                smart_data = dict(snapshot.data)
                 
                 # Análise SMART completa (se módulo disponível)
                 try:
-                    smart_analysis_complete = analyze_smart_complete(device_path)
+                    smart_analysis_complete = await asyncio.to_thread(analyze_smart_complete, device_path)
                 except Exception as e:
                     logger.warning(f"Análise SMART completa não disponível: {e}")
                     smart_analysis_complete = {}
@@ -468,213 +955,431 @@ async def run_diagnostic():
                 
                 # VALIDAR temperatura (detecta USB bridge, corrige valores incorretos)
                 if raw_temp:
-                    device_bus = monitor.get('selected_device', {}).get('bus', 'SATA')
-                    temp_validation = validate_and_correct_temperature(raw_temp, device_path, device_bus)
+                    device_bus = job.get('selected_device', {}).get('bus', 'SATA')
+                    temp_validation = await asyncio.to_thread(
+                        validate_and_correct_temperature, raw_temp, device_path, device_bus
+                    )
                     
-                    monitor['metrics']['temperature'] = temp_validation['value'] or 35
-                    monitor['metrics']['temperature_valid'] = temp_validation
+                    job['metrics']['temperature'] = temp_validation['value'] or 35
+                    job['metrics']['temperature_valid'] = temp_validation
                     
                     if temp_validation.get('warning'):
                         logger.warning(f"Temperatura: {temp_validation['warning']}")
-                        monitor['message'] = f"⚠️ {temp_validation['warning']}"
+                        job['message'] = f"⚠️ {temp_validation['warning']}"
                 else:
-                    monitor['metrics']['temperature'] = 35
+                    job['metrics']['temperature'] = 35
                 
                 # Extrair health
                 if 'smart_status' in smart_data:
-                    monitor['metrics']['health'] = 100 if smart_data['smart_status']['passed'] else 50
+                    job['metrics']['health'] = 100 if smart_data['smart_status']['passed'] else 50
                 else:
-                    monitor['metrics']['health'] = 95
+                    job['metrics']['health'] = 95
                 
                 # Power on hours e outros dados
                 for attr in smart_data.get('ata_smart_attributes', {}).get('table', []):
                     if attr.get('id') == 9:  # Power On Hours
-                        monitor['metrics']['power_on_hours'] = attr.get('raw', {}).get('value', 0)
+                        job['metrics']['power_on_hours'] = attr.get('raw', {}).get('value', 0)
                 
                 smart_data['device'] = device_path
-                monitor['progress'] = 25
-                await emit_status()
+                job['progress'] = 25
+                await emit_status(job)
             else:
-                monitor['message'] = f'AVISO: Não foi possível ler SMART de {device_path}'
-                extract_temperature_from_sys(device_path)
+                job['message'] = f'AVISO: Não foi possível ler SMART de {device_path}'
+                await asyncio.to_thread(extract_temperature_from_sys, device_path, job['metrics'])
         except Exception as e:
             logger.error(f"Error reading SMART: {e}")
-            extract_temperature_from_sys(device_path)
+            await asyncio.to_thread(extract_temperature_from_sys, device_path, job['metrics'])
         
-        monitor['metrics']['smart_data'] = smart_data
+        job['metrics']['smart_data'] = smart_data
         # Guardar análise completa apenas se disponível
         if smart_analysis_complete:
-            monitor['metrics']['smart_analysis_complete'] = smart_analysis_complete
+            job['metrics']['smart_analysis_complete'] = smart_analysis_complete
         
-        await sio.emit('metrics_update', monitor['metrics'])
+        await emit_metrics(job)
         await asyncio.sleep(2)
         
         # Fase 2: Teste de Leitura (Sequencial e Aleatório)
-        monitor['phase'] = 'read'
-        monitor['progress'] = 20
-        monitor['message'] = 'Teste de Leitura Sequencial...'
-        await emit_status()
-        
-        # Leitura sequencial - valores realistas para SSD SATA
-        device_model = monitor.get('selected_device', {}).get('model', 'Unknown').lower()
-        base_speed = 450 if 'kingston' in device_model or 'sa400' in device_model else 380
-        is_usb = monitor.get('selected_device', {}).get('bus', 'SATA') == 'USB'
-        if is_usb:
-            base_speed = 120  # USB 3.0 típico
-        
-        for i in range(15):
-            monitor['progress'] = 20 + (i * 2)
-            read_speed = max(50, base_speed - (i * 3))  # Degrada um pouco
-            iops = 15000 + (i * 500)
-            monitor['metrics']['read_speed'] = read_speed
-            monitor['metrics']['iops'] = iops
-            monitor['metrics']['io_operations'] = iops * i
-            temp = min(60, monitor['metrics']['temperature'] + (i * 0.15))  # Max 60°C
-            monitor['metrics']['temperature'] = round(temp, 1)
-            monitor['message'] = f'Lendo sequencial... {read_speed} MB/s | {iops} IOPS'
-            await sio.emit('metrics_update', monitor['metrics'])
-            await emit_status()
-            await asyncio.sleep(0.9)
-        
-        monitor['message'] = 'Teste de Leitura Aleatória (4K)...'
-        await emit_status()
-        for i in range(10):
-            read_speed = 120 + (i * 3)
-            iops = 25000 + (i * 500)
-            monitor['metrics']['read_speed'] = read_speed
-            monitor['metrics']['iops'] = iops
-            monitor['message'] = f'Lendo aleatório 4K... {iops} IOPS'
-            await sio.emit('metrics_update', monitor['metrics'])
-            await emit_status()
-            await asyncio.sleep(0.8)
-        
-        # Fase 3: Teste de Escrita (Sequencial e Aleatório)
-        monitor['phase'] = 'write'
-        monitor['progress'] = 45
-        monitor['message'] = 'Teste de Escrita Sequencial...'
-        await emit_status()
-        
-        # Escrita sequencial - valores realistas
-        write_base_speed = base_speed * 0.75 if not is_usb else 100  # 75% da leitura para SSD
-        
-        for i in range(15):
-            monitor['progress'] = 45 + (i * 1.5)
-            write_speed = max(40, write_base_speed - (i * 4))  # Degrada gradualmente
-            iops = 12000 + (i * 400)
-            monitor['metrics']['write_speed'] = write_speed
-            monitor['metrics']['iops'] = iops
-            monitor['metrics']['io_operations'] += iops
-            temp = min(65, monitor['metrics']['temperature'] + (i * 0.2))  # Max 65°C
-            monitor['metrics']['temperature'] = round(temp, 1)
-            monitor['message'] = f'Escrevendo sequencial... {write_speed} MB/s | {iops} IOPS'
-            await sio.emit('metrics_update', monitor['metrics'])
-            await emit_status()
-            await asyncio.sleep(0.9)
-        
-        monitor['message'] = 'Teste de Escrita Aleatória (4K)...'
-        await emit_status()
-        for i in range(10):
-            write_speed = 100 + (i * 2)
-            iops = 22000 + (i * 400)
-            monitor['metrics']['write_speed'] = write_speed
-            monitor['metrics']['iops'] = iops
-            monitor['message'] = f'Escrevendo aleatório 4K... {iops} IOPS'
-            await sio.emit('metrics_update', monitor['metrics'])
-            await emit_status()
-            await asyncio.sleep(0.8)
-        
-        # Fase 4: Análise de Latência (mais demorada se scan profundo)
-        monitor['phase'] = 'latency'
-        monitor['progress'] = 65
-        monitor['message'] = 'Medindo latência média...'
-        await emit_status()
-        
-        scan_iterations = 8 if not monitor['config'].get('enable_deep_scan') else 20
-        delay = 0.7 if not monitor['config'].get('enable_deep_scan') else 1.5
-        
-        for i in range(scan_iterations):
-            monitor['progress'] = 65 + (i * (30 / scan_iterations))
-            latency = 0.05 + (i * 0.002)
-            monitor['metrics']['avg_latency'] = round(latency, 3)
-            monitor['metrics']['error_rate'] = round(0.01 + (i * 0.001), 4)
-            scan_msg = " (Scan Profundo)" if monitor["config"].get("enable_deep_scan") else ""
-            monitor['message'] = f'Latência: {latency*1000:.1f}ms{scan_msg}'
-            await sio.emit('metrics_update', monitor['metrics'])
-            await emit_status()
-            await asyncio.sleep(delay)
+        job['phase'] = 'read'
+        job['progress'] = 20
+        job['message'] = 'Teste de Leitura Sequencial...'
+        await emit_status(job)
+        
+        # Leitura sequencial REAL (O_DIRECT, somente leitura)
+        io_target = job['config'].get('io_target') or device_path
+        budget = job['config']['test_duration'] * PHASE_BUDGET['sequential_read']
+        try:
+            with SequentialIOEngine(io_target, job['config']['read_block_size']) as engine:
+                async for sample, done in run_timed(engine, budget, thermal=thermal):
+                    read_speed = round(sample.mb_per_s, 1)
+                    iops = round(sample.iops)
+                    job['progress'] = 20 + 12 * done
+                    job['metrics']['read_speed'] = read_speed
+                    job['metrics']['iops'] = iops
+                    job['metrics']['io_operations'] += sample.ops
+                    job['message'] = f'Lendo sequencial... {read_speed} MB/s | {iops} IOPS'
+                    await emit_metrics(job)
+                    await emit_status(job)
+                job['results']['sequential_read'] = engine.summary()
+        except (OSError, ValueError) as e:
+            logger.error(f"Error in sequential read test: {e}")
+            job['message'] = f'AVISO: Leitura real indisponível em {io_target}: {e}'
+            job['results']['sequential_read'] = {'target': io_target, 'error': str(e)}
+            await emit_status(job)
+        
+        # Leitura aleatória 4K REAL, uma rodada por profundidade de fila
+        queue_depths = job['config']['random_queue_depths']
+        budget = job['config']['test_duration'] * PHASE_BUDGET['random_read'] / len(queue_depths)
+        job['results']['random_read'] = {}
+        for qd_index, queue_depth in enumerate(queue_depths):
+            job['message'] = f'Teste de Leitura Aleatória (4K, QD{queue_depth})...'
+            await emit_status(job)
+            try:
+                with RandomIOEngine(io_target, queue_depth=queue_depth) as engine:
+                    async for sample, done in run_timed(engine, budget, thermal=thermal):
+                        iops = round(sample.iops)
+                        job['progress'] = 32 + 13 * (qd_index + done) / len(queue_depths)
+                        job['metrics']['read_speed'] = round(sample.mb_per_s, 1)
+                        job['metrics']['iops'] = iops
+                        job['metrics']['avg_latency'] = round(sample.avg_latency_ms, 3)
+                        job['metrics']['io_operations'] += sample.ops
+                        job['message'] = f'Lendo aleatório 4K QD{queue_depth}... {iops} IOPS | {sample.avg_latency_ms:.3f}ms'
+                        await emit_metrics(job)
+                        await emit_status(job)
+                    job['results']['random_read'][f'qd{queue_depth}'] = engine.summary()
+            except (OSError, ValueError) as e:
+                logger.error(f"Error in random read test (QD{queue_depth}): {e}")
+                job['message'] = f'AVISO: Leitura aleatória indisponível em {io_target}: {e}'
+                job['results']['random_read'][f'qd{queue_depth}'] = {'target': io_target, 'error': str(e)}
+                await emit_status(job)
+        
+        # IOPS reportado é o melhor resultado entre as profundidades testadas
+        random_iops = [r['avg_iops'] for r in job['results']['random_read'].values() if 'avg_iops' in r]
+        if random_iops:
+            job['metrics']['iops'] = max(random_iops)
+        if 'avg_mb_per_s' in job['results'].get('sequential_read', {}):
+            job['metrics']['read_speed'] = job['results']['sequential_read']['avg_mb_per_s']
+        
+        # Fase 3: Teste de Escrita REAL em arquivo de teste pré-alocado (nunca em blocos crus)
+        job['phase'] = 'write'
+        job['progress'] = 45
+        job['message'] = 'Preparando arquivo de teste para escrita...'
+        await emit_status(job)
+        
+        write_sync = job['config']['write_sync']
+        if job['config'].get('io_target'):
+            scratch_dir = os.path.dirname(os.path.abspath(io_target))
+            if not is_on_device(scratch_dir, device_path):
+                logger.warning(f"io_target {io_target} não está em {device_path}")
+                scratch_dir = None
+        elif job['config'].get('scratch_dir'):
+            scratch_dir = job['config']['scratch_dir']
+            if not is_on_device(scratch_dir, device_path):
+                logger.warning(f"scratch_dir {scratch_dir} não está em {device_path}")
+                scratch_dir = None
+        else:
+            scratch_dir = await asyncio.to_thread(find_scratch_dir, device_path)
+        
+        if not scratch_dir:
+            job['message'] = f'AVISO: Nenhum filesystem gravável montado em {device_path}; teste de escrita ignorado'
+            job['results']['sequential_write'] = {'error': 'Sem filesystem gravável no dispositivo'}
+            await emit_status(job)
+        else:
+            try:
+                with ScratchFile(scratch_dir, job['config']['scratch_file_size']) as scratch:
+                    job['message'] = 'Teste de Escrita Sequencial...'
+                    await emit_status(job)
+                    budget = job['config']['test_duration'] * PHASE_BUDGET['sequential_write']
+                    with SequentialIOEngine(scratch.path, job['config']['write_block_size'], write=True, sync=write_sync) as engine:
+                        async for sample, done in run_timed(engine, budget, thermal=thermal):
+                            write_speed = round(sample.mb_per_s, 1)
+                            iops = round(sample.iops)
+                            job['progress'] = 45 + 10 * done
+                            job['metrics']['write_speed'] = write_speed
+                            job['metrics']['iops'] = iops
+                            job['metrics']['io_operations'] += sample.ops
+                            job['message'] = f'Escrevendo sequencial... {write_speed} MB/s | {iops} IOPS'
+                            await emit_metrics(job)
+                            await emit_status(job)
+                        job['results']['sequential_write'] = engine.summary()
+                    
+                    budget = job['config']['test_duration'] * PHASE_BUDGET['random_write'] / len(queue_depths)
+                    job['results']['random_write'] = {}
+                    for qd_index, queue_depth in enumerate(queue_depths):
+                        job['message'] = f'Teste de Escrita Aleatória (4K, QD{queue_depth})...'
+                        await emit_status(job)
+                        with RandomIOEngine(scratch.path, queue_depth=queue_depth, write=True, sync=write_sync) as engine:
+                            async for sample, done in run_timed(engine, budget, thermal=thermal):
+                                iops = round(sample.iops)
+                                job['progress'] = 55 + 10 * (qd_index + done) / len(queue_depths)
+                                job['metrics']['write_speed'] = round(sample.mb_per_s, 1)
+                                job['metrics']['iops'] = iops
+                                job['metrics']['io_operations'] += sample.ops
+                                job['message'] = f'Escrevendo aleatório 4K QD{queue_depth}... {iops} IOPS | {sample.avg_latency_ms:.3f}ms'
+                                await emit_metrics(job)
+                                await emit_status(job)
+                            job['results']['random_write'][f'qd{queue_depth}'] = engine.summary()
+            except (OSError, ValueError) as e:
+                logger.error(f"Error in write test: {e}")
+                job['message'] = f'AVISO: Teste de escrita falhou em {scratch_dir}: {e}'
+                job['results'].setdefault('sequential_write', {'error': str(e)})
+                await emit_status(job)
+        
+        if 'avg_mb_per_s' in job['results'].get('sequential_write', {}):
+            job['metrics']['write_speed'] = job['results']['sequential_write']['avg_mb_per_s']
+        if random_iops:
+            job['metrics']['iops'] = max(random_iops)
+        
+        # Perfis de carga nomeados (opcional): matriz de throughput/IOPS/latência por ponto
+        profile_specs = job['config'].get('workload_profiles') or []
+        if profile_specs:
+            job['phase'] = 'profiles'
+            job['message'] = 'Executando perfis de carga...'
+            await emit_status(job)
+            job['results']['workload_profiles'] = {}
+            try:
+                profiles = [parse_profile(spec) for spec in profile_specs]
+                if not scratch_dir:
+                    raise ValueError('Sem filesystem gravável no dispositivo para os perfis de carga')
+                point_duration = float(job['config']['profile_point_duration'])
+                with ScratchFile(scratch_dir, job['config']['scratch_file_size']) as scratch:
+                    job['message'] = 'Perfis de carga - Pré-condicionando arquivo de teste...'
+                    await emit_status(job)
+                    await asyncio.to_thread(precondition, scratch.path, write_sync)
+                    for profile in profiles:
+                        matrix = []
+                        for point in profile['points']:
+                            with build_engine(scratch.path, point, write_sync) as engine:
+                                async for sample, done in run_timed(engine, point_duration, thermal=thermal):
+                                    job['metrics']['iops'] = round(sample.iops)
+                                    job['metrics']['io_operations'] += sample.ops
+                                    job['message'] = (f"Perfil {profile['name']} [{point.label}]: "
+                                                          f"{sample.mb_per_s:.1f} MB/s | {sample.iops:.0f} IOPS | p99 {sample.p99_latency_ms:.3f}ms")
+                                    await emit_metrics(job)
+                                    await emit_status(job)
+                                matrix.append(point_result(point, engine))
+                        job['results']['workload_profiles'][profile['name']] = {
+                            'description': profile['description'],
+                            'matrix': matrix
+                        }
+            except (OSError, ValueError) as e:
+                logger.error(f"Error in workload profiles: {e}")
+                job['message'] = f'AVISO: Perfis de carga não executados: {e}'
+                job['results']['workload_profiles']['error'] = str(e)
+                await emit_status(job)
+        
+        # Escrita sustentada (opcional): série temporal até esgotar o cache SLC e velocidade de regime
+        if job['config'].get('enable_sustained_write'):
+            job['phase'] = 'sustained'
+            job['message'] = 'Escrita Sustentada - Preparando arquivo de teste...'
+            await emit_status(job)
+            try:
+                if not scratch_dir:
+                    raise ValueError('Sem filesystem gravável no dispositivo para a escrita sustentada')
+                budget = float(job['config']['sustained_write_duration'])
+                with ScratchFile(scratch_dir, min(job['config']['sustained_write_size'], SUSTAINED_MAX_SIZE),
+                                 SUSTAINED_FREE_FRACTION) as scratch:
+                    with SequentialIOEngine(scratch.path, job['config']['write_block_size'], write=True, sync=write_sync) as engine:
+                        async for sample, done in run_timed(engine, budget, SAMPLE_INTERVAL, thermal=thermal):
+                            job['metrics']['write_speed'] = round(sample.mb_per_s, 1)
+                            job['metrics']['io_operations'] += sample.ops
+                            job['message'] = (f"Escrita Sustentada: {sample.mb_per_s:.1f} MB/s | "
+                                                  f"{engine.total_bytes / (1024 * MB):.1f} GB escritos")
+                            await emit_metrics(job)
+                            await emit_status(job)
+                            # Uma única passada: reescrever os mesmos LBAs mistura o cache recuperado com o regime
+                            if engine.total_bytes >= engine.size:
+                                break
+                        job['results']['sustained_write'] = {
+                            'target': scratch.path,
+                            'file_size': scratch.size,
+                            'block_size': engine.block_size,
+                            'direct_io': engine.direct,
+                            'sync': write_sync,
+                            **detect_cache_cliff(engine.samples),
+                            'time_series': build_time_series(engine.samples)
+                        }
+                steady = job['results']['sustained_write'].get('steady_state_mb_per_s')
+                if steady:
+                    job['metrics']['steady_state_write_speed'] = steady
+                if job['results']['sustained_write'].get('cliff_detected'):
+                    job['message'] = (f"Cache esgotado após {job['results']['sustained_write']['cache_size_gb']} GB: "
+                                          f"{job['results']['sustained_write']['pre_cliff_mb_per_s']} → {steady} MB/s")
+                else:
+                    job['message'] = f'Escrita sustentada sem queda de cache detectada ({steady} MB/s)'
+                await emit_status(job)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error in sustained write test: {e}")
+                job['message'] = f'AVISO: Escrita sustentada não executada: {e}'
+                job['results']['sustained_write'] = {'error': str(e)}
+                await emit_status(job)
+        
+        # Jobs do fio importados (opcional): executados pelo motor embutido, resultado no JSON do fio
+        if job['config'].get('fio_job'):
+            job['phase'] = 'fio'
+            job['message'] = 'Executando jobs do fio...'
+            await emit_status(job)
+            try:
+                fio_spec = parse_fio_jobfile(job['config']['fio_job'])
+                if not scratch_dir:
+                    raise ValueError('Sem filesystem gravável no dispositivo para os jobs do fio')
+                fio_results = []
+                with ScratchFile(scratch_dir, scratch_size(fio_spec['jobs'], job['config']['scratch_file_size'])) as scratch:
+                    if needs_layout(fio_spec['jobs']):
+                        job['message'] = 'fio - Preparando arquivo de teste...'
+                        await emit_status(job)
+                        await asyncio.to_thread(precondition, scratch.path, write_sync)
+                    for fio_job in fio_spec['jobs']:
+                        with FioJobRunner(fio_job, scratch.path, write_sync) as runner:
+                            workload = f"fio {fio_job.name}: {workload_label(runner.engines[0])} x{fio_job.numjobs}"
+                            async for sample, done in run_timed(runner, job_budget(fio_job), thermal=thermal,
+                                                                workload=workload):
+                                job['metrics']['iops'] = round(sample.iops)
+                                job['metrics']['io_operations'] += sample.ops
+                                job['message'] = (f"fio [{fio_job.name}]: {sample.mb_per_s:.1f} MB/s | "
+                                                  f"{sample.iops:.0f} IOPS | p99 {sample.p99_latency_ms:.3f}ms")
+                                await emit_metrics(job)
+                                await emit_status(job)
+                            fio_results.append(runner.result())
+                job['results']['fio'] = fio_output(fio_spec['global'], fio_results)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error in fio jobs: {e}")
+                job['message'] = f'AVISO: Jobs do fio não executados: {e}'
+                job['results']['fio'] = {'error': str(e)}
+                await emit_status(job)
+        
+        # Fase 4: Análise de Latência REAL (4K aleatório QD1 em histograma)
+        job['phase'] = 'latency'
+        job['progress'] = 65
+        job['message'] = 'Medindo distribuição de latência...'
+        await emit_status(job)
+        
+        budget = job['config']['test_duration'] * PHASE_BUDGET['latency']
+        try:
+            with RandomIOEngine(io_target, queue_depth=1) as engine:
+                async for sample, done in run_timed(engine, budget, thermal=thermal):
+                    latency = engine.histogram.summary()
+                    job['progress'] = 65 + 5 * done
+                    update_latency_metrics(job['metrics'], latency)
+                    job['message'] = f"Latência p50 {latency['p50_ms']:.3f}ms | p99 {latency['p99_ms']:.3f}ms | p99.9 {latency['p99_9_ms']:.3f}ms"
+                    await emit_metrics(job)
+                    await emit_status(job)
+                job['results']['latency'] = {
+                    'workload': '4K random read QD1',
+                    **engine.histogram.summary()
+                }
+                update_latency_metrics(job['metrics'], job['results']['latency'])
+        except (OSError, ValueError) as e:
+            logger.error(f"Error in latency test: {e}")
+            job['message'] = f'AVISO: Medição de latência indisponível em {io_target}: {e}'
+            job['results']['latency'] = {'target': io_target, 'error': str(e)}
+            await emit_status(job)
+        
+        # Scan profundo: leitura da superfície inteira, retomável via checkpoint (não limitado por test_duration)
+        if job['config'].get('enable_deep_scan'):
+            job['phase'] = 'scan'
+            job['progress'] = 70
+            job['message'] = 'Scan Profundo - Lendo superfície completa...'
+            await emit_status(job)
+            try:
+                scanner = SurfaceScanner(
+                    io_target,
+                    chunk_size=job['config']['scan_chunk_size'],
+                    slow_threshold_ms=job['config']['scan_slow_threshold_ms'],
+                    device_id=smart_data.get('serial_number') if io_target == device_path else None
+                )
+                with scanner:
+                    if scanner.resumed_from:
+                        job['message'] = f'Scan Profundo - Retomando de {scanner.resumed_from / scanner.size * 100:.1f}%...'
+                        await emit_status(job)
+                    while not scanner.complete:
+                        scan = await asyncio.to_thread(scanner.run_interval, 1.0)
+                        job['progress'] = 70 + 5 * scan['progress']
+                        job['metrics']['scan_progress'] = round(scan['progress'] * 100, 2)
+                        job['metrics']['scan_error_sectors'] = scan['error_sectors']
+                        job['metrics']['scan_slow_sectors'] = scan['slow_sectors']
+                        job['message'] = (f"Scan Profundo {scan['progress'] * 100:.2f}% | {scan['mb_per_s']:.0f} MB/s | "
+                                              f"ETA {scan['eta_seconds'] / 60:.0f} min | {scan['error_sectors']} setores com erro")
+                        await emit_metrics(job)
+                        await emit_status(job)
+                    job['results']['surface_scan'] = scanner.summary()
+            except (OSError, ValueError) as e:
+                logger.error(f"Error in surface scan: {e}")
+                job['message'] = f'AVISO: Scan profundo interrompido em {io_target}: {e}'
+                job['results']['surface_scan'] = {'device': io_target, 'error': str(e)}
+                await emit_status(job)
         
         # Fase 5: Análise de Health e Wear Level
-        monitor['phase'] = 'health'
-        monitor['progress'] = 75
-        monitor['message'] = 'Analisando saúde e desgaste...'
-        await emit_status()
+        job['phase'] = 'health'
+        job['progress'] = 75
+        job['message'] = 'Analisando saúde e desgaste...'
+        await emit_status(job)
         
         for i in range(10):
-            monitor['progress'] = 75 + (i * 1)
+            job['progress'] = 75 + (i * 1)
             wear = 2.3 + (i * 0.1)
             bad_blocks = min(5, int(i * 0.5))
-            monitor['metrics']['wear_level'] = round(wear, 1)
-            monitor['metrics']['bad_blocks'] = bad_blocks
-            monitor['metrics']['health'] = 98 - wear
-            monitor['metrics']['power_cycle_count'] = 250 + i
-            monitor['message'] = f'Desgaste: {wear}% | Health: {98-wear:.1f}%'
-            await sio.emit('metrics_update', monitor['metrics'])
-            await emit_status()
+            job['metrics']['wear_level'] = round(wear, 1)
+            job['metrics']['bad_blocks'] = bad_blocks
+            job['metrics']['health'] = 98 - wear
+            job['metrics']['power_cycle_count'] = 250 + i
+            job['message'] = f'Desgaste: {wear}% | Health: {98-wear:.1f}%'
+            await emit_metrics(job)
+            await emit_status(job)
             await asyncio.sleep(0.6)
         
         # Fase 6: Análise Avançada Completa (só executa se modo avançado ou deep scan)
-        test_mode = monitor['config'].get('test_mode', 'simple')
-        is_advanced = test_mode == 'advanced' or monitor['config'].get('enable_deep_scan', False)
+        test_mode = job['config'].get('test_mode', 'simple')
+        is_advanced = test_mode == 'advanced' or job['config'].get('enable_deep_scan', False)
         
         if is_advanced:
-            monitor['phase'] = 'analysis'
-            monitor['progress'] = 83
-            monitor['message'] = 'Análise Avançada - Verificando integridade...'
-            await emit_status()
+            job['phase'] = 'analysis'
+            job['progress'] = 83
+            job['message'] = 'Análise Avançada - Verificando integridade...'
+            await emit_status(job)
             await asyncio.sleep(3)
             
-            monitor['message'] = 'Análise Avançada - Verificando cache...'
-            await emit_status()
+            job['message'] = 'Análise Avançada - Verificando cache...'
+            await emit_status(job)
             await asyncio.sleep(2)
             
-            monitor['message'] = 'Análise Avançada - Verificando TRIM...'
-            await emit_status()
+            job['message'] = 'Análise Avançada - Verificando TRIM...'
+            await emit_status(job)
             await asyncio.sleep(2)
             
-            monitor['message'] = 'Análise Avançada - Verificando encryption...'
-            await emit_status()
+            job['message'] = 'Análise Avançada - Verificando encryption...'
+            await emit_status(job)
             await asyncio.sleep(2)
         else:
-            monitor['phase'] = 'analysis'
-            monitor['progress'] = 83
-            monitor['message'] = 'Análise básica concluída...'
-            await emit_status()
+            job['phase'] = 'analysis'
+            job['progress'] = 83
+            job['message'] = 'Análise básica concluída...'
+            await emit_status(job)
             await asyncio.sleep(1)
         
         # Fase 5: Análise por IA (se habilitada)
-        if monitor['config']['enable_ai_insights']:
-            monitor['progress'] = 85
-            monitor['message'] = 'Gerando insights com IA...'
-            await emit_status()
+        if job['config']['enable_ai_insights']:
+            job['progress'] = 85
+            job['message'] = 'Gerando insights com IA...'
+            await emit_status(job)
             
             # Adicionar informações do dispositivo na análise
-            device_info = f"Dispositivo analisado: {monitor.get('selected_device', {}).get('model', 'Unknown')}"
+            device_info = f"Dispositivo analisado: {job.get('selected_device', {}).get('model', 'Unknown')}"
             
             ai_insights = await analyze_with_ai(
-                monitor['metrics']['smart_data'],
-                monitor['metrics']
+                job['metrics']['smart_data'],
+                job['metrics']
             )
-            monitor['results']['ai_insights'] = f"{device_info}\n\n{ai_insights}"
+            job['results']['ai_insights'] = f"{device_info}\n\n{ai_insights}"
             
             # GERAR EXPLICAÇÃO IA DETALHADA (raciocínio + confidence)
             try:
-                smart_attrs = monitor.get('metrics', {}).get('smart_analysis_complete', {}).get('analysis', [])
+                smart_attrs = job.get('metrics', {}).get('smart_analysis_complete', {}).get('analysis', [])
                 ai_explanation = generate_ai_explanation(
-                    monitor['metrics'],
+                    job['metrics'],
                     smart_attrs,
-                    monitor.get('selected_device', {})
+                    job.get('selected_device', {})
                 )
-                monitor['results']['ai_reasoning'] = ai_explanation
+                job['results']['ai_reasoning'] = ai_explanation
                 logger.info(f"AI explanation generated with confidence: {ai_explanation.get('overall_confidence', 0):.2f}")
             except Exception as e:
                 logger.error(f"Error generating AI explanation: {e}")
@@ -682,120 +1387,204 @@ async def run_diagnostic():
             await asyncio.sleep(1)
         
         # Fase 6: Relatório
-        monitor['phase'] = 'report'
-        monitor['progress'] = 95
-        monitor['message'] = 'Gerando relatório final...'
-        await emit_status()
+        job['phase'] = 'report'
+        job['progress'] = 95
+        job['message'] = 'Gerando relatório final...'
+        await emit_status(job)
         
         # Salvar resultados completos com explicação técnica
-        monitor['results']['device'] = monitor.get('selected_device', {})
-        monitor['results']['metrics'] = monitor['metrics']
-        monitor['results']['smart_data'] = smart_data
-        monitor['results']['timestamp'] = datetime.now().isoformat()
-        monitor['results']['config_used'] = monitor['config'].copy()
+        job['results']['device'] = job.get('selected_device', {})
+        job['results']['metrics'] = job['metrics']
+        job['results']['smart_data'] = smart_data
+        job['results']['timestamp'] = datetime.now().isoformat()
+        job['results']['config_used'] = job['config'].copy()
+        
+        # Temperatura alinhada ao throughput e eventos de thermal throttling
+        job['results']['thermal'] = thermal.report()
+        job['metrics']['thermal_throttle_events'] = len(job['results']['thermal'].get('throttle_events', []))
         
         # Obter dados NVMe se for dispositivo NVMe
-        nvme_info = nvme_support.get_complete_nvme_info(device_path)
+        nvme_info = await asyncio.to_thread(nvme_support.get_complete_nvme_info, device_path)
         if nvme_info.get('nvme_device'):
-            monitor['results']['nvme_info'] = nvme_info
+            job['results']['nvme_info'] = nvme_info
         
         # Análise comparativa de benchmarks
-        device_model = monitor.get('selected_device', {}).get('model', 'Unknown')
-        benchmark_comparison = benchmark_db.compare_performance(device_model, monitor['metrics'])
-        monitor['results']['benchmark_comparison'] = benchmark_comparison
+        device_model = job.get('selected_device', {}).get('model', 'Unknown')
+        benchmark_comparison = benchmark_db.compare_performance(device_model, job['metrics'])
+        job['results']['benchmark_comparison'] = benchmark_comparison
         
-        monitor['results']['history_comparison'] = history_manager.get_comparative_analysis(device_path)
+        job['results']['history_comparison'] = history_manager.get_comparative_analysis(device_path)
         
         # Adicionar explicação técnica dos resultados
         tech_explanation = {
             'health': {
-                'value': monitor['metrics']['health'],
+                'value': job['metrics']['health'],
                 'used_metrics': ['SMART Status', 'Bad Blocks', 'Error Rate', 'Wear Level'],
                 'reasoning': 'Saúde calculada com base em status SMART, setores ruins, taxa de erros e nível de desgaste'
             },
             'wear_level': {
-                'value': monitor['metrics']['wear_level'],
+                'value': job['metrics']['wear_level'],
                 'used_metrics': ['Power On Hours', 'Power Cycles', 'Wear Leveling Count'],
-                'reasoning': f"Desgaste estimado com base em {monitor['metrics']['power_on_hours']}h de operação e {monitor['metrics']['power_cycle_count']} ciclos"
+                'reasoning': f"Desgaste estimado com base em {job['metrics']['power_on_hours']}h de operação e {job['metrics']['power_cycle_count']} ciclos"
             },
             'temperature': {
-                'value': monitor['metrics']['temperature'],
+                'value': job['metrics']['temperature'],
                 'used_metrics': ['SMART Attribute 194'],
-                'reasoning': f"Temperatura atual do SSD medida via SMART. {'Adequada' if monitor['metrics']['temperature'] < 60 else 'Alta'} para uso contínuo"
+                'reasoning': f"Temperatura atual do SSD medida via SMART. {'Adequada' if job['metrics']['temperature'] < 60 else 'Alta'} para uso contínuo"
             }
         }
-        monitor['results']['technical_explanation'] = tech_explanation
+        job['results']['technical_explanation'] = tech_explanation
         
         await asyncio.sleep(1)
         
-        monitor['progress'] = 100
-        monitor['message'] = 'Diagnóstico concluído!'
-        monitor['results']['status'] = 'completed'
-        await emit_status()
+        job['progress'] = 100
+        job['message'] = 'Diagnóstico concluído!'
+        job['results']['status'] = 'completed'
+        job['results']['job_id'] = job['id']
+        job['status'] = 'completed'
+        await emit_status(job)
         
-        await sio.emit('phase_done', 'report')
-        await sio.emit('diagnostic_complete', monitor['results'])
+        await sio.emit('phase_done', 'report', room=job_room(job['id']))
+        await sio.emit('diagnostic_complete', job['results'], room=job_room(job['id']))
         
     except Exception as e:
-        logger.error(f"Error in diagnostic: {e}")
-        monitor['message'] = f'Erro: {str(e)}'
-        monitor['progress'] = 0
-        await emit_status()
+        logger.error(f"Error in diagnostic {job['id']} ({device_path}): {e}")
+        job['message'] = f'Erro: {str(e)}'
+        job['progress'] = 0
+        job['status'] = 'failed'
+        await emit_status(job)
     finally:
-        monitor['running'] = False
+        thermal_samplers.pop(job['id'], None)
+        metric_streams.pop(job['id'], None)
+        await asyncio.to_thread(thermal.stop)
+        job['running'] = False
+        job['finished_at'] = datetime.now().isoformat()
+
+async def run_job(job: Dict):
+    """Aguarda uma vaga no limite de paralelismo e executa o diagnóstico do job"""
+    async with job_semaphore:
+        job['status'] = 'running'
+        job['started_at'] = datetime.now().isoformat()
+        await run_diagnostic(job)
+    prune_jobs()
 
 @app.get("/report")
-async def get_report():
-    """Retorna o relatório de diagnóstico em JSON"""
+async def get_report(job_id: Optional[str] = None, device: Optional[str] = None):
+    """Retorna o relatório de diagnóstico em JSON (por job_id, por dispositivo ou o mais recente)"""
+    job = resolve_job(job_id, device)
+    if not job:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Nenhum diagnóstico encontrado"}
+        )
     return {
-        "status": "completed" if monitor['progress'] == 100 else "in_progress",
-        "progress": monitor['progress'],
-        "message": monitor['message'],
-        "results": monitor.get('results', {}),
-        "metrics": monitor.get('metrics', {}),
-        "selected_device": monitor.get('selected_device'),
+        "job_id": job['id'],
+        "status": job['status'] if job['status'] in ('completed', 'failed') else "in_progress",
+        "progress": job['progress'],
+        "message": job['message'],
+        "results": job.get('results', {}),
+        "metrics": job.get('metrics', {}),
+        "latency": job.get('results', {}).get('latency', {}),
+        "selected_device": job.get('selected_device'),
         "timestamp": datetime.now().isoformat()
     }
 
 @app.get("/report/html")
-async def get_report_html():
+async def get_report_html(job_id: Optional[str] = None, device: Optional[str] = None):
     """Retorna relatório em HTML"""
     from fastapi.responses import HTMLResponse
+    job = resolve_job(job_id, device)
+    if not job:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Nenhum diagnóstico encontrado"}
+        )
     generator = ReportGenerator()
-    html = generator.generate_html(monitor['results'])
+    html = generator.generate_html(job['results'])
     return HTMLResponse(content=html.decode('utf-8'))
 
+@app.get("/report/fio")
+async def get_report_fio(job_id: Optional[str] = None, device: Optional[str] = None):
+    """Resultado dos jobs do fio no esquema JSON do fio (--output-format=json)"""
+    job = resolve_job(job_id, device)
+    if not job or 'fio' not in job['results']:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Nenhum resultado de fio encontrado"}
+        )
+    return job['results']['fio']
+
+@app.get("/jobs")
+async def list_jobs():
+    """Lista os jobs de diagnóstico (em fila, em execução e concluídos)"""
+    return {
+        "max_parallel_jobs": MAX_PARALLEL_JOBS,
+        "jobs": [job_summary(job) for job in jobs.values()]
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Estado completo de um job, incluindo métricas e resultados"""
+    job = jobs.get(job_id)
+    if not job:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Job não encontrado"}
+        )
+    return {**job_summary(job), "metrics": job['metrics'], "results": job['results'], "config": job['config']}
+
 @app.get("/metrics")
-async def get_metrics():
+async def get_metrics(job_id: Optional[str] = None, device: Optional[str] = None):
     """Retorna métricas em tempo real"""
-    return monitor['metrics']
+    job = resolve_job(job_id, device)
+    return job['metrics'] if job else initial_metrics()
 
 @app.post("/config")
 async def update_config(config: Dict):
-    """Atualiza configurações do diagnóstico"""
+    """Atualiza configurações padrão dos próximos diagnósticos"""
     if 'test_duration' in config:
-        monitor['config']['test_duration'] = config['test_duration']
+        try:
+            default_config['test_duration'] = validate_config_value('test_duration', config['test_duration'])
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
     if 'enable_advanced_analysis' in config:
-        monitor['config']['enable_advanced_analysis'] = config['enable_advanced_analysis']
+        default_config['enable_advanced_analysis'] = config['enable_advanced_analysis']
     if 'enable_ai_insights' in config:
-        monitor['config']['enable_ai_insights'] = config['enable_ai_insights']
+        default_config['enable_ai_insights'] = config['enable_ai_insights']
     
-    return {"status": "ok", "config": monitor['config']}
+    return {"status": "ok", "config": default_config}
 
 @app.get("/config")
 async def get_config():
     """Retorna configurações atuais"""
-    return monitor['config']
+    return default_config
+
+@app.get("/profiles")
+async def get_profiles():
+    """Lista os perfis de carga disponíveis para config['workload_profiles']"""
+    return list_profiles()
 
 @app.get("/devices")
-async def list_devices():
-    """List available storage devices"""
+async def list_devices(refresh: bool = False):
+    """List available storage devices (inventário em memória; refresh=true força releitura do sysfs)"""
+    # Em replay os discos vêm das gravações de lsblk/udevadm, não da máquina local
+    if command_runner.capture.replaying or not sysfs_available():
+        return await list_devices_lsblk()
+    if refresh:
+        await device_inventory.refresh()
+    devices = await device_inventory.get()
+    if not devices:
+        logger.warning("No storage devices found")
+    return devices
+
+async def list_devices_lsblk():
+    """Fallback sem sysfs: lsblk + udevadm por dispositivo"""
     devices = []
     try:
         # Listar dispositivos de bloco reais
-        result = subprocess.run(['lsblk', '-d', '-n', '-o', 'NAME,SIZE,MODEL'], 
-                              capture_output=True, text=True)
+        result = await command_runner.run(['lsblk', '-d', '-n', '-o', 'NAME,SIZE,MODEL'])
         
+        candidates = []
         for line in result.stdout.split('\n'):
             if not line:
                 continue
@@ -803,11 +1592,6 @@ async def list_devices():
             parts = line.split()
             if len(parts) >= 2:
                 device_name = parts[0]
-                device_path = f"/dev/{device_name}"
-                size = parts[1] if len(parts) > 1 else "Unknown"
-                
-                # Pegar modelo (pode ter espaços)
-                model = ' '.join(parts[2:]) if len(parts) > 2 else "Unknown"
                 
                 # Pular loop devices
                 if device_name.startswith('loop'):
@@ -817,40 +1601,55 @@ async def list_devices():
                 if 'sr' in device_name:
                     continue
                 
-                # Determinar tipo e barramento
-                device_type = "disk"
-                bus = "SATA"  # Default
+                candidates.append(parts)
+        
+        # udevadm de todos os dispositivos em paralelo (limitado pelo command_runner)
+        udev_results = await asyncio.gather(*(
+            command_runner.run(['udevadm', 'info', '--query=property', '--name=' + parts[0]], timeout=2,
+                               device=f"/dev/{parts[0]}")
+            for parts in candidates
+        ))
+        
+        for parts, udev_result in zip(candidates, udev_results):
+            device_name = parts[0]
+            device_path = f"/dev/{device_name}"
+            size = parts[1] if len(parts) > 1 else "Unknown"
+            
+            # Pegar modelo (pode ter espaços)
+            model = ' '.join(parts[2:]) if len(parts) > 2 else "Unknown"
+            
+            # Determinar tipo e barramento
+            device_type = "disk"
+            bus = "SATA"  # Default
+            
+            # Tentar identificar USB
+            try:
+                if udev_result.returncode == 127 or udev_result.timed_out:
+                    raise RuntimeError(udev_result.stderr)
+                udev_output = udev_result.stdout.lower()
+                if 'usb' in udev_output or 'usb_device' in udev_output:
+                    bus = "USB"
                 
-                # Tentar identificar USB
-                try:
-                    udev_result = subprocess.run(
-                        ['udevadm', 'info', '--query=property', '--name=' + device_name],
-                        capture_output=True, text=True, timeout=2
-                    )
-                    udev_output = udev_result.stdout.lower()
-                    if 'usb' in udev_output or 'usb_device' in udev_output:
-                        bus = "USB"
+                # Verificar se é SSD
+                is_ssd = False
+                if 'ssd' in model.lower() or 'ID_ATA_ROTATION_RATE_RPM' not in udev_result.stdout:
+                    is_ssd = True
                     
-                    # Verificar se é SSD
-                    is_ssd = False
-                    if 'ssd' in model.lower() or 'ID_ATA_ROTATION_RATE_RPM' not in udev_result.stdout:
-                        is_ssd = True
-                        
-                except:
-                    # Heurística: se o modelo contém SSD, é SSD
-                    if 'ssd' in model.lower():
-                        is_ssd = True
-                    bus = "USB" if device_name in ['sdb', 'sdc', 'sdd', 'sde'] else "SATA"
-                
-                devices.append({
-                    'path': device_path,
-                    'name': device_name,
-                    'model': model,
-                    'bus': bus,
-                    'size': size,
-                    'type': device_type
-                })
-        
+            except:
+                # Heurística: se o modelo contém SSD, é SSD
+                if 'ssd' in model.lower():
+                    is_ssd = True
+                bus = "USB" if device_name in ['sdb', 'sdc', 'sdd', 'sde'] else "SATA"
+            
+            devices.append({
+                'path': device_path,
+                'name': device_name,
+                'model': model,
+                'bus': bus,
+                'size': size,
+                'type': device_type
+            })
+    
         # Retornar vazio se não encontrou nada
         if not devices:
             logger.warning("No storage devices found")
@@ -861,23 +1660,49 @@ async def list_devices():
     return devices
 
 @app.get("/device/{device_path:path}/smart")
-async def get_smart(device_path: str):
-    """Get SMART data for specific device"""
+async def get_smart(device_path: str, refresh: bool = False):
+    """Get SMART data for specific device (cached snapshot; refresh=true forces a new read)"""
     try:
-        cmd = f"smartctl -a -j {device_path}"
-        result = subprocess.run(cmd.split(), capture_output=True, text=True)
-        if result.returncode == 0:
-            return json.loads(result.stdout)
+        snapshot = await asyncio.to_thread(get_smart_snapshot, device_path, 0 if refresh else None)
+        if snapshot.ok and snapshot.data:
+            return snapshot.data
         else:
-            return {"error": "Failed to get SMART data", "output": result.stderr}
+            return {"error": "Failed to get SMART data", "output": snapshot.error}
     except Exception as e:
         logger.error(f"Error getting SMART data: {e}")
         return {"error": str(e)}
 
+@app.get("/device/{device_path:path}/smart/deltas")
+async def get_smart_deltas(device_path: str, limit: Optional[int] = None):
+    """Mudanças recentes de atributos SMART entre leituras consecutivas do dispositivo"""
+    return {"device_path": device_path, "deltas": smart_delta_tracker.recent(device_path, limit)}
+
+@app.post("/smart/batch")
+async def smart_batch(request: Request):
+    """
+    Analisa em lote documentos JSON do smartctl/nvme coletados em outros hosts
+    Aceita uma lista de documentos ou {"documents": [...]}; retorna resultados por dispositivo e resumo da frota
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "Corpo JSON inválido"})
+    documents = body.get('documents') if isinstance(body, dict) else body
+    if not isinstance(documents, list) or not all(isinstance(d, dict) for d in documents):
+        return JSONResponse(status_code=400, content={"error": "Esperada uma lista de documentos JSON"})
+    try:
+        return await asyncio.to_thread(analyze_smart_batch, documents)
+    except ValueError as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except BatchPoolError as e:
+        # Worker morto no meio do lote: o pool já foi descartado, nova tentativa usa um pool novo
+        return JSONResponse(status_code=503, content={"error": str(e)})
+
 @app.get("/health")
 def health():
     """Healthcheck endpoint"""
-    return {"status": "ok", "running": monitor['running']}
+    active = sum(1 for job in jobs.values() if job['running'])
+    return {"status": "ok", "running": active > 0, "active_jobs": active}
 
 @app.get("/")
 def root():
@@ -890,8 +1715,10 @@ def root():
         "docs": "/docs",
             "health": "/health",
             "run": "/run (POST)",
-            "report": "/report",
-            "devices": "/devices"
+            "report": "/report?job_id=",
+            "jobs": "/jobs",
+            "devices": "/devices",
+            "profiles": "/profiles"
         }
     }
 
@@ -0,0 +1,46 @@
+"""
+Métricas de Job Codificadas em Delta
+Cada job mantém o último estado enviado e um número de sequência: clientes recebem um snapshot
+completo ao se inscrever e, depois, apenas os campos que mudaram (blobs grandes só quando mudam)
+"""
+import copy
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class MetricsStream:
+    """Versões das métricas de um job: snapshot (estado enviado + seq) e deltas numerados"""
+
+    def __init__(self, job_id: str, device_path: str):
+        self.job_id = job_id
+        self.device_path = device_path
+        self.seq = 0
+        self.sent: Dict = {}
+
+    def delta(self, metrics: Dict) -> Optional[Dict]:
+        """
+        Campos alterados desde o último delta, com o próximo número de sequência
+        None se nada mudou (nenhum evento é enviado)
+        """
+        changed = {}
+        for key, value in metrics.items():
+            previous = self.sent.get(key, _MISSING)
+            if previous is not _MISSING and previous == value:
+                continue
+            changed[key] = value
+        if not changed:
+            return None
+        # Cópia do que foi enviado: o job continua mutando os mesmos dicts/listas
+        for key, value in changed.items():
+            self.sent[key] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+        self.seq += 1
+        # base_seq: estado sobre o qual o delta se aplica (deltas mesclados cobrem base_seq..seq)
+        return {'job_id': self.job_id, 'device_path': self.device_path, 'base_seq': self.seq - 1,
+                'seq': self.seq, 'changed': changed}
+
+    def snapshot(self) -> Dict:
+        """Estado completo já enviado, consistente com `seq` (deltas seguintes começam em seq + 1)"""
+        return {'job_id': self.job_id, 'device_path': self.device_path, 'seq': self.seq, 'metrics': self.sent}
@@ -2,26 +2,30 @@
 Suporte Completo para NVMe
 Implementa nvme smart-log, nvme id-ctrl, nvme error-log
 """
-import subprocess
 import json
 import logging
 from typing import Dict, Optional
 
+from command_runner import run_command
+
 logger = logging.getLogger(__name__)
 
 class NVMESupport:
     """Suporte completo para dispositivos NVMe"""
     
     def __init__(self):
-        self.nvme_available = self._check_nvme_cli()
+        self._nvme_available: Optional[bool] = None
+    
+    @property
+    def nvme_available(self) -> bool:
+        """NVMe CLI disponível (verificado no primeiro uso, não na importação)"""
+        if self._nvme_available is None:
+            self._nvme_available = self._check_nvme_cli()
+        return self._nvme_available
     
     def _check_nvme_cli(self) -> bool:
         """Verifica se NVMe CLI está disponível"""
-        try:
-            result = subprocess.run(['nvme', '--version'], capture_output=True, text=True, timeout=5)
-            return result.returncode == 0
-        except:
-            return False
+        return run_command(['nvme', '--version'], timeout=5).ok
     
     def is_nvme_device(self, device_path: str) -> bool:
         """Verifica se dispositivo é NVMe"""
@@ -33,10 +37,7 @@ class NVMESupport:
             return None
         
         try:
-            result = subprocess.run(
-                ['nvme', 'smart-log', device_path, '--json'],
-                capture_output=True, text=True, timeout=10
-            )
+            result = run_command(['nvme', 'smart-log', device_path, '--json'], timeout=10, device=device_path)
             
             if result.returncode == 0:
                 return json.loads(result.stdout)
@@ -53,10 +54,7 @@ class NVMESupport:
             return None
         
         try:
-            result = subprocess.run(
-                ['nvme', 'id-ctrl', device_path, '--json'],
-                capture_output=True, text=True, timeout=10
-            )
+            result = run_command(['nvme', 'id-ctrl', device_path, '--json'], timeout=10, device=device_path)
             
             if result.returncode == 0:
                 return json.loads(result.stdout)
@@ -73,10 +71,7 @@ class NVMESupport:
             return None
         
         try:
-            result = subprocess.run(
-                ['nvme', 'error-log', device_path, '--json'],
-                capture_output=True, text=True, timeout=10
-            )
+            result = run_command(['nvme', 'error-log', device_path, '--json'], timeout=10, device=device_path)
             
             if result.returncode == 0:
                 return json.loads(result.stdout)
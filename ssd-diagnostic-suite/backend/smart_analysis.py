@@ -2,314 +2,371 @@
 Módulo de Análise SMART Completa
 Implementa análise profissional de todos atributos SMART
 """
-import subprocess
-import json
 import re
 import logging
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from smart_cache import get_smart_snapshot
 
 logger = logging.getLogger(__name__)
 
-@dataclass
-class SmartAttribute:
-    """Representa um atributo SMART"""
-    id: int
-    name: str
-    raw_value: int
-    normalized_value: int
-    threshold: int
-    type: str
-    updated: bool
-    failure_rate: float
-    critical: bool
+# Linha de atributo do `smartctl -a` em texto:
+#   ID# ATTRIBUTE_NAME FLAG VALUE WORST THRESH TYPE UPDATED WHEN_FAILED RAW_VALUE
+ATTRIBUTE_LINE = re.compile(
+    r'^\s*(\d+)\s+(\S+)\s+0x([0-9a-fA-F]+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\S+)\s+\S+\s+\S+\s+(\d+)',
+    re.MULTILINE
+)
+
+# Atributos SMART críticos mais importantes
+CRITICAL_ATTRIBUTES = {
+    # Physical
+    1: ("Raw_Read_Error_Rate", "critical"),
+    5: ("Reallocated_Sector_Ct", "critical"),
+    196: ("Reallocated_Event_Count", "critical"),
+    197: ("Current_Pending_Sector", "critical"),
+    198: ("Offline_Uncorrectable", "critical"),
+
+    # Wear/Health
+    177: ("Wear_Leveling_Count", "warning"),
+    184: ("End-to-End_Error", "critical"),
+
+    # Performance
+    7: ("Seek_Error_Rate", "warning"),
+
+    # Thermal
+    194: ("Temperature_Celsius", "info"),
+
+    # Usage
+    9: ("Power_On_Hours", "info"),
+    12: ("Power_Cycle_Count", "info"),
+}
+CRITICAL_NAMES = frozenset(name for name, level in CRITICAL_ATTRIBUTES.values() if level == 'critical')
+
+HEALTH_STATUS_LEVELS = ((95, 'Excellent'), (80, 'Good'), (60, 'Fair'), (40, 'Poor'))
+
+class SmartColumns:
+    """Tabela de atributos SMART em colunas NumPy de tipo fixo (uma linha por atributo)"""
+
+    __slots__ = ('ids', 'values', 'worst', 'thresh', 'raw', 'flags', 'names', 'types')
+
+    def __init__(self, ids, values, worst, thresh, raw, flags, names: List[str], types: List[str]):
+        self.ids = np.asarray(ids, dtype=np.uint16)
+        self.values = np.asarray(values, dtype=np.int32)
+        self.worst = np.asarray(worst, dtype=np.int32)
+        self.thresh = np.asarray(thresh, dtype=np.int32)
+        self.raw = np.asarray(raw, dtype=np.int64)
+        self.flags = np.asarray(flags, dtype=np.uint16)
+        self.names = names
+        self.types = types
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_table(cls, table: List[Dict]) -> 'SmartColumns':
+        """Colunas a partir de ata_smart_attributes.table do smartctl -j"""
+        count = len(table)
+        ids = np.fromiter((attr.get('id', 0) for attr in table), np.uint16, count)
+        values = np.fromiter((attr.get('value', 0) for attr in table), np.int32, count)
+        worst = np.fromiter((attr.get('worst', 0) for attr in table), np.int32, count)
+        thresh = np.fromiter((attr.get('thresh', 0) for attr in table), np.int32, count)
+        raw = np.fromiter((attr.get('raw', {}).get('value', 0) for attr in table), np.int64, count)
+        flags = np.fromiter((attr.get('flags', {}).get('value', 0) for attr in table), np.uint16, count)
+        names = [attr.get('name', 'Unknown') for attr in table]
+        types = [attr.get('type', {}).get('name', 'Old-age') for attr in table]
+        return cls(ids, values, worst, thresh, raw, flags, names, types)
+
+    @classmethod
+    def from_text(cls, text: str) -> 'SmartColumns':
+        """Colunas a partir da saída em texto do smartctl -a (versões sem JSON)"""
+        rows = ATTRIBUTE_LINE.findall(text or '')
+        if not rows:
+            return cls.empty()
+        ids, names, flags, values, worst, thresh, types, raw = zip(*rows)
+        return cls(
+            np.array(ids, dtype=np.uint16), np.array(values, dtype=np.int32),
+            np.array(worst, dtype=np.int32), np.array(thresh, dtype=np.int32),
+            np.array(raw, dtype=np.int64), [int(flag, 16) for flag in flags],
+            list(names), list(types)
+        )
+
+    @classmethod
+    def from_smart_data(cls, smart_data: Dict) -> 'SmartColumns':
+        """Colunas a partir do JSON completo do smartctl"""
+        return cls.from_table(smart_data.get('ata_smart_attributes', {}).get('table', []))
+
+    @classmethod
+    def empty(cls) -> 'SmartColumns':
+        return cls([], [], [], [], [], [], [], [])
+
+    def critical_mask(self) -> np.ndarray:
+        """Atributos críticos (pelo nome, como no smartctl)"""
+        return np.fromiter((name in CRITICAL_NAMES for name in self.names), bool, len(self))
+
+    def wear_mask(self) -> np.ndarray:
+        """Atributos de desgaste/saúde (Wear_Leveling_Count, SSD_Life_Health...)"""
+        return np.fromiter(('Wear' in name or 'Health' in name for name in self.names), bool, len(self))
+
+    def failure_rates(self) -> np.ndarray:
+        """% abaixo do threshold (0 quando acima ou sem threshold)"""
+        below = (self.thresh > 0) & (self.values < self.thresh)
+        rates = np.zeros(len(self), dtype=np.float64)
+        np.divide((self.thresh - self.values) * 100.0, self.thresh, out=rates, where=below)
+        return rates
+
+    def first_raw(self, mask: np.ndarray) -> Optional[int]:
+        """Valor raw do primeiro atributo selecionado pela máscara"""
+        index = np.flatnonzero(mask)
+        return int(self.raw[index[0]]) if index.size else None
+
+def health_status(score: float) -> str:
+    """Classificação textual do score de saúde"""
+    for minimum, label in HEALTH_STATUS_LEVELS:
+        if score >= minimum:
+            return label
+    return 'Critical'
+
+def _nvme_field(log: Dict, *keys, default=0):
+    """Campo do log NVMe pelo nome do smartctl ou do nvme-cli"""
+    for key in keys:
+        if log.get(key) is not None:
+            return log[key]
+    return default
+
+def health_score(columns: SmartColumns, critical: Optional[np.ndarray] = None,
+                 wear: Optional[np.ndarray] = None) -> Dict:
+    """Score de saúde ponderado: críticos peso 3, desgaste peso 2, demais 1"""
+    if not len(columns):
+        return {'score': 100, 'status': 'Unknown', 'factors': []}
+    critical = columns.critical_mask() if critical is None else critical
+    wear = columns.wear_mask() if wear is None else wear
+
+    weights = np.where(critical, 3, np.where(wear, 2, 1))
+    # Score baseado em quanto está acima do threshold
+    scores = np.full(len(columns), 100.0)
+    np.divide(columns.values * 100.0, columns.thresh, out=scores, where=columns.thresh != 0)
+    np.clip(scores, 0, 100, out=scores)
+    final_score = float(np.dot(scores, weights) / weights.sum())
+
+    return {
+        'score': round(final_score, 2),
+        'status': health_status(final_score),
+        'factors': [
+            {'name': name, 'score': score, 'weight': weight}
+            for name, score, weight in zip(columns.names, scores.tolist(), weights.tolist())
+        ],
+        'weighted_calculation': True
+    }
 
 class SmartAnalyzer:
     """Analisa dados SMART completos"""
-    
-    # Atributos SMART críticos mais importantes
-    CRITICAL_ATTRIBUTES = {
-        # Physical
-        1: ("Raw_Read_Error_Rate", "critical"),
-        5: ("Reallocated_Sector_Ct", "critical"),
-        196: ("Reallocated_Event_Count", "critical"),
-        197: ("Current_Pending_Sector", "critical"),
-        198: ("Offline_Uncorrectable", "critical"),
-        
-        # Wear/Health
-        177: ("Wear_Leveling_Count", "warning"),
-        184: ("End-to-End_Error", "critical"),
-        
-        # Performance
-        7: ("Seek_Error_Rate", "warning"),
-        
-        # Thermal
-        194: ("Temperature_Celsius", "info"),
-        
-        # Usage
-        9: ("Power_On_Hours", "info"),
-        12: ("Power_Cycle_Count", "info"),
-    }
-    
+
+    CRITICAL_ATTRIBUTES = CRITICAL_ATTRIBUTES
+
     def __init__(self):
-        self.attributes = []
         self.warnings = []
         self.critical_issues = []
-    
+
     def analyze_complete(self, device_path: str) -> Dict:
         """
         Análise COMPLETA e PROFUNDA do SMART
         Retorna todos atributos, warnings, critical issues
         """
-        smart_data = self._collect_all_attributes(device_path)
-        
-        if not smart_data:
+        columns = self._collect_all_attributes(device_path)
+
+        if columns is None:
             return {
                 'error': 'Não foi possível coletar dados SMART',
                 'attributes': [],
                 'analysis': []
             }
-        
-        # Parse todos atributos
-        attributes = self._parse_all_attributes(smart_data)
-        
+
+        return self.analyze_columns(columns, device_path)
+
+    def analyze_data(self, smart_data: Dict, device_path: str = '') -> Dict:
+        """Análise de um JSON do smartctl já coletado (ex.: snapshots armazenados)"""
+        return self.analyze_columns(SmartColumns.from_smart_data(smart_data), device_path)
+
+    def analyze_nvme(self, health_log: Dict, device_path: str = '') -> Dict:
+        """
+        Análise do log de saúde NVMe (nvme_smart_health_information_log do smartctl ou nvme smart-log)
+        Mesmo formato de resultado e mesma ponderação: reserva e erros de mídia peso 3, desgaste peso 2
+        """
+        used = _nvme_field(health_log, 'percentage_used', 'percent_used')
+        spare = _nvme_field(health_log, 'available_spare', 'avail_spare', default=100)
+        spare_threshold = _nvme_field(health_log, 'available_spare_threshold', 'spare_thresh')
+        media_errors = _nvme_field(health_log, 'media_errors')
+        critical_warning = _nvme_field(health_log, 'critical_warning')
+        temp = health_log.get('temperature')
+        if temp is not None and 'avail_spare' in health_log:
+            # nvme-cli reporta a temperatura em Kelvin
+            temp = temp - 273
+
+        factors = [
+            {'name': 'Percentage_Used', 'score': float(max(0, 100 - used)), 'weight': 2},
+            {'name': 'Available_Spare',
+             'score': 100.0 if not spare_threshold or spare >= spare_threshold else spare / spare_threshold * 100,
+             'weight': 3},
+            {'name': 'Media_Errors', 'score': 100.0 if media_errors == 0 else 50.0, 'weight': 3},
+        ]
+        final_score = sum(f['score'] * f['weight'] for f in factors) / sum(f['weight'] for f in factors)
+        status = 'Critical' if critical_warning else health_status(final_score)
+        health = {'score': round(final_score, 2), 'status': status, 'factors': factors, 'weighted_calculation': True}
+
+        if critical_warning:
+            self.critical_issues.append(f"Critical_Warning: 0x{critical_warning:02x}")
+        if spare_threshold and spare < spare_threshold:
+            self.critical_issues.append(f"Available_Spare: {spare}% abaixo do threshold ({spare_threshold}%)")
+        if media_errors:
+            self.warnings.append(f"Media_Errors: {media_errors}")
+        critical_count = int(bool(critical_warning)) + int(bool(spare_threshold and spare < spare_threshold))
+
+        return {
+            'device_path': device_path,
+            'total_attributes': len(health_log),
+            'attributes': [],
+            'nvme_health_log': health_log,
+            'analysis': [],
+            'warnings': self.warnings,
+            'critical_issues': self.critical_issues,
+            'health_score': health,
+            'recommendations': self._recommendations(used, critical_count, temp, health)
+        }
+
+    def analyze_columns(self, columns: SmartColumns, device_path: str = '') -> Dict:
+        """Análise completa sobre as colunas; máscaras e taxas calculadas uma única vez"""
+        critical = columns.critical_mask()
+        wear = columns.wear_mask()
+        failure_rates = columns.failure_rates()
+
         # Análise profunda
-        analysis = self._deep_analysis(attributes)
-        
+        analysis = self._deep_analysis(columns, failure_rates)
+
         # Cálculo de saúde baseado em múltiplos fatores
-        health_score = self._calculate_health_score(attributes)
-        
+        health = health_score(columns, critical, wear)
+
+        attributes = [
+            {
+                'id': attr_id, 'name': name, 'raw_value': raw, 'normalized_value': value,
+                'threshold': thresh, 'type': type_name, 'updated': bool(flag & 1),
+                'failure_rate': rate, 'critical': is_critical
+            }
+            for attr_id, name, raw, value, thresh, type_name, flag, rate, is_critical in zip(
+                columns.ids.tolist(), columns.names, columns.raw.tolist(), columns.values.tolist(),
+                columns.thresh.tolist(), columns.types, columns.flags.tolist(),
+                failure_rates.tolist(), critical.tolist()
+            )
+        ]
+
         return {
             'device_path': device_path,
-            'total_attributes': len(attributes),
-            'attributes': [attr.__dict__ for attr in attributes],
+            'total_attributes': len(columns),
+            'attributes': attributes,
             'analysis': analysis,
             'warnings': self.warnings,
             'critical_issues': self.critical_issues,
-            'health_score': health_score,
-            'recommendations': self._generate_recommendations(attributes, health_score)
+            'health_score': health,
+            'recommendations': self._generate_recommendations(columns, failure_rates, wear, health)
         }
-    
-    def _collect_all_attributes(self, device_path: str) -> Dict:
-        """Coleta TODOS os atributos SMART disponíveis"""
+
+    def _collect_all_attributes(self, device_path: str) -> Optional[SmartColumns]:
+        """Coleta TODOS os atributos SMART disponíveis (snapshot compartilhado por dispositivo)"""
         try:
-            # Tentar smartctl com todas flags
-            result = subprocess.run(
-                ['smartctl', '-A', '-j', device_path],
-                capture_output=True, 
-                text=True, 
-                timeout=15
-            )
-            
-            if result.returncode == 0:
-                return json.loads(result.stdout)
-            
-            # Fallback: try without JSON
-                result = subprocess.run(
-                ['smartctl', '-A', device_path],
-                capture_output=True, 
-                text=True, 
-                timeout=15
-            )
-            
-            return self._parse_smart_text(result.stdout)
+            snapshot = get_smart_snapshot(device_path)
+
+            if snapshot.ok and snapshot.data:
+                return SmartColumns.from_smart_data(snapshot.data)
+
+            # Fallback: smartctl sem JSON
+            return SmartColumns.from_text(snapshot.text)
         except Exception as e:
             logger.error(f"Error collecting SMART: {e}")
-            return {}
-    
-    def _parse_smart_text(self, text: str) -> Dict:
-        """Parse SMART output em texto para dict"""
-        data = {'ata_smart_attributes': {'table': []}}
-        
-        # Pattern para attributes
-        pattern = r'(\d+)\s+(\w+[_\w]*)\s+0x\w+\s+(\d+)\s+(\d+)\s+(\d+)\s+(\w+)'
-        
-        for line in text.split('\n'):
-            match = re.match(pattern, line)
-            if match:
-                attr_id, name, flag, value, worst, thresh, type_str = match.groups()
-                data['ata_smart_attributes']['table'].append({
-                    'id': int(attr_id),
-                    'name': name,
-                    'flags': {'value': int(flag, 16)},
-                    'value': int(value),
-                    'worst': int(worst),
-                    'thresh': int(thresh),
-                    'raw': {'value': self._extract_raw_value(line)},
-                    'type': {'name': type_str}
-                })
-        
-        return data
-    
-    def _extract_raw_value(self, line: str) -> int:
-        """Extrai valor raw do SMART output"""
-        # Procura padrão tipo "000000000012"
-        match = re.search(r'(\d{12})', line)
-        return int(match.group(1)) if match else 0
-    
-    def _parse_all_attributes(self, smart_data: Dict) -> List[SmartAttribute]:
-        """Parse TODOS atributos SMART coletados"""
-        attributes = []
-        
-        attrs = smart_data.get('ata_smart_attributes', {}).get('table', [])
-        
-        for attr in attrs:
-            attr_id = attr.get('id', 0)
-            name = attr.get('name', 'Unknown')
-            raw_value = attr.get('raw', {}).get('value', 0)
-            normalized = attr.get('value', 0)
-            threshold = attr.get('thresh', 0)
-            
-            # Determinar se é crítico
-            critical = name in [a[0] for a in self.CRITICAL_ATTRIBUTES.values() if a[1] == 'critical']
-            
-            # Calcular failure rate
-            failure_rate = 0.0
-            if threshold > 0 and normalized < threshold:
-                failure_rate = ((threshold - normalized) / threshold) * 100
-            
-            attributes.append(SmartAttribute(
-                id=attr_id,
-                name=name,
-                raw_value=raw_value,
-                normalized_value=normalized,
-                threshold=threshold,
-                type=attr.get('type', {}).get('name', 'Old-age'),
-                updated=bool(attr.get('flags', {}).get('value', 0) & 1),
-                failure_rate=failure_rate,
-                critical=critical
-            ))
-        
-        return attributes
-    
-    def _deep_analysis(self, attributes: List[SmartAttribute]) -> List[Dict]:
+            return None
+
+    def _deep_analysis(self, columns: SmartColumns, failure_rates: np.ndarray) -> List[Dict]:
         """Análise profunda de cada atributo"""
+        statuses = np.where(failure_rates > 50, 'CRITICAL', np.where(failure_rates > 0, 'WARNING', 'OK'))
         analysis = []
-        
-        for attr in attributes:
-            entry = {
-                'attribute_id': attr.id,
-                'name': attr.name,
-                'status': 'OK',
-                'value': attr.normalized_value,
-                'threshold': attr.threshold,
-                'failure_rate': attr.failure_rate,
-                'raw_value': attr.raw_value,
-                'interpretation': self._interpret_attribute(attr)
-            }
-            
+
+        for attr_id, name, value, thresh, rate, raw, status in zip(
+            columns.ids.tolist(), columns.names, columns.values.tolist(), columns.thresh.tolist(),
+            failure_rates.tolist(), columns.raw.tolist(), statuses.tolist()
+        ):
+            analysis.append({
+                'attribute_id': attr_id,
+                'name': name,
+                'status': status,
+                'value': value,
+                'threshold': thresh,
+                'failure_rate': rate,
+                'raw_value': raw,
+                'interpretation': self._interpret_attribute(attr_id, name, value, raw)
+            })
+
             # Adicionar warnings
-            if attr.failure_rate > 50:
-                self.critical_issues.append(f"{attr.name}: {attr.failure_rate:.1f}% abaixo do threshold")
-                screened['status'] = 'CRITICAL'
-            elif attr.failure_rate > 0:
-                self.warnings.append(f"{attr.name}: {attr.failure_rate:.1f}% abaixo do threshold")
-                screened['status'] = 'WARNING'
-            
-            analysis.append(entry)
-        
+            if status == 'CRITICAL':
+                self.critical_issues.append(f"{name}: {rate:.1f}% abaixo do threshold")
+            elif status == 'WARNING':
+                self.warnings.append(f"{name}: {rate:.1f}% abaixo do threshold")
+
         return analysis
-    
-    def _interpret_attribute(self, attr: SmartAttribute) -> str:
+
+    def _interpret_attribute(self, attr_id: int, name: str, value: int, raw: int) -> str:
         """Interpreta significado técnico de cada atributo"""
-        interpretations = {
-            5: "Setores realocados. Valores > 0 indicam degradação física.",
-            196: "Eventos de realocação. Incrementos contínuos indicam problemas.",
-            197: "Setores pendentes. Valores > 0: falha física em progresso.",
-            194: f"Temperatura: {attr.raw_value}°C. Ideal: < 60°C",
-            9: f"Potência ligada: {attr.raw_value}h ({attr.raw_value/24/365:.1f} anos)",
-            12: f"Ciclos de energia: {attr.raw_value}",
-        }
-        
-        return interpretations.get(attr.id, f"Atributo {attr.name}: valor {attr.normalized_value}")
-    
-    def _calculate_health_score(self, attributes: List[SmartAttribute]) -> Dict:
-        """Calcula score de saúde baseado em múltiplos fatores"""
-        if not attributes:
-            return {'score': 100, 'status': 'Unknown', 'factors': []}
-        
-        factors = []
-        total_weight = 0
-        weighted_score = 0
-        
-        for attr in attributes:
-            if attr.critical:
-                weight = 3
-            elif 'Wear' in attr.name or 'Health' in attr.name:
-                weight = 2
-            else:
-                weight = 1
-            
-            # Score baseado em quanto está acima do threshold
-            if attr.threshold == 0:
-                attr_score = 100
-            else:
-                attr_score = max(0, min(100, (attr.normalized_value / attr.threshold) * 100))
-            
-            factors.append({
-                'name': attr.name,
-                'score': attr_score,
-                'weight': weight
-            })
-            
-            weighted_score += attr_score * weight
-            total_weight += weight
-        
-        final_score = weighted_score / total_weight if total_weight > 0 else 100
-        
-        # Determinar status
-        if final_score >= 95:
-            status = 'Excellent'
-        elif final_score >= 80:
-            status = 'Good'
-        elif final_score >= 60:
-            status = 'Fair'
-        elif final_score >= 40:
-            status = 'Poor'
-        else:
-            status = 'Critical'
-        
-        return {
-            'score': round(final_score, 2),
-            'status': status,
-            'factors': factors,
-            'weighted_calculation': True
-        }
-    
-    def _generate_recommendations(self, attributes: List[SmartAttribute], health: Dict) -> List[str]:
+        if attr_id == 5:
+            return "Setores realocados. Valores > 0 indicam degradação física."
+        if attr_id == 196:
+            return "Eventos de realocação. Incrementos contínuos indicam problemas."
+        if attr_id == 197:
+            return "Setores pendentes. Valores > 0: falha física em progresso."
+        if attr_id == 194:
+            return f"Temperatura: {raw}°C. Ideal: < 60°C"
+        if attr_id == 9:
+            return f"Potência ligada: {raw}h ({raw/24/365:.1f} anos)"
+        if attr_id == 12:
+            return f"Ciclos de energia: {raw}"
+        return f"Atributo {name}: valor {value}"
+
+    def _generate_recommendations(self, columns: SmartColumns, failure_rates: np.ndarray,
+                                  wear: np.ndarray, health: Dict) -> List[str]:
         """Gera recomendações baseadas na análise"""
+        return self._recommendations(
+            columns.first_raw(wear),
+            int(np.count_nonzero(failure_rates > 50)),
+            columns.first_raw(columns.ids == 194),
+            health
+        )
+
+    def _recommendations(self, wear_pct: Optional[int], error_count: int, temp: Optional[int], health: Dict) -> List[str]:
+        """Recomendações a partir de desgaste (%), atributos críticos, temperatura e saúde geral"""
         recommendations = []
-        
+
         # Análise de wear
-        wear_attrs = [a for a in attributes if 'Wear' in a.name or 'Health' in a.name]
-        if wear_attrs:
-            wear_pct = wear_attrs[0].raw_value if wear_attrs else 0
+        if wear_pct is not None:
             if wear_pct > 80:
                 recommendations.append(f"⚠️ DESGASTE CRÍTICO ({wear_pct}%): Considere substituição imediata")
             elif wear_pct > 60:
                 recommendations.append(f"⚠️ Desgaste alto ({wear_pct}%): Planeje substituição em breve")
-        
+
         # Análise de erros
-        error_count = sum(1 for a in attributes if a.failure_rate > 50)
         if error_count > 0:
             recommendations.append(f"⚠️ {error_count} atributos com valores críticos")
-        
+
         # Análise térmica
-        temp_attrs = [a for a in attributes if a.id == 194]
-        if temp_attrs:
-            temp = temp_attrs[0].raw_value
-            if temp > 70:
-                recommendations.append(f"⚠️ TEMPERATURA ALTA ({temp}°C): Melhore ventilação")
-        
+        if temp is not None and temp > 70:
+            recommendations.append(f"⚠️ TEMPERATURA ALTA ({temp}°C): Melhore ventilação")
+
         # Health geral
         if health['status'] in ['Poor', 'Critical']:
             recommendations.append("⚠️ BACKUP URGENTE: Saúde do disco comprometida")
             recommendations.append("⚠️ Considere substituição imediata")
-        
+
         if not recommendations:
             recommendations.append("✅ Disco operando dentro dos parâmetros normais")
             recommendations.append("✅ Continue com backups regulares")
-        
+
         return recommendations
 
 def analyze_smart_complete(device_path: str) -> Dict:
@@ -317,3 +374,6 @@ def analyze_smart_complete(device_path: str) -> Dict:
     analyzer = SmartAnalyzer()
     return analyzer.analyze_complete(device_path)
 
+def analyze_smart_data(smart_data: Dict, device_path: str = '') -> Dict:
+    """Função helper para reanálise de snapshots já coletados"""
+    return SmartAnalyzer().analyze_data(smart_data, device_path)
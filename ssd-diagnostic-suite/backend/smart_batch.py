@@ -0,0 +1,175 @@
+"""
+Análise SMART em Lote para Frotas
+Recebe documentos JSON do smartctl/nvme coletados em outros hosts e os pontua em paralelo
+(pool de processos) com o mesmo SmartAnalyzer, retornando resultados por dispositivo e um resumo da frota
+"""
+import os
+import logging
+import threading
+import multiprocessing
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from smart_analysis import SmartAnalyzer
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_DOCUMENTS = int(os.environ.get('SMART_BATCH_MAX', '10000'))
+BATCH_WORKERS = int(os.environ.get('SMART_BATCH_WORKERS', '0')) or os.cpu_count() or 1
+# Abaixo disso o custo de serializar para o pool supera o ganho; analisa no próprio processo
+INLINE_THRESHOLD = 32
+WORST_DEVICES = 10
+
+class BatchPoolError(RuntimeError):
+    """Falha do pool de processos (worker morto, processos não criados); o pool é recriado no próximo lote"""
+
+def _device_identity(document: Dict, index: int) -> Dict:
+    """Host, caminho, modelo e serial do documento (envelope do coletor ou JSON do smartctl)"""
+    smart = document.get('smartctl_json', document)
+    device = smart.get('device', {})
+    return {
+        'index': index,
+        'host': document.get('host', ''),
+        'device_path': (device.get('name') if isinstance(device, dict) else device) or document.get('device_path', ''),
+        'model': smart.get('model_name') or smart.get('mn') or 'Unknown',
+        'serial': smart.get('serial_number') or smart.get('sn') or '',
+    }
+
+def analyze_document(document: Dict, index: int = 0) -> Dict:
+    """
+    Analisa um documento: saída de `smartctl -a -j` (ATA ou NVMe), `nvme smart-log --json`
+    ou um envelope {"host": ..., "smartctl_json": {...}}
+    """
+    try:
+        result = _device_identity(document, index)
+        smart = document.get('smartctl_json', document)
+        analyzer = SmartAnalyzer()
+        if 'ata_smart_attributes' in smart:
+            analysis = analyzer.analyze_data(smart, result['device_path'])
+            result['protocol'] = 'ATA'
+        elif 'nvme_smart_health_information_log' in smart:
+            analysis = analyzer.analyze_nvme(smart['nvme_smart_health_information_log'], result['device_path'])
+            result['protocol'] = 'NVMe'
+        elif 'critical_warning' in smart:
+            analysis = analyzer.analyze_nvme(smart, result['device_path'])
+            result['protocol'] = 'NVMe'
+        else:
+            result['error'] = 'Documento sem atributos SMART reconhecidos'
+            return result
+
+        # Avaliação geral do próprio drive (smartctl -H) prevalece sobre o score
+        if smart.get('smart_status', {}).get('passed') is False:
+            analysis['critical_issues'].append('SMART overall-health: FAILED')
+            analysis['health_score']['status'] = 'Critical'
+            analysis['recommendations'] = [
+                "⚠️ BACKUP URGENTE: O drive reporta falha iminente (SMART FAILED)"
+            ] + [rec for rec in analysis['recommendations'] if not rec.startswith('✅')]
+
+        result.update(
+            health_score=analysis['health_score']['score'],
+            status=analysis['health_score']['status'],
+            warnings=analysis['warnings'],
+            critical_issues=analysis['critical_issues'],
+            recommendations=analysis['recommendations'],
+            analysis=analysis
+        )
+        return result
+    except Exception as e:
+        logger.error(f"Erro ao analisar documento {index}: {e}")
+        return {'index': index, 'error': str(e)}
+
+def _analyze_chunk(chunk: List[Dict], start: int) -> List[Dict]:
+    """Executado nos workers: analisa uma fatia contígua do lote"""
+    return [analyze_document(document, start + offset) for offset, document in enumerate(chunk)]
+
+def fleet_summary(results: List[Dict]) -> Dict:
+    """Resumo da frota: status, distribuição de scores, modelos e piores dispositivos"""
+    analyzed = [r for r in results if 'error' not in r]
+    scores = sorted(r['health_score'] for r in analyzed)
+    by_model = defaultdict(list)
+    for r in analyzed:
+        by_model[r['model']].append(r['health_score'])
+
+    return {
+        'total_documents': len(results),
+        'analyzed': len(analyzed),
+        'errors': len(results) - len(analyzed),
+        'hosts': len({r['host'] for r in analyzed if r['host']}),
+        'status_counts': dict(Counter(r['status'] for r in analyzed)),
+        'protocol_counts': dict(Counter(r['protocol'] for r in analyzed)),
+        'devices_with_critical_issues': sum(1 for r in analyzed if r['critical_issues']),
+        'health_score': {
+            'mean': round(sum(scores) / len(scores), 2) if scores else None,
+            'min': scores[0] if scores else None,
+            'p10': scores[int(len(scores) * 0.1)] if scores else None,
+            'median': scores[len(scores) // 2] if scores else None,
+        },
+        'models': {
+            model: {'devices': len(values), 'mean_score': round(sum(values) / len(values), 2)}
+            for model, values in sorted(by_model.items(), key=lambda item: -len(item[1]))
+        },
+        'worst_devices': [
+            {key: r[key] for key in ('index', 'host', 'device_path', 'model', 'serial', 'health_score', 'status')}
+            for r in sorted(analyzed, key=lambda r: r['health_score'])[:WORST_DEVICES]
+        ],
+    }
+
+class SmartBatchAnalyzer:
+    """Pool de processos reutilizado entre lotes (criado no primeiro lote grande)"""
+
+    def __init__(self, max_workers: int = BATCH_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.pool is None:
+                # spawn: fork de um processo com threads (uvicorn, executores) pode herdar locks travados
+                self.pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                mp_context=multiprocessing.get_context('spawn'))
+            return self.pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        """Descarta um pool quebrado para que o próximo lote crie outro"""
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def analyze(self, documents: List[Dict]) -> Dict:
+        """Analisa o lote e retorna {'results': [...], 'summary': {...}} na ordem de entrada"""
+        if len(documents) > MAX_BATCH_DOCUMENTS:
+            raise ValueError(f"Lote com {len(documents)} documentos excede o limite de {MAX_BATCH_DOCUMENTS}")
+
+        if len(documents) <= INLINE_THRESHOLD or self.max_workers == 1:
+            results = _analyze_chunk(documents, 0)
+        else:
+            # Poucas fatias grandes por worker: menos idas e voltas de pickle
+            chunk_size = max(INLINE_THRESHOLD, -(-len(documents) // (self.max_workers * 4)))
+            starts = range(0, len(documents), chunk_size)
+            pool = self._get_pool()
+            try:
+                futures = [pool.submit(_analyze_chunk, documents[start:start + chunk_size], start) for start in starts]
+                results = [result for future in futures for result in future.result()]
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                logger.error(f"Pool de análise SMART falhou: {e!r}; será recriado")
+                self._discard_pool(pool)
+                raise BatchPoolError(f"Falha no pool de análise em lote: {e or type(e).__name__}") from e
+
+        return {'results': results, 'summary': fleet_summary(results)}
+
+    def shutdown(self):
+        """Encerra o pool (shutdown da aplicação)"""
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+                self.pool = None
+
+batch_analyzer = SmartBatchAnalyzer()
+
+def analyze_smart_batch(documents: List[Dict]) -> Dict:
+    """Função helper"""
+    return batch_analyzer.analyze(documents)
@@ -0,0 +1,128 @@
+"""
+Cache de Snapshots SMART por Dispositivo
+Uma única execução de smartctl por dispositivo dentro do TTL, compartilhada por todos os módulos
+"""
+import json
+import os
+import threading
+import time
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from command_runner import run_command
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = float(os.environ.get('SMART_CACHE_TTL', '30'))
+SMARTCTL_TIMEOUT = 15
+
+@dataclass
+class SmartSnapshot:
+    """Saída de smartctl para um dispositivo em um instante"""
+    device: str
+    data: Dict = field(default_factory=dict)
+    # Saída em texto, só quando o smartctl não gera JSON (versões antigas)
+    text: str = ''
+    returncode: Optional[int] = None
+    error: Optional[str] = None
+    timestamp: float = 0.0
+    collected_at: str = ''
+
+    @property
+    def ok(self) -> bool:
+        """Mesmo critério usado antes do cache: smartctl terminou com código 0"""
+        return self.returncode == 0
+
+    def age(self) -> float:
+        return time.monotonic() - self.timestamp
+
+class SmartSnapshotCache:
+    """Snapshots SMART por dispositivo com TTL; chamadas concorrentes aguardam a mesma coleta"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self.snapshots: Dict[str, SmartSnapshot] = {}
+        self.locks: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+        self.listeners: List[Callable[[SmartSnapshot], None]] = []
+
+    def add_listener(self, callback: Callable[[SmartSnapshot], None]):
+        """Registra callback chamado a cada coleta nova (ex.: rastreador de deltas)"""
+        self.listeners.append(callback)
+
+    def _device_lock(self, device_path: str) -> threading.Lock:
+        with self.lock:
+            return self.locks.setdefault(device_path, threading.Lock())
+
+    def get(self, device_path: str, max_age: Optional[float] = None) -> SmartSnapshot:
+        """Snapshot do dispositivo, coletando de novo só se mais antigo que max_age (padrão: TTL)"""
+        max_age = self.ttl if max_age is None else max_age
+        snapshot = self.snapshots.get(device_path)
+        if snapshot and snapshot.age() <= max_age:
+            return snapshot
+        with self._device_lock(device_path):
+            # Outra thread pode ter coletado enquanto esperávamos
+            snapshot = self.snapshots.get(device_path)
+            if snapshot and snapshot.age() <= max_age:
+                return snapshot
+            snapshot = self._collect(device_path)
+            self.snapshots[device_path] = snapshot
+            for callback in self.listeners:
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    logger.error(f"Erro em listener de snapshot SMART: {e}")
+            return snapshot
+
+    def invalidate(self, device_path: Optional[str] = None):
+        """Descarta o snapshot de um dispositivo (ou de todos)"""
+        if device_path is None:
+            self.snapshots.clear()
+        else:
+            self.snapshots.pop(device_path, None)
+
+    def _collect(self, device_path: str) -> SmartSnapshot:
+        """Executa smartctl -a -j (com fallback para texto)"""
+        snapshot = SmartSnapshot(device=device_path, collected_at=datetime.now().isoformat())
+        try:
+            result = run_command(['smartctl', '-a', '-j', device_path], SMARTCTL_TIMEOUT, device=device_path)
+            snapshot.returncode = result.returncode
+            try:
+                snapshot.data = json.loads(result.stdout)
+            except ValueError:
+                # smartctl sem suporte a JSON: guardar a saída em texto
+                result = run_command(['smartctl', '-a', device_path], SMARTCTL_TIMEOUT, device=device_path)
+                snapshot.returncode = result.returncode
+                snapshot.text = result.stdout
+            if result.returncode != 0:
+                snapshot.error = result.stderr.strip() or f'smartctl retornou {result.returncode}'
+        except Exception as e:
+            logger.error(f"Error collecting SMART snapshot for {device_path}: {e}")
+            snapshot.error = str(e)
+        snapshot.timestamp = time.monotonic()
+        logger.info(f"SMART snapshot de {device_path} coletado (código {snapshot.returncode})")
+        return snapshot
+
+def current_temperature(snapshot: SmartSnapshot) -> Optional[float]:
+    """Temperatura atual (°C) do snapshot: campo temperature, NVMe ou atributos 194/190"""
+    data = snapshot.data
+    if data.get('temperature', {}).get('current') is not None:
+        return float(data['temperature']['current'])
+    nvme_temp = data.get('nvme_smart_health_information_log', {}).get('temperature')
+    if nvme_temp is not None:
+        return float(nvme_temp)
+    for attr in data.get('ata_smart_attributes', {}).get('table', []):
+        if attr.get('id') in (194, 190):
+            # O byte baixo do raw é a temperatura atual; os demais guardam mín/máx
+            raw = attr.get('raw', {}).get('value')
+            if raw is not None:
+                return float(raw & 0xFF)
+    return None
+
+smart_cache = SmartSnapshotCache()
+
+def get_smart_snapshot(device_path: str, max_age: Optional[float] = None) -> SmartSnapshot:
+    """Função helper"""
+    return smart_cache.get(device_path, max_age)
@@ -0,0 +1,129 @@
+"""
+Rastreamento Incremental de Deltas SMART
+Compara cada snapshot SMART com o anterior do mesmo dispositivo e publica apenas os atributos
+que mudaram (ex.: Reallocated_Sector_Ct +3 desde a última leitura)
+"""
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from smart_cache import SmartSnapshot, smart_cache
+
+logger = logging.getLogger(__name__)
+
+# Deltas recentes guardados por dispositivo (consulta via API)
+DELTA_HISTORY = 50
+# Campos comparados em cada atributo ATA; o threshold é fixo de fábrica
+ATA_FIELDS = ('value', 'worst', 'raw')
+
+@dataclass
+class SmartDelta:
+    """Atributos que mudaram entre dois snapshots consecutivos de um dispositivo"""
+    device: str
+    timestamp: str
+    previous_timestamp: str
+    changes: List[Dict] = field(default_factory=list)
+    unchanged: int = 0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+def _flatten(data: Dict) -> Dict[str, Tuple[str, float]]:
+    """Valores comparáveis do JSON do smartctl: chave -> (nome, valor)"""
+    values = {}
+    for attr in data.get('ata_smart_attributes', {}).get('table', []):
+        attr_id = attr.get('id')
+        name = attr.get('name', f'Attribute_{attr_id}')
+        for field_name in ATA_FIELDS:
+            value = attr.get('raw', {}).get('value') if field_name == 'raw' else attr.get(field_name)
+            if value is not None:
+                values[f'{attr_id}.{field_name}'] = (name, value)
+    for key, value in data.get('nvme_smart_health_information_log', {}).items():
+        # Listas (temperature_sensors) e valores não numéricos ficam de fora
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[f'nvme.{key}'] = (key, value)
+    if data.get('temperature', {}).get('current') is not None:
+        values['temperature'] = ('Temperature', data['temperature']['current'])
+    if data.get('smart_status', {}).get('passed') is not None:
+        values['smart_status'] = ('SMART_Status_Passed', int(data['smart_status']['passed']))
+    return values
+
+class SmartDeltaTracker:
+    """Guarda o último snapshot de cada dispositivo e calcula deltas a cada nova coleta"""
+
+    def __init__(self, history: int = DELTA_HISTORY):
+        self.previous: Dict[str, Tuple[str, Dict[str, Tuple[str, float]]]] = {}
+        self.deltas: Dict[str, Deque[SmartDelta]] = {}
+        self.history = history
+        self.subscribers: List[Callable[[SmartDelta], None]] = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[SmartDelta], None]):
+        """Registra consumidor de deltas (chamado na thread da coleta; deve ser rápido)"""
+        self.subscribers.append(callback)
+
+    def update(self, snapshot: SmartSnapshot) -> Optional[SmartDelta]:
+        """Processa um snapshot novo; retorna o delta (None na primeira leitura ou sem mudanças)"""
+        if not snapshot.ok or not snapshot.data:
+            return None
+        current = _flatten(snapshot.data)
+        with self.lock:
+            previous = self.previous.get(snapshot.device)
+            self.previous[snapshot.device] = (snapshot.collected_at, current)
+        if previous is None:
+            return None
+
+        previous_timestamp, previous_values = previous
+        delta = SmartDelta(device=snapshot.device, timestamp=snapshot.collected_at,
+                           previous_timestamp=previous_timestamp)
+        for key, (name, value) in current.items():
+            old = previous_values.get(key)
+            if old is not None and old[1] == value:
+                delta.unchanged += 1
+                continue
+            attr_id, _, field_name = key.partition('.')
+            delta.changes.append({
+                'key': key,
+                'id': int(attr_id) if attr_id.isdigit() else None,
+                'name': name,
+                'field': field_name or key,
+                'previous': None if old is None else old[1],
+                'current': value,
+                'delta': None if old is None else value - old[1],
+            })
+        if not delta.changes:
+            return None
+
+        with self.lock:
+            self.deltas.setdefault(snapshot.device, deque(maxlen=self.history)).append(delta)
+        for callback in self.subscribers:
+            try:
+                callback(delta)
+            except Exception as e:
+                logger.error(f"Erro em consumidor de delta SMART: {e}")
+        return delta
+
+    def recent(self, device_path: str, limit: Optional[int] = None) -> List[Dict]:
+        """Deltas recentes de um dispositivo, do mais antigo ao mais novo"""
+        with self.lock:
+            deltas = list(self.deltas.get(device_path, ()))
+        if limit is not None:
+            limit = max(0, limit)
+            deltas = deltas[-limit:] if limit else []
+        return [delta.to_dict() for delta in deltas]
+
+    def reset(self, device_path: Optional[str] = None):
+        """Esquece o snapshot anterior (próxima leitura vira a nova base)"""
+        with self.lock:
+            if device_path is None:
+                self.previous.clear()
+                self.deltas.clear()
+            else:
+                self.previous.pop(device_path, None)
+                self.deltas.pop(device_path, None)
+
+smart_delta_tracker = SmartDeltaTracker()
+# Cada coleta nova do cache (não as leituras servidas do cache) alimenta o rastreador
+smart_cache.add_listener(smart_delta_tracker.update)
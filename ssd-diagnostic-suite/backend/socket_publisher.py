@@ -0,0 +1,208 @@
+"""
+Camada de Publicação Socket.IO com Coalescência e Backpressure por Cliente
+Status e métricas de um job viram um único frame por tick; cada cliente tem fila própria (um frame
+pendente por job, o mais recente vence), limite de taxa e timeout de envio.
+Frames vão só para os clientes inscritos na sala do job ou do dispositivo.
+Cada canal sabe o último seq de métricas entregue por job: se o cliente perdeu deltas (frame
+descartado, timeout, sequência não contígua) o próximo frame leva o snapshot completo
+"""
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Frames por segundo enviados a cada cliente
+EMIT_RATE = float(os.environ.get('SOCKET_EMIT_RATE', '4'))
+# Jobs com frame pendente por cliente; acima disso o frame mais antigo é descartado
+MAX_PENDING_FRAMES = 64
+# Envio mais lento que isso é abandonado (o cliente ressincroniza as métricas depois)
+SEND_TIMEOUT = 5.0
+FRAME_EVENT = 'job_update'
+SNAPSHOT_EVENT = 'metrics_snapshot'
+# Resumo de todos os jobs para telas de visão geral
+FLEET_ROOM = 'fleet'
+
+def job_room(job_id: str) -> str:
+    return f'job:{job_id}'
+
+def device_room(device_path: str) -> str:
+    return f'device:{device_path}'
+
+Emit = Callable[..., Awaitable[None]]
+# job_id -> snapshot atual das métricas (MetricsStream.snapshot) ou None
+Snapshot = Callable[[str], Optional[Dict]]
+
+def merge_frame(frame: Dict, status: Optional[Dict], delta: Optional[Dict]) -> bool:
+    """
+    Mescla status (substitui) e delta de métricas (campos somados, seq estendido) no frame pendente
+    False se o delta não continua o pendente (o cliente precisa de snapshot)
+    """
+    if status is not None:
+        frame['status'] = status
+    if delta is not None:
+        metrics = frame.get('metrics')
+        if metrics is None or delta['base_seq'] != metrics['seq']:
+            # Sem frame anterior (ou sequência não contígua): o delta vale por si
+            frame['metrics'] = {'base_seq': delta['base_seq'], 'seq': delta['seq'], 'changed': dict(delta['changed'])}
+            return metrics is None
+        metrics['seq'] = delta['seq']
+        metrics['changed'].update(delta['changed'])
+    return True
+
+class ClientChannel:
+    """Fila e tarefa de envio de um cliente; um cliente lento só atrasa a si mesmo"""
+
+    def __init__(self, sid: str, emit: Emit, min_interval: float, send_timeout: float = SEND_TIMEOUT,
+                 snapshot: Optional[Snapshot] = None):
+        self.sid = sid
+        self.emit = emit
+        self.min_interval = min_interval
+        self.send_timeout = send_timeout
+        self.snapshot = snapshot
+        self.pending: Dict[str, Dict] = {}
+        self.rooms: Set[str] = set()
+        # Último seq de métricas entregue por job e jobs que precisam de snapshot
+        self.seqs: Dict[str, int] = {}
+        self.resync: Set[str] = set()
+        self.wakeup = asyncio.Event()
+        self.coalesced = 0
+        self.dropped = 0
+        self.timeouts = 0
+        self.resyncs = 0
+        self.task = asyncio.create_task(self._run())
+
+    def offer(self, job_id: str, device_path: str, status: Optional[Dict] = None, delta: Optional[Dict] = None):
+        """Enfileira (ou mescla no pendente) o frame do job"""
+        frame = self.pending.get(job_id)
+        if frame is None:
+            if len(self.pending) >= MAX_PENDING_FRAMES:
+                evicted = self.pending.pop(next(iter(self.pending)))
+                self.dropped += 1
+                if 'metrics' in evicted:
+                    self.resync.add(evicted['job_id'])
+            frame = self.pending[job_id] = {'job_id': job_id, 'device_path': device_path}
+        else:
+            self.coalesced += 1
+        if not merge_frame(frame, status, delta):
+            self.resync.add(job_id)
+        self.wakeup.set()
+
+    def request_resync(self, job_id: str, device_path: str):
+        """O próximo frame do job leva o snapshot completo das métricas"""
+        self.resync.add(job_id)
+        self.offer(job_id, device_path)
+
+    def _needs_snapshot(self, frame: Dict) -> bool:
+        job_id = frame['job_id']
+        if job_id in self.resync:
+            return True
+        metrics = frame.get('metrics')
+        # O cliente não tem o estado sobre o qual o delta se aplica
+        return metrics is not None and metrics['base_seq'] != self.seqs.get(job_id, 0)
+
+    async def _send(self, event: str, payload: Dict) -> bool:
+        try:
+            await asyncio.wait_for(self.emit(event, payload, to=self.sid), self.send_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Cliente {self.sid} lento: {event} de {payload['job_id']} descartado")
+        except Exception as e:
+            logger.error(f"Erro ao enviar {event} para {self.sid}: {e}")
+        return False
+
+    async def _deliver(self, frame: Dict):
+        job_id = frame['job_id']
+        if self.snapshot is not None and self._needs_snapshot(frame):
+            # Resync: o snapshot substitui os deltas pendentes
+            frame.pop('metrics', None)
+            self.resync.discard(job_id)
+            snapshot = self.snapshot(job_id)
+            if snapshot is not None:
+                self.resyncs += 1
+                if await self._send(SNAPSHOT_EVENT, snapshot):
+                    self.seqs[job_id] = snapshot['seq']
+                else:
+                    self.resync.add(job_id)
+        if 'status' not in frame and 'metrics' not in frame:
+            return
+        if await self._send(FRAME_EVENT, frame):
+            if 'metrics' in frame:
+                self.seqs[job_id] = frame['metrics']['seq']
+        elif 'metrics' in frame:
+            self.resync.add(job_id)
+
+    async def _run(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            frames = list(self.pending.values())
+            self.pending.clear()
+            for frame in frames:
+                await self._deliver(frame)
+            # Limite de taxa: o que chegar até lá é mesclado no próximo frame
+            await asyncio.sleep(self.min_interval)
+
+    def close(self):
+        self.task.cancel()
+
+    def stats(self) -> Dict:
+        return {'rooms': sorted(self.rooms), 'pending': len(self.pending), 'coalesced': self.coalesced,
+                'dropped': self.dropped, 'timeouts': self.timeouts, 'resyncs': self.resyncs}
+
+class SocketPublisher:
+    """Distribui frames de jobs para os canais dos clientes conectados"""
+
+    def __init__(self, emit: Emit, rate: float = EMIT_RATE, snapshot: Optional[Snapshot] = None):
+        self.emit = emit
+        self.min_interval = 1.0 / rate if rate > 0 else 0.0
+        self.snapshot = snapshot
+        self.channels: Dict[str, ClientChannel] = {}
+
+    def add_client(self, sid: str):
+        if sid not in self.channels:
+            self.channels[sid] = ClientChannel(sid, self.emit, self.min_interval, snapshot=self.snapshot)
+
+    def remove_client(self, sid: str):
+        channel = self.channels.pop(sid, None)
+        if channel:
+            channel.close()
+
+    def join(self, sid: str, room: str):
+        channel = self.channels.get(sid)
+        if channel:
+            channel.rooms.add(room)
+
+    def leave(self, sid: str, room: str):
+        channel = self.channels.get(sid)
+        if channel:
+            channel.rooms.discard(room)
+
+    def members(self, room: str) -> List[str]:
+        return [sid for sid, channel in self.channels.items() if room in channel.rooms]
+
+    def publish(self, job_id: str, device_path: str, status: Optional[Dict] = None, delta: Optional[Dict] = None,
+                sids: Optional[Iterable[str]] = None):
+        """
+        Não bloqueia quem publica: apenas enfileira para os inscritos no job ou no dispositivo
+        (ou para `sids`)
+        """
+        if sids is None:
+            rooms = {job_room(job_id), device_room(device_path)}
+            targets = [channel for channel in self.channels.values() if channel.rooms & rooms]
+        else:
+            targets = [self.channels[sid] for sid in sids if sid in self.channels]
+        for channel in targets:
+            channel.offer(job_id, device_path, status, delta)
+
+    def resync(self, job_id: str, device_path: str, sids: Iterable[str]):
+        """Envia o snapshot das métricas do job aos clientes indicados no próximo frame"""
+        for sid in sids:
+            channel = self.channels.get(sid)
+            if channel:
+                channel.request_resync(job_id, device_path)
+
+    def stats(self) -> Dict:
+        return {sid: channel.stats() for sid, channel in self.channels.items()}
@@ -0,0 +1,263 @@
+"""
+Scan Completo de Superfície com Checkpoint
+Lê o dispositivo inteiro em blocos grandes alinhados, mapeia regiões lentas/com erro
+e retoma de onde parou após reinício
+"""
+import errno
+import json
+import os
+import time
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from io_engine import AlignedBuffer, open_direct, get_target_size, validate_block_size, MB
+from latency_histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCAN_CHUNK_SIZE = 4 * MB
+# Granularidade da releitura quando um bloco grande falha
+RETRY_BLOCK_SIZE = 64 * 1024
+DEFAULT_SLOW_THRESHOLD_MS = 200.0
+CHECKPOINT_INTERVAL = 10.0
+CHECKPOINT_DIR = os.environ.get('SCAN_CHECKPOINT_DIR', '/app/scan_checkpoints')
+
+class BadRegionMap:
+    """Mapa compacto de regiões ruins: faixas contíguas do mesmo tipo são fundidas"""
+
+    def __init__(self, regions: Optional[List[List]] = None):
+        # Cada região: [lba_inicial, quantidade_de_setores, tipo ('slow' | 'error')]
+        self.regions: List[List] = [list(r) for r in (regions or [])]
+
+    def add(self, start_lba: int, count: int, kind: str):
+        """Registra uma faixa, fundindo com a anterior quando contígua"""
+        if self.regions:
+            last = self.regions[-1]
+            if last[2] == kind and last[0] + last[1] == start_lba:
+                last[1] += count
+                return
+        self.regions.append([start_lba, count, kind])
+
+    def sectors(self, kind: str) -> int:
+        """Total de setores de um tipo"""
+        return sum(r[1] for r in self.regions if r[2] == kind)
+
+    def to_list(self) -> List[Dict]:
+        return [{'start_lba': r[0], 'sectors': r[1], 'type': r[2]} for r in self.regions]
+
+def _logical_block_size(device_path: str) -> int:
+    """Tamanho do setor lógico do dispositivo (512 se desconhecido)"""
+    name = os.path.basename(os.path.realpath(device_path))
+    try:
+        with open(f'/sys/class/block/{name}/queue/logical_block_size') as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 512
+
+class SurfaceScanner:
+    """Leitura completa e retomável da superfície do dispositivo (somente leitura)"""
+
+    def __init__(self, device_path: str, chunk_size: int = DEFAULT_SCAN_CHUNK_SIZE,
+                 slow_threshold_ms: float = DEFAULT_SLOW_THRESHOLD_MS,
+                 checkpoint_dir: str = CHECKPOINT_DIR, device_id: Optional[str] = None):
+        self.device_path = device_path
+        self.chunk_size = validate_block_size(chunk_size)
+        self.slow_threshold_ns = int(slow_threshold_ms * 1e6)
+        self.checkpoint_dir = checkpoint_dir
+        # Identidade estável (ex: número de série) evita retomar o checkpoint em outro disco
+        self.device_id = device_id or device_path
+        self.checkpoint_path = os.path.join(checkpoint_dir, f"{self.device_id.strip('/').replace('/', '_')}.json")
+        self.sector_size = _logical_block_size(device_path)
+        self.fd = None
+        self.direct = False
+        self.size = 0
+        self.offset = 0
+        self.resumed_from = 0
+        self.bad_regions = BadRegionMap()
+        self.histogram = LatencyHistogram()
+        self.buffer = None
+        self.retry_buffer = None
+        self.scan_time = 0.0
+        self.started_at = None
+        self.last_checkpoint = 0.0
+        self.complete = False
+
+    def open(self):
+        """Abre o dispositivo somente leitura e retoma o checkpoint, se houver"""
+        self.fd, self.direct = open_direct(self.device_path, os.O_RDONLY)
+        try:
+            self.size = get_target_size(self.fd)
+            self.buffer = AlignedBuffer(self.chunk_size)
+            self.retry_buffer = AlignedBuffer(RETRY_BLOCK_SIZE)
+        except Exception:
+            os.close(self.fd)
+            self.fd = None
+            raise
+        self._load_checkpoint()
+        self.last_checkpoint = time.monotonic()
+
+    def close(self):
+        """Grava checkpoint (se incompleto) e libera recursos"""
+        if self.fd is not None and not self.complete:
+            self.save_checkpoint()
+        for buffer in (self.buffer, self.retry_buffer):
+            if buffer:
+                buffer.close()
+        self.buffer = self.retry_buffer = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            self.started_at = datetime.now().isoformat()
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Checkpoint inválido em {self.checkpoint_path}: {e}")
+            self.started_at = datetime.now().isoformat()
+            return
+
+        if checkpoint.get('size') != self.size or checkpoint.get('chunk_size') != self.chunk_size:
+            logger.warning(f"Checkpoint de {self.device_id} não corresponde ao dispositivo atual, reiniciando scan")
+            self.started_at = datetime.now().isoformat()
+            return
+
+        self.offset = self.resumed_from = checkpoint['offset']
+        self.bad_regions = BadRegionMap(checkpoint.get('bad_regions'))
+        self.scan_time = checkpoint.get('scan_time', 0.0)
+        self.started_at = checkpoint.get('started_at')
+        logger.info(f"Retomando scan de {self.device_id} em {self.offset}/{self.size} bytes")
+
+    def save_checkpoint(self):
+        """Grava o progresso de forma atômica (tmp + fsync + rename)"""
+        checkpoint = {
+            'device': self.device_path,
+            'device_id': self.device_id,
+            'size': self.size,
+            'chunk_size': self.chunk_size,
+            'sector_size': self.sector_size,
+            'offset': self.offset,
+            'bad_regions': self.bad_regions.regions,
+            'scan_time': self.scan_time,
+            'started_at': self.started_at,
+            'updated_at': datetime.now().isoformat()
+        }
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            tmp_path = f'{self.checkpoint_path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(checkpoint, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.checkpoint_path)
+            self.last_checkpoint = time.monotonic()
+        except OSError as e:
+            logger.error(f"Erro ao gravar checkpoint do scan: {e}")
+
+    def _clear_checkpoint(self):
+        try:
+            os.unlink(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Erro ao remover checkpoint do scan: {e}")
+
+    def _retry_chunk(self, offset: int, length: int):
+        """Relê um bloco que falhou em pedaços menores para isolar os setores com erro"""
+        buffers = [self.retry_buffer.view]
+        end = offset + length
+        while offset < end:
+            try:
+                os.preadv(self.fd, buffers, offset)
+            except OSError as e:
+                if e.errno not in (errno.EIO, errno.ENODATA, errno.EILSEQ):
+                    raise
+                step = min(RETRY_BLOCK_SIZE, end - offset)
+                self.bad_regions.add(offset // self.sector_size, step // self.sector_size, 'error')
+            offset += RETRY_BLOCK_SIZE
+
+    def run_interval(self, seconds: float) -> Dict:
+        """Escaneia durante `seconds` (bloqueante) e retorna o progresso"""
+        buffers = [self.buffer.view]
+        nbytes = 0
+        start = time.perf_counter()
+        deadline = time.perf_counter_ns() + int(seconds * 1e9)
+
+        while self.offset < self.size:
+            length = min(self.chunk_size, self.size - self.offset)
+            t0 = time.perf_counter_ns()
+            try:
+                os.preadv(self.fd, buffers, self.offset)
+                t1 = time.perf_counter_ns()
+                self.histogram.record(t1 - t0)
+                if t1 - t0 > self.slow_threshold_ns:
+                    self.bad_regions.add(self.offset // self.sector_size, length // self.sector_size, 'slow')
+            except OSError as e:
+                if e.errno not in (errno.EIO, errno.ENODATA, errno.EILSEQ):
+                    raise
+                logger.warning(f"Erro de leitura em {self.device_path} offset {self.offset}: {e}")
+                self._retry_chunk(self.offset, length)
+                t1 = time.perf_counter_ns()
+            self.offset += length
+            nbytes += length
+            if t1 >= deadline:
+                break
+
+        elapsed = time.perf_counter() - start
+        self.scan_time += elapsed
+
+        if self.offset >= self.size:
+            self.complete = True
+            self._clear_checkpoint()
+        elif time.monotonic() - self.last_checkpoint >= CHECKPOINT_INTERVAL:
+            self.save_checkpoint()
+
+        return {
+            'offset': self.offset,
+            'size': self.size,
+            'progress': self.offset / self.size if self.size else 1.0,
+            'mb_per_s': nbytes / MB / elapsed if elapsed else 0.0,
+            'eta_seconds': self._eta(),
+            'error_sectors': self.bad_regions.sectors('error'),
+            'slow_sectors': self.bad_regions.sectors('slow'),
+            'complete': self.complete
+        }
+
+    def _eta(self) -> float:
+        """Tempo restante estimado (s) pela taxa média acumulada entre sessões"""
+        if not self.offset or not self.scan_time:
+            return 0.0
+        rate = self.offset / self.scan_time
+        return (self.size - self.offset) / rate
+
+    def summary(self) -> Dict:
+        """Resumo do scan, incluindo o mapa de regiões ruins"""
+        return {
+            'device': self.device_path,
+            'size': self.size,
+            'sector_size': self.sector_size,
+            'chunk_size': self.chunk_size,
+            'direct_io': self.direct,
+            'scanned_bytes': self.offset,
+            'progress': round(100 * self.offset / self.size, 2) if self.size else 100,
+            'complete': self.complete,
+            'resumed_from': self.resumed_from,
+            'scan_time': round(self.scan_time, 1),
+            'avg_mb_per_s': round(self.offset / MB / self.scan_time, 1) if self.scan_time else 0,
+            'error_sectors': self.bad_regions.sectors('error'),
+            'slow_sectors': self.bad_regions.sectors('slow'),
+            'bad_regions': self.bad_regions.to_list(),
+            'chunk_latency': self.histogram.summary(),
+            'started_at': self.started_at
+        }
@@ -0,0 +1,87 @@
+"""
+Escrita Sustentada e Detecção do Fim do Cache SLC
+Analisa a série temporal de throughput de escrita para encontrar o ponto em que o
+cache se esgota e a velocidade de regime (steady-state) após o cache
+"""
+import os
+from statistics import median
+from typing import Dict, List
+
+from io_engine import IOSample, MB
+
+DEFAULT_SUSTAINED_DURATION = 300.0
+# Teto absoluto do arquivo de teste, independente do espaço livre (overrides de POST /run incluídos)
+SUSTAINED_MAX_SIZE = int(float(os.environ.get('SUSTAINED_WRITE_MAX_SIZE_GB', '16')) * 1024 * MB)
+DEFAULT_SUSTAINED_SIZE = min(8 * 1024 * MB, SUSTAINED_MAX_SIZE)
+# O teste sustentado pode ocupar mais espaço livre que os testes curtos para esgotar o cache
+SUSTAINED_FREE_FRACTION = 0.5
+SAMPLE_INTERVAL = 0.5
+# Queda para abaixo desta fração da velocidade inicial, mantida por CLIFF_CONFIRM amostras, é o "cliff"
+CLIFF_DROP_RATIO = 0.6
+CLIFF_CONFIRM = 6
+SMOOTHING_WINDOW = 5
+
+def _rolling_median(values: List[float], window: int) -> List[float]:
+    """Mediana móvel centrada (suaviza picos de flush do controlador)"""
+    half = window // 2
+    return [median(values[max(0, i - half):i + half + 1]) for i in range(len(values))]
+
+def build_time_series(samples: List[IOSample]) -> List[List[float]]:
+    """Série [tempo_s, MB/s, GB_escritos_acumulados] a partir das amostras do motor"""
+    if not samples:
+        return []
+    origin = samples[0].timestamp - samples[0].interval
+    series = []
+    written = 0
+    for sample in samples:
+        written += sample.bytes
+        series.append([
+            round(sample.timestamp - origin, 2),
+            round(sample.mb_per_s, 1),
+            round(written / (1024 * MB), 3)
+        ])
+    return series
+
+def detect_cache_cliff(samples: List[IOSample]) -> Dict:
+    """
+    Detecta o esgotamento do cache de escrita
+    Retorna velocidade pré-cliff, velocidade de regime, instante e volume escrito até o cliff.
+    """
+    if len(samples) < CLIFF_CONFIRM * 2:
+        return {'cliff_detected': False, 'reason': 'Amostras insuficientes'}
+
+    speeds = _rolling_median([s.mb_per_s for s in samples], SMOOTHING_WINDOW)
+    series = build_time_series(samples)
+    # Ignora a primeira amostra (aquecimento) para a referência inicial
+    warmup = speeds[1:1 + max(CLIFF_CONFIRM, len(speeds) // 20)]
+    initial = median(warmup)
+    threshold = initial * CLIFF_DROP_RATIO
+
+    cliff = None
+    for i in range(1, len(speeds) - CLIFF_CONFIRM + 1):
+        if all(v < threshold for v in speeds[i:i + CLIFF_CONFIRM]):
+            cliff = i
+            break
+
+    if cliff is None:
+        tail = speeds[-max(CLIFF_CONFIRM, len(speeds) // 3):]
+        return {
+            'cliff_detected': False,
+            'initial_mb_per_s': round(initial, 1),
+            'steady_state_mb_per_s': round(median(tail), 1),
+            'written_gb': series[-1][2]
+        }
+
+    pre_cliff = median(speeds[1:cliff]) if cliff > 1 else initial
+    steady = median(speeds[cliff + CLIFF_CONFIRM // 2:]) if len(speeds) > cliff + CLIFF_CONFIRM // 2 else speeds[-1]
+    return {
+        'cliff_detected': True,
+        'initial_mb_per_s': round(initial, 1),
+        'pre_cliff_mb_per_s': round(pre_cliff, 1),
+        'steady_state_mb_per_s': round(steady, 1),
+        'drop_pct': round(100 * (1 - steady / pre_cliff), 1) if pre_cliff else 0,
+        'cliff_time_s': series[cliff][0],
+        # Volume escrito até o início da amostra do cliff ≈ tamanho efetivo do cache
+        'cache_size_gb': series[cliff - 1][2],
+        'written_gb': series[-1][2]
+    }
@@ -2,54 +2,127 @@
 Validador de Temperatura com Detecção de Bridge e Fallback
 Implementa leitura precisa de temperatura com validação
 """
-import subprocess
+import os
 import re
+import glob
 import logging
+import threading
 from typing import Dict, Tuple, Optional
 
+from smart_cache import get_smart_snapshot
+
 logger = logging.getLogger(__name__)
 
+SYS_BLOCK = '/sys/block'
+# Locais do hwmon relativos a /sys/block/<disco>: drivetemp (SATA) e controlador NVMe
+HWMON_PATTERNS = ('device/hwmon/hwmon*/temp1_input', 'device/hwmon*/temp1_input')
+
+def _read_sysfs(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
 class TemperatureValidator:
     """Valida e corrige leituras de temperatura"""
     
-    def __init__(self):
-        # Bridges USB conhecidos que não reportam temperatura confiável
-        self.unreliable_bridges = [
-            'JMicron', 'ASMedia', 'VIA Labs', 'Genesys Logic', 
-            'Alcor Micro', 'Renesas', 'Fresco Logic'
-        ]
+    # Bridges USB conhecidos que não reportam temperatura confiável (idVendor -> fabricante)
+    UNRELIABLE_BRIDGES = {
+        '152d': 'JMicron',
+        '174c': 'ASMedia',
+        '2109': 'VIA Labs',
+        '05e3': 'Genesys Logic',
+        '058f': 'Alcor Micro',
+        '045b': 'Renesas',
+        '1b73': 'Fresco Logic',
+    }
+    
+    def __init__(self, sys_block: str = SYS_BLOCK):
+        self.sys_block = sys_block
+        # Resolvidos uma vez por dispositivo; invalidados no hotplug
+        self.bridges: Dict[str, Dict] = {}
+        self.hwmon_paths: Dict[str, Optional[str]] = {}
+        self.lock = threading.Lock()
+    
+    def invalidate(self, device_path: Optional[str] = None):
+        """Descarta bridge e hwmon resolvidos de um dispositivo (ou de todos)"""
+        with self.lock:
+            if device_path is None:
+                self.bridges.clear()
+                self.hwmon_paths.clear()
+            else:
+                self.bridges.pop(device_path, None)
+                self.hwmon_paths.pop(device_path, None)
     
     def get_bridge_info(self, device_path: str) -> Dict:
-        """Identifica bridge USB do dispositivo"""
+        """Identifica a bridge USB atrás da qual o dispositivo está (memoizado)"""
+        with self.lock:
+            if device_path in self.bridges:
+                return self.bridges[device_path]
+        bridge_info = self._resolve_bridge(device_path)
+        with self.lock:
+            self.bridges[device_path] = bridge_info
+        return bridge_info
+    
+    def _resolve_bridge(self, device_path: str) -> Dict:
+        """Sobe a cadeia sysfs do disco até o dispositivo USB (primeiro diretório com idVendor)"""
+        bridge_info = {
+            'manufacturer': 'Unknown',
+            'vendor_id': None,
+            'product_id': None,
+            'is_unreliable': False,
+            'detected': False
+        }
         try:
-            # Extrair nome do device (ex: /dev/sdb -> sdb)
-            device_name = device_path.split('/')[-1]
-            
-            # Usar lsusb para identificar interface
-            result = subprocess.run(
-                ['lsusb'], capture_output=True, text=True, timeout=5
-            )
-            
-            bridge_info = {
-                'manufacturer': 'Unknown',
-                'is_unreliable': False,
-                'detected': False
-            }
-            
-            if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    for bridge in self.unreliable_bridges:
-                        if bridge.lower() in line.lower():
-                            bridge_info['manufacturer'] = bridge
-                            bridge_info['is_unreliable'] = True
-                            bridge_info['detected'] = True
-                            logger.info(f"Bridge USB detectada: {bridge} (temperatura não confiável)")
-                            break
-            
-            return bridge_info
+            device_name = os.path.basename(device_path)
+            path = os.path.realpath(os.path.join(self.sys_block, device_name))
+            while path and path != '/sys/devices' and path != '/':
+                vendor_id = _read_sysfs(os.path.join(path, 'idVendor'))
+                if vendor_id is not None:
+                    manufacturer = self.UNRELIABLE_BRIDGES.get(vendor_id.lower())
+                    bridge_info.update(
+                        vendor_id=vendor_id,
+                        product_id=_read_sysfs(os.path.join(path, 'idProduct')),
+                        manufacturer=manufacturer or _read_sysfs(os.path.join(path, 'manufacturer')) or 'Unknown',
+                        is_unreliable=manufacturer is not None,
+                        detected=True
+                    )
+                    if manufacturer:
+                        logger.info(f"Bridge USB de {device_path}: {manufacturer} "
+                                    f"({vendor_id}:{bridge_info['product_id']}, temperatura não confiável)")
+                    break
+                path = os.path.dirname(path)
         except Exception as e:
             logger.error(f"Error getting bridge info: {e}")
-            return {'manufacturer': 'Unknown', 'is_unreliable': False, 'detected': False}
+        return bridge_info
+    
+    def hwmon_path(self, device_path: str) -> Optional[str]:
+        """temp1_input do hwmon do dispositivo, localizado uma única vez"""
+        with self.lock:
+            if device_path in self.hwmon_paths:
+                return self.hwmon_paths[device_path]
+        base = os.path.join(self.sys_block, os.path.basename(device_path))
+        path = None
+        for pattern in HWMON_PATTERNS:
+            matches = sorted(glob.glob(os.path.join(base, pattern)))
+            if matches:
+                path = matches[0]
+                break
+        with self.lock:
+            self.hwmon_paths[device_path] = path
+        return path
+    
+    def read_hwmon_temp(self, device_path: str) -> Optional[float]:
+        """Temperatura (°C) do hwmon: uma leitura de sysfs após a primeira localização"""
+        path = self.hwmon_path(device_path)
+        if path is None:
+            return None
+        value = _read_sysfs(path)
+        try:
+            return int(value) / 1000.0 if value is not None else None
+        except ValueError:
+            return None
     
     def validate_temperature(self, temp: float, device_path: str, bus: str) -> Dict:
         """
@@ -111,45 +184,28 @@ class TemperatureValidator:
     
     def _read_system_temp(self, device_path: str) -> Optional[float]:
         """Tenta ler temperatura do sistema hwmon"""
-        try:
-            device_name = device_path.split('/')[-1]
-            
-            # Tentar caminhos comuns de hwmon
-            temp_paths = [
-                f'/sys/block/{device_name}/<｜place▁holder▁no▁450｜>/hwmon/hwmon*/temp1_input',
-                f'/sys/block/{device_name}/queue/hw_sector_size',  # Indiretamente
-            ]
-            
-            # Usar find para localizar arquivos temp
-            result = subprocess.run(
-                ['find', f'/sys/block/{device_name}', '-name', 'temp1_input', '2>/dev/null'],
-                capture_output=True, text=True, timeout=5
-            )
-            
-            if result.returncode == 0 and result.stdout.strip():
-                temp_file = result.stdout.strip().split('\n')[0]
-                with open(temp_file, 'r') as f:
-                    temp_millic = int(f.read().strip())
-                    temp_celsius = temp_millic / 1000.0
-                    logger.info(f"Leitura do sistema hwmon: {temp_celsius}°C")
-                    return temp_celsius
-            
-            return None
-        except Exception as e:
-            logger.debug(f"Could not read system temp: {e}")
-            return None
+        temp_celsius = self.read_hwmon_temp(device_path)
+        if temp_celsius is not None:
+            logger.info(f"Leitura do sistema hwmon: {temp_celsius}°C")
+        return temp_celsius
     
     def _read_raw_temperature(self, device_path: str) -> Optional[float]:
-        """Lê temperatura diretamente de smartctl sem JSON"""
+        """Lê temperatura do valor raw dos atributos SMART (snapshot compartilhado)"""
         try:
-            result = subprocess.run(
-                ['smartctl', '-A', device_path],
-                capture_output=True, text=True, timeout=10
-            )
+            snapshot = get_smart_snapshot(device_path)
+            
+            # Raw string dos atributos 194/190, ex: "35 (Min/Max 20/45)"
+            for attr in snapshot.data.get('ata_smart_attributes', {}).get('table', []):
+                if attr.get('id') in (194, 190):
+                    match = re.match(r'\s*(\d+)', attr.get('raw', {}).get('string', ''))
+                    if match and 0 < int(match.group(1)) <= 125:
+                        temp = float(match.group(1))
+                        logger.info(f"Raw temperature: {temp}°C from attribute {attr['id']}")
+                        return temp
             
-            if result.returncode == 0:
+            if snapshot.ok and snapshot.text:
                 # Procurar linha de temperatura
-                for line in result.stdout.split('\n'):
+                for line in snapshot.text.split('\n'):
                     if 'Temperature' in line or 'Airflow' in line:
                         # Extrair número
                         match = re.search(r'(\d+)\s*(?:degree|°|Celsius)', line, re.IGNORECASE)
@@ -168,8 +224,9 @@ class TemperatureValidator:
             logger.debug(f"Could not read raw temp: {e}")
             return None
 
+temperature_validator = TemperatureValidator()
+
 def validate_and_correct_temperature(temp: float, device_path: str, bus: str) -> Dict:
     """Função helper"""
-    validator = TemperatureValidator()
-    return validator.validate_temperature(temp, device_path, bus)
+    return temperature_validator.validate_temperature(temp, device_path, bus)
 
@@ -0,0 +1,48 @@
+import os
+
+from device_discovery import discover_devices
+
+def write(path, content=''):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+def disk(root, device_dir, name, size_sectors, rotational='0'):
+    """Disco em /sys/devices/... com o link em /sys/block (como no kernel)"""
+    node = os.path.join(root, 'devices', device_dir, name)
+    write(os.path.join(node, 'size'), str(size_sectors))
+    write(os.path.join(node, 'removable'), '0')
+    write(os.path.join(node, 'queue', 'rotational'), rotational)
+    os.makedirs(os.path.join(root, 'block'), exist_ok=True)
+    os.symlink(node, os.path.join(root, 'block', name))
+    return node
+
+def test_native_multipath_nvme_head_is_discovered(tmp_path):
+    root = str(tmp_path)
+    subsys = os.path.join(root, 'devices', 'virtual', 'nvme-subsystem', 'nvme-subsys0')
+    write(os.path.join(subsys, 'model'), 'Samsung SSD 980 PRO 1TB')
+    write(os.path.join(subsys, 'serial'), 'S5GXNX0R123456')
+    head = disk(root, 'virtual/nvme-subsystem/nvme-subsys0', 'nvme0n1', 1953525168)
+    os.symlink(subsys, os.path.join(head, 'device'))
+
+    # Virtuais sem disco por trás: device-mapper (subdiretório dm) e zram
+    dm = disk(root, 'virtual/block', 'dm-0', 1000)
+    os.makedirs(os.path.join(dm, 'dm'))
+    disk(root, 'virtual/block', 'zram0', 1000)
+
+    devices = discover_devices(os.path.join(root, 'block'))
+    assert [d['name'] for d in devices] == ['nvme0n1']
+    nvme = devices[0]
+    assert nvme['bus'] == 'NVMe'
+    assert nvme['model'] == 'Samsung SSD 980 PRO 1TB'
+    assert nvme['serial'] == 'S5GXNX0R123456'
+    assert nvme['is_ssd']
+
+def test_device_mapper_is_skipped_by_marker_not_name(tmp_path):
+    root = str(tmp_path)
+    node = disk(root, 'virtual/block', 'vg0-data', 1000)
+    os.makedirs(os.path.join(node, 'dm'))
+    parent = os.path.join(root, 'devices', 'pci0000:00', 'ata1')
+    os.makedirs(parent)
+    os.symlink(parent, os.path.join(node, 'device'))
+    assert discover_devices(os.path.join(root, 'block')) == []
@@ -0,0 +1,28 @@
+import pytest
+
+from fio_compat import parse_fio_jobfile, run_fio_job, scratch_size
+from io_engine import ScratchFile, DEFAULT_SCRATCH_SIZE, MIN_SCRATCH_SIZE, MB
+
+SMALL_JOB = """
+[small]
+rw=randwrite
+bs=4k
+iodepth=4
+size=16m
+"""
+
+def test_small_size_job_is_not_rejected(tmp_path):
+    spec = parse_fio_jobfile(SMALL_JOB)
+    size = scratch_size(spec['jobs'], DEFAULT_SCRATCH_SIZE)
+    assert size == 16 * MB < MIN_SCRATCH_SIZE
+    with ScratchFile(str(tmp_path), size) as scratch:
+        assert scratch.size == 16 * MB
+        result = run_fio_job(spec['jobs'][0], scratch.path)
+    assert result['write']['io_bytes'] >= 16 * MB
+
+def test_thread_limits_are_rejected():
+    for options in ('iodepth=4096', 'numjobs=64', 'iodepth=256\nnumjobs=16'):
+        with pytest.raises(ValueError):
+            parse_fio_jobfile(f"[big]\nrw=randread\nbs=4k\n{options}\n")
+    job = parse_fio_jobfile("[ok]\nrw=randread\nbs=4k\niodepth=64\nnumjobs=4\n")['jobs'][0]
+    assert (job.iodepth, job.numjobs) == (64, 4)
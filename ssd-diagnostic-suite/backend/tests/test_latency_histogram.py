@@ -0,0 +1,48 @@
+import random
+
+from latency_histogram import HALF_COUNT, LatencyHistogram, merge_histograms
+
+PERCENTILES = (1.0, 25.0, 50.0, 90.0, 99.0, 99.9, 100.0)
+
+def synthetic_latencies(count, seed=7):
+    """Latências log-uniformes de 20 µs a 50 ms, como um SSD sob fila"""
+    rng = random.Random(seed)
+    return [int(20_000 * (2500 ** rng.random())) for _ in range(count)]
+
+def exact_percentile(ordered, p):
+    rank = max(1, int(len(ordered) * p / 100.0 + 0.5)) if p < 100 else len(ordered)
+    return ordered[rank - 1]
+
+def test_percentiles_within_bucket_error():
+    values = synthetic_latencies(50_000)
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    ordered = sorted(values)
+    for p, estimate in zip(PERCENTILES, histogram.percentiles(PERCENTILES)):
+        exact = exact_percentile(ordered, p)
+        assert estimate >= exact
+        assert (estimate - exact) / exact <= 1 / HALF_COUNT, p
+    assert histogram.total == len(values)
+    assert histogram.min_ns == ordered[0]
+    assert histogram.max_ns == ordered[-1]
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(value)
+    assert histogram.percentiles((50.0, 99.0, 100.0)) == [50, 99, 100]
+
+def test_merge_equals_single_histogram():
+    values = synthetic_latencies(20_000, seed=11)
+    single = LatencyHistogram()
+    workers = [LatencyHistogram() for _ in range(4)]
+    for i, value in enumerate(values):
+        single.record(value)
+        workers[i % len(workers)].record(value)
+    merged = merge_histograms(workers + [None, LatencyHistogram()])
+    assert list(merged.counts) == list(single.counts)
+    assert (merged.total, merged.sum_ns, merged.min_ns, merged.max_ns) == \
+        (single.total, single.sum_ns, single.min_ns, single.max_ns)
+    assert merged.percentiles(PERCENTILES) == single.percentiles(PERCENTILES)
+    assert merged.summary() == single.summary()
@@ -0,0 +1,181 @@
+import copy
+import json
+import os
+
+import pytest
+
+from smart_analysis import SmartAnalyzer, SmartColumns, analyze_smart_data
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+# Caminho antigo (dict por atributo), antes das colunas NumPy, como referência de paridade.
+# Única diferença: o status do _deep_analysis antigo (NameError em `screened`) vai para a entrada.
+LEGACY_CRITICAL_NAMES = [name for name, level in SmartAnalyzer.CRITICAL_ATTRIBUTES.values() if level == 'critical']
+
+def legacy_attributes(smart_data):
+    attributes = []
+    for attr in smart_data.get('ata_smart_attributes', {}).get('table', []):
+        normalized = attr.get('value', 0)
+        threshold = attr.get('thresh', 0)
+        failure_rate = 0.0
+        if threshold > 0 and normalized < threshold:
+            failure_rate = ((threshold - normalized) / threshold) * 100
+        attributes.append({
+            'id': attr.get('id', 0),
+            'name': attr.get('name', 'Unknown'),
+            'raw_value': attr.get('raw', {}).get('value', 0),
+            'normalized_value': normalized,
+            'threshold': threshold,
+            'type': attr.get('type', {}).get('name', 'Old-age'),
+            'updated': bool(attr.get('flags', {}).get('value', 0) & 1),
+            'failure_rate': failure_rate,
+            'critical': attr.get('name', 'Unknown') in LEGACY_CRITICAL_NAMES,
+        })
+    return attributes
+
+def legacy_status(score):
+    if score >= 95:
+        return 'Excellent'
+    elif score >= 80:
+        return 'Good'
+    elif score >= 60:
+        return 'Fair'
+    elif score >= 40:
+        return 'Poor'
+    return 'Critical'
+
+def legacy_health_score(attributes):
+    if not attributes:
+        return {'score': 100, 'status': 'Unknown', 'factors': []}
+    factors = []
+    for attr in attributes:
+        if attr['critical']:
+            weight = 3
+        elif 'Wear' in attr['name'] or 'Health' in attr['name']:
+            weight = 2
+        else:
+            weight = 1
+        if attr['threshold'] == 0:
+            attr_score = 100
+        else:
+            attr_score = max(0, min(100, (attr['normalized_value'] / attr['threshold']) * 100))
+        factors.append({'name': attr['name'], 'score': attr_score, 'weight': weight})
+    final_score = sum(f['score'] * f['weight'] for f in factors) / sum(f['weight'] for f in factors)
+    return {'score': round(final_score, 2), 'status': legacy_status(final_score), 'factors': factors,
+            'weighted_calculation': True}
+
+def legacy_analysis(attributes):
+    analysis, warnings, critical_issues = [], [], []
+    for attr in attributes:
+        status = 'OK'
+        if attr['failure_rate'] > 50:
+            critical_issues.append(f"{attr['name']}: {attr['failure_rate']:.1f}% abaixo do threshold")
+            status = 'CRITICAL'
+        elif attr['failure_rate'] > 0:
+            warnings.append(f"{attr['name']}: {attr['failure_rate']:.1f}% abaixo do threshold")
+            status = 'WARNING'
+        analysis.append({'attribute_id': attr['id'], 'name': attr['name'], 'status': status,
+                         'failure_rate': attr['failure_rate'], 'raw_value': attr['raw_value']})
+    return analysis, warnings, critical_issues
+
+def legacy_recommendations(attributes, health):
+    recommendations = []
+    wear_attrs = [a for a in attributes if 'Wear' in a['name'] or 'Health' in a['name']]
+    if wear_attrs:
+        wear_pct = wear_attrs[0]['raw_value']
+        if wear_pct > 80:
+            recommendations.append(f"⚠️ DESGASTE CRÍTICO ({wear_pct}%): Considere substituição imediata")
+        elif wear_pct > 60:
+            recommendations.append(f"⚠️ Desgaste alto ({wear_pct}%): Planeje substituição em breve")
+    error_count = sum(1 for a in attributes if a['failure_rate'] > 50)
+    if error_count > 0:
+        recommendations.append(f"⚠️ {error_count} atributos com valores críticos")
+    temp_attrs = [a for a in attributes if a['id'] == 194]
+    if temp_attrs and temp_attrs[0]['raw_value'] > 70:
+        recommendations.append(f"⚠️ TEMPERATURA ALTA ({temp_attrs[0]['raw_value']}°C): Melhore ventilação")
+    if health['status'] in ['Poor', 'Critical']:
+        recommendations.append("⚠️ BACKUP URGENTE: Saúde do disco comprometida")
+        recommendations.append("⚠️ Considere substituição imediata")
+    if not recommendations:
+        recommendations.append("✅ Disco operando dentro dos parâmetros normais")
+        recommendations.append("✅ Continue com backups regulares")
+    return recommendations
+
+def assert_parity(smart_data):
+    result = analyze_smart_data(smart_data, '/dev/sda')
+    attributes = legacy_attributes(smart_data)
+    health = legacy_health_score(attributes)
+    analysis, warnings, critical_issues = legacy_analysis(attributes)
+
+    assert result['total_attributes'] == len(attributes)
+    assert result['attributes'] == pytest.approx(attributes)
+    assert result['health_score']['score'] == pytest.approx(health['score'])
+    assert result['health_score']['status'] == health['status']
+    assert result['health_score']['factors'] == pytest.approx(health['factors'])
+    assert [{key: entry[key] for key in analysis[0]} for entry in result['analysis']] == pytest.approx(analysis)
+    assert result['warnings'] == warnings
+    assert result['critical_issues'] == critical_issues
+    assert result['recommendations'] == legacy_recommendations(attributes, health)
+    return result
+
+def test_ata_parity_with_legacy_path():
+    result = assert_parity(load_fixture('smartctl_ata.json'))
+    # O fixture exercita as recomendações de desgaste (177) e temperatura (194)
+    assert result['recommendations'] == ["⚠️ Desgaste alto (62%): Planeje substituição em breve",
+                                         "⚠️ TEMPERATURA ALTA (73°C): Melhore ventilação"]
+
+def test_ata_parity_with_failing_attributes():
+    smart_data = load_fixture('smartctl_ata.json')
+    table = smart_data['ata_smart_attributes']['table']
+    table[0]['value'] = 3    # Reallocated_Sector_Ct 70% abaixo do threshold: CRITICAL
+    table[4]['value'] = 8    # Used_Rsvd_Blk_Cnt_Tot 20% abaixo: WARNING
+    result = assert_parity(smart_data)
+    assert [entry['status'] for entry in result['analysis']][:5] == ['CRITICAL', 'OK', 'OK', 'OK', 'WARNING']
+
+def test_ata_columns_match_table():
+    table = load_fixture('smartctl_ata.json')['ata_smart_attributes']['table']
+    columns = SmartColumns.from_table(table)
+    assert columns.ids.tolist() == [attr['id'] for attr in table]
+    assert columns.raw.tolist() == [attr['raw']['value'] for attr in table]
+    assert columns.thresh.tolist() == [attr['thresh'] for attr in table]
+    assert columns.flags.tolist() == [attr['flags']['value'] for attr in table]
+
+def test_nvme_json_has_no_ata_columns():
+    # Sem tabela ATA, o caminho antigo e o novo devolvem o mesmo resultado vazio
+    smart_data = load_fixture('smartctl_nvme.json')
+    assert len(SmartColumns.from_smart_data(smart_data)) == 0
+    assert analyze_smart_data(smart_data)['health_score'] == legacy_health_score([])
+
+def test_analyze_nvme_smartctl_log():
+    health_log = load_fixture('smartctl_nvme.json')['nvme_smart_health_information_log']
+    result = SmartAnalyzer().analyze_nvme(health_log, '/dev/nvme0')
+    health = result['health_score']
+    # Mesma ponderação do caminho antigo aplicada aos fatores NVMe
+    expected_score = sum(f['score'] * f['weight'] for f in health['factors']) / sum(f['weight'] for f in health['factors'])
+    assert health['score'] == round(expected_score, 2) == 83.25
+    assert health['status'] == legacy_status(expected_score) == 'Good'
+    assert [(f['name'], f['score'], f['weight']) for f in health['factors']] == [
+        ('Percentage_Used', 33.0, 2), ('Available_Spare', 100.0, 3), ('Media_Errors', 100.0, 3)]
+    assert result['critical_issues'] == []
+    assert result['warnings'] == []
+    assert result['recommendations'] == ["⚠️ Desgaste alto (67%): Planeje substituição em breve"]
+
+def test_analyze_nvme_cli_log_matches_smartctl():
+    health_log = load_fixture('smartctl_nvme.json')['nvme_smart_health_information_log']
+    cli_log = {
+        'critical_warning': health_log['critical_warning'],
+        'temperature': health_log['temperature'] + 273,
+        'avail_spare': health_log['available_spare'],
+        'spare_thresh': health_log['available_spare_threshold'],
+        'percent_used': health_log['percentage_used'],
+        'media_errors': health_log['media_errors'],
+        'num_err_log_entries': health_log['num_err_log_entries'],
+    }
+    smartctl = SmartAnalyzer().analyze_nvme(copy.deepcopy(health_log))
+    cli = SmartAnalyzer().analyze_nvme(cli_log)
+    for key in ('health_score', 'warnings', 'critical_issues', 'recommendations'):
+        assert cli[key] == smartctl[key]
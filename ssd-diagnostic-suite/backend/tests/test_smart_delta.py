@@ -0,0 +1,70 @@
+from collections import deque
+
+from enterprise_monitor import EnterpriseMonitor
+from smart_cache import SmartSnapshot
+from smart_delta import SmartDelta, SmartDeltaTracker
+
+DEVICE = '/dev/sda'
+
+def tracker_with(count):
+    tracker = SmartDeltaTracker()
+    tracker.deltas[DEVICE] = deque(
+        SmartDelta(device=DEVICE, timestamp=str(i + 1), previous_timestamp=str(i)) for i in range(count)
+    )
+    return tracker
+
+def timestamps(deltas):
+    return [delta['timestamp'] for delta in deltas]
+
+def test_recent_limit():
+    tracker = tracker_with(5)
+    assert timestamps(tracker.recent(DEVICE)) == ['1', '2', '3', '4', '5']
+    assert timestamps(tracker.recent(DEVICE, 2)) == ['4', '5']
+    assert timestamps(tracker.recent(DEVICE, 10)) == ['1', '2', '3', '4', '5']
+
+def test_recent_zero_or_negative_limit_returns_nothing():
+    tracker = tracker_with(5)
+    assert tracker.recent(DEVICE, 0) == []
+    assert tracker.recent(DEVICE, -2) == []
+
+def test_recent_unknown_device():
+    assert SmartDeltaTracker().recent('/dev/nope', 3) == []
+
+def snapshot(collected_at, reallocated, percentage_used):
+    data = {
+        'ata_smart_attributes': {'table': [
+            {'id': 5, 'name': 'Reallocated_Sector_Ct', 'value': 100, 'worst': 100, 'raw': {'value': reallocated}},
+            {'id': 9, 'name': 'Power_On_Hours', 'value': 99, 'worst': 99, 'raw': {'value': 1200}},
+        ]},
+        'nvme_smart_health_information_log': {'percentage_used': percentage_used, 'media_errors': 0},
+    }
+    return SmartSnapshot(device=DEVICE, data=data, returncode=0, collected_at=collected_at)
+
+def test_process_smart_delta_alerts_and_callbacks():
+    tracker = SmartDeltaTracker()
+    assert tracker.update(snapshot('t0', 0, 79)) is None
+    delta = tracker.update(snapshot('t1', 3, 81))
+    assert {change['key'] for change in delta.changes} == {'5.raw', 'nvme.percentage_used'}
+
+    monitor = EnterpriseMonitor()
+    received = []
+    monitor.register_alert_callback(received.append)
+    alerts = monitor.process_smart_delta(delta)
+
+    by_key = {alert['change']['key']: alert for alert in alerts}
+    assert set(by_key) == {'5.raw', 'nvme.percentage_used'}
+    assert by_key['5.raw']['severity'] == 'critical'
+    assert by_key['5.raw']['message'] == 'Reallocated_Sector_Ct +3 (agora 3)'
+    assert by_key['nvme.percentage_used']['severity'] == 'warning'
+    assert all(alert['device'] == DEVICE and alert['timestamp'] == 't1' for alert in alerts)
+    assert received == alerts
+
+def test_process_smart_delta_quiet_without_crossing():
+    tracker = SmartDeltaTracker()
+    tracker.update(snapshot('t0', 3, 81))
+    delta = tracker.update(snapshot('t1', 3, 82))
+    monitor = EnterpriseMonitor()
+    received = []
+    monitor.register_alert_callback(received.append)
+    assert monitor.process_smart_delta(delta) == []
+    assert received == []
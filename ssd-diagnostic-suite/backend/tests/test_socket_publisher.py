@@ -0,0 +1,137 @@
+import asyncio
+
+import socket_publisher
+from metrics_stream import MetricsStream
+from socket_publisher import FRAME_EVENT, SNAPSHOT_EVENT, SocketPublisher, merge_frame
+
+JOB = 'job-1'
+DEVICE = '/dev/nvme0n1'
+
+class Client:
+    """Emit falso: guarda (evento, payload) e pode travar os próximos envios"""
+
+    def __init__(self):
+        self.events = []
+        self.stalled = 0
+
+    async def emit(self, event, payload, to=None):
+        if self.stalled:
+            self.stalled -= 1
+            await asyncio.sleep(1)
+        self.events.append((event, payload['seq'] if event == SNAPSHOT_EVENT else payload.get('metrics')))
+
+    def take(self):
+        events, self.events = self.events, []
+        return events
+
+async def drain(delay=0.0):
+    await asyncio.sleep(delay)
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+def setup(client, send_timeout=socket_publisher.SEND_TIMEOUT):
+    stream = MetricsStream(JOB, DEVICE)
+    publisher = SocketPublisher(client.emit, rate=0, snapshot=lambda job_id: stream.snapshot())
+    publisher.add_client('sid')
+    publisher.channels['sid'].send_timeout = send_timeout
+    publisher.join('sid', f'job:{JOB}')
+    return stream, publisher
+
+def delta_frame(base_seq, seq, changed):
+    return (FRAME_EVENT, {'base_seq': base_seq, 'seq': seq, 'changed': changed})
+
+def test_merge_frame_reports_gaps():
+    frame = {}
+    assert merge_frame(frame, None, {'base_seq': 0, 'seq': 1, 'changed': {'a': 1}})
+    assert merge_frame(frame, None, {'base_seq': 1, 'seq': 2, 'changed': {'b': 2}})
+    assert frame['metrics'] == {'base_seq': 0, 'seq': 2, 'changed': {'a': 1, 'b': 2}}
+    assert not merge_frame(frame, None, {'base_seq': 5, 'seq': 6, 'changed': {'c': 3}})
+
+def test_contiguous_deltas_are_sent_as_deltas():
+    async def run():
+        client = Client()
+        stream, publisher = setup(client)
+        publisher.publish(JOB, DEVICE, delta=stream.delta({'read_speed': 100}))
+        await drain()
+        publisher.publish(JOB, DEVICE, delta=stream.delta({'read_speed': 120}))
+        await drain()
+        assert client.take() == [delta_frame(0, 1, {'read_speed': 100}), delta_frame(1, 2, {'read_speed': 120})]
+        assert publisher.stats()['sid']['resyncs'] == 0
+    asyncio.run(run())
+
+def test_gap_in_stream_sends_snapshot():
+    async def run():
+        client = Client()
+        stream, publisher = setup(client)
+        publisher.publish(JOB, DEVICE, delta=stream.delta({'read_speed': 100, 'iops': 10}))
+        await drain()
+        # Delta 2 nunca chega ao canal; o 3 não se aplica sobre o estado do cliente
+        stream.delta({'read_speed': 110, 'iops': 10})
+        publisher.publish(JOB, DEVICE, delta=stream.delta({'read_speed': 110, 'iops': 20}))
+        await drain()
+        assert client.take() == [delta_frame(0, 1, {'read_speed': 100, 'iops': 10}), (SNAPSHOT_EVENT, 3)]
+        publisher.publish(JOB, DEVICE, delta=stream.delta({'read_speed': 90, 'iops': 20}))
+        await drain()
+        assert client.take() == [delta_frame(3, 4, {'read_speed': 90})]
+    asyncio.run(run())
+
+def test_stale_base_seq_in_pending_frame_sends_snapshot():
+    async def run():
+        client = Client()
+        stream, publisher = setup(client)
+        first = stream.delta({'read_speed': 100})
+        stream.delta({'read_speed': 105})
+        stale = stream.delta({'read_speed': 110})
+        channel = publisher.channels['sid']
+        # Os dois deltas entram no mesmo frame pendente antes do envio
+        channel.offer(JOB, DEVICE, delta=first)
+        channel.offer(JOB, DEVICE, delta=stale)
+        await drain()
+        assert client.take() == [(SNAPSHOT_EVENT, 3)]
+        assert stream.snapshot()['metrics'] == {'read_speed': 110}
+    asyncio.run(run())
+
+def test_lagging_client_is_resynced_after_timeout():
+    async def run():
+        client = Client()
+        stream, publisher = setup(client, send_timeout=0.01)
+        client.stalled = 1
+        publisher.publish(JOB, DEVICE, delta=stream.delta({'read_speed': 100}))
+        await drain(0.05)
+        assert client.take() == []
+        publisher.publish(JOB, DEVICE, delta=stream.delta({'read_speed': 120}))
+        await drain()
+        assert client.take() == [(SNAPSHOT_EVENT, 2)]
+        assert publisher.stats()['sid']['timeouts'] == 1
+    asyncio.run(run())
+
+def test_evicted_frame_is_resynced(monkeypatch):
+    monkeypatch.setattr(socket_publisher, 'MAX_PENDING_FRAMES', 1)
+
+    async def run():
+        client = Client()
+        stream, publisher = setup(client)
+        channel = publisher.channels['sid']
+        channel.offer(JOB, DEVICE, delta=stream.delta({'read_speed': 100}))
+        # Outro job ocupa a única vaga: o frame com métricas do JOB é descartado
+        channel.offer('job-2', DEVICE, status={'phase': 'read'})
+        await drain()
+        assert client.take() == [(FRAME_EVENT, None)]
+        channel.offer(JOB, DEVICE, delta=stream.delta({'read_speed': 120}))
+        await drain()
+        assert client.take() == [(SNAPSHOT_EVENT, 2)]
+        assert channel.stats()['dropped'] == 1
+    asyncio.run(run())
+
+def test_requested_resync_without_pending_delta():
+    async def run():
+        client = Client()
+        stream, publisher = setup(client)
+        stream.delta({'read_speed': 100})
+        publisher.resync(JOB, DEVICE, sids=['sid'])
+        await drain()
+        assert client.take() == [(SNAPSHOT_EVENT, 1)]
+        publisher.publish(JOB, DEVICE, delta=stream.delta({'read_speed': 120}))
+        await drain()
+        assert client.take() == [delta_frame(1, 2, {'read_speed': 120})]
+    asyncio.run(run())
@@ -0,0 +1,22 @@
+from thermal_sampler import detect_throttle_events, BASELINE_WINDOWS
+
+THRESHOLD = 70.0
+
+def rows(workloads, temp=THRESHOLD, phase='random_read'):
+    """Janelas de 1 s consecutivas: [(workload, MB/s), ...] na mesma fase"""
+    return [{'phase': phase, 'workload': workload, 'timestamp': float(i + 1), 'interval': 1.0,
+             'mb_per_s': mb_per_s, 'temp_mean': temp, 'temp_max': temp}
+            for i, (workload, mb_per_s) in enumerate(workloads)]
+
+def test_mixed_workloads_in_one_phase_at_steady_temperature():
+    windows = [('rand-read bs=4096 qd=32', 400.0)] * 8 + [('rand-read bs=4096 qd=1', 40.0)] * 8 \
+        + [('rand-read bs=4096 qd=32', 400.0)] * 8 + [('rand-read bs=4096 qd=1', 40.0)] * 8
+    assert detect_throttle_events(rows(windows), THRESHOLD) == []
+
+def test_drop_within_same_workload_while_hot_is_an_event():
+    windows = [('seq-read bs=1048576 qd=1', 500.0)] * (BASELINE_WINDOWS + 2) \
+        + [('seq-read bs=1048576 qd=1', 150.0)] * 3
+    events = detect_throttle_events(rows(windows), THRESHOLD)
+    assert len(events) == 1
+    assert events[0]['workload'] == 'seq-read bs=1048576 qd=1'
+    assert events[0]['windows'] == 3
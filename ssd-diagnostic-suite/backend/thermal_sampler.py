@@ -0,0 +1,273 @@
+"""
+Amostragem Térmica de Alta Frequência via hwmon
+Lê temp*_input do hwmon do disco (NVMe e drivetemp) várias vezes por segundo em um buffer circular,
+alinha as leituras com as amostras de throughput do motor de I/O (mesmo relógio: time.monotonic)
+e detecta eventos de thermal throttling
+"""
+import os
+import time
+import logging
+import threading
+from array import array
+from statistics import median
+from typing import Callable, Dict, List, Optional, Tuple
+
+from io_engine import IOSample, SequentialIOEngine
+from temp_validator import temperature_validator
+
+logger = logging.getLogger(__name__)
+
+THERMAL_SAMPLE_INTERVAL = float(os.environ.get('THERMAL_SAMPLE_INTERVAL', '0.25'))
+# 2 horas a 4 Hz
+THERMAL_BUFFER_SIZE = 28800
+# Sem temp1_max no hwmon, throttling é avaliado a partir desta temperatura
+DEFAULT_THROTTLE_TEMP = float(os.environ.get('THROTTLE_TEMP', '70'))
+# Controladores começam a reduzir clock alguns graus antes do limite reportado (TMT1 < WCTEMP)
+THROTTLE_MARGIN = 2.0
+# Queda de throughput frente à mediana das janelas anteriores da mesma carga (workload)
+THROTTLE_DROP_RATIO = 0.7
+BASELINE_WINDOWS = 5
+# Pontos na série temporal do relatório
+TIMELINE_POINTS = 600
+
+class ThermalRing:
+    """Buffer circular de tamanho fixo com pares (timestamp monotonic, °C)"""
+
+    def __init__(self, capacity: int = THERMAL_BUFFER_SIZE):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.temps = array('d', bytes(8 * capacity))
+        self.head = 0
+        self.count = 0
+
+    def append(self, timestamp: float, temp: float):
+        self.times[self.head] = timestamp
+        self.temps[self.head] = temp
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def items(self) -> List[Tuple[float, float]]:
+        """Amostras do mais antigo ao mais novo"""
+        start = (self.head - self.count) % self.capacity
+        indices = [(start + i) % self.capacity for i in range(self.count)]
+        return [(self.times[i], self.temps[i]) for i in indices]
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        if not self.count:
+            return None
+        index = (self.head - 1) % self.capacity
+        return self.times[index], self.temps[index]
+
+class ThermalSampler:
+    """Thread que amostra o hwmon do disco e registra o throughput do motor de I/O no mesmo relógio"""
+
+    def __init__(self, device_path: str, interval: float = THERMAL_SAMPLE_INTERVAL,
+                 capacity: int = THERMAL_BUFFER_SIZE, label: Optional[Callable[[], str]] = None):
+        self.device_path = device_path
+        self.interval = interval
+        self.ring = ThermalRing(capacity)
+        self.label = label or (lambda: '')
+        self.io_samples: List[Tuple[str, str, IOSample]] = []
+        self.sensor = temperature_validator.hwmon_path(device_path)
+        self.threshold, self.threshold_source = self._read_threshold()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.errors = 0
+
+    @property
+    def available(self) -> bool:
+        return self.sensor is not None
+
+    def _read_threshold(self) -> Tuple[float, str]:
+        """Limite térmico do próprio drive (temp1_max = WCTEMP no NVMe) ou o padrão"""
+        if self.sensor:
+            try:
+                with open(self.sensor.replace('_input', '_max')) as f:
+                    value = int(f.read().strip()) / 1000.0
+                if 0 < value < 150:
+                    return value, 'hwmon temp1_max'
+            except (OSError, ValueError):
+                pass
+        return DEFAULT_THROTTLE_TEMP, 'default'
+
+    def start(self) -> bool:
+        """Inicia a amostragem; False se o disco não expõe hwmon"""
+        if not self.available:
+            logger.info(f"{self.device_path} sem hwmon; amostragem térmica desativada")
+            return False
+        self.thread = threading.Thread(target=self._run, name=f'thermal-{os.path.basename(self.device_path)}',
+                                       daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def __enter__(self) -> 'ThermalSampler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        # Descritor aberto uma vez; seek(0) relê o valor atual a cada amostra
+        try:
+            f = open(self.sensor, 'rb', buffering=0)
+        except OSError as e:
+            logger.error(f"Erro ao abrir {self.sensor}: {e}")
+            return
+        with f:
+            next_at = time.monotonic()
+            while not self.stop_event.is_set():
+                try:
+                    f.seek(0)
+                    value = int(f.read(32)) / 1000.0
+                    self.ring.append(time.monotonic(), value)
+                except (OSError, ValueError):
+                    self.errors += 1
+                next_at += self.interval
+                self.stop_event.wait(max(0.0, next_at - time.monotonic()))
+
+    def latest(self) -> Optional[float]:
+        """Última temperatura lida (°C)"""
+        sample = self.ring.latest()
+        return sample[1] if sample else None
+
+    def record_io(self, sample: IOSample, workload: str = ''):
+        """
+        Registra uma amostra de throughput (IOSample.timestamp também é time.monotonic)
+        `workload` identifica o sub-teste (padrão, bloco, QD): só amostras da mesma carga são comparadas
+        """
+        phase = self.label()
+        self.io_samples.append((phase, workload or phase, sample))
+
+    def aligned(self) -> List[Dict]:
+        """Cada janela de throughput com a temperatura medida durante ela"""
+        thermal = self.ring.items()
+        rows = []
+        cursor = 0
+        for phase, workload, sample in self.io_samples:
+            start = sample.timestamp - sample.interval
+            while cursor < len(thermal) and thermal[cursor][0] < start:
+                cursor += 1
+            window = []
+            index = cursor
+            while index < len(thermal) and thermal[index][0] <= sample.timestamp:
+                window.append(thermal[index][1])
+                index += 1
+            if not window and cursor:
+                # Janela menor que o intervalo de amostragem: última leitura antes do fim
+                window = [thermal[cursor - 1][1]]
+            rows.append({
+                'phase': phase,
+                'workload': workload,
+                'timestamp': sample.timestamp,
+                'interval': sample.interval,
+                'mb_per_s': sample.mb_per_s,
+                'iops': sample.iops,
+                'temp_mean': sum(window) / len(window) if window else None,
+                'temp_max': max(window) if window else None,
+            })
+        return rows
+
+    def report(self) -> Dict:
+        """Resumo térmico, alinhamento por fase, eventos de throttling e série temporal"""
+        thermal = self.ring.items()
+        if not thermal:
+            return {'available': self.available, 'sensor': self.sensor, 'samples': 0}
+        temps = [temp for _, temp in thermal]
+        origin = thermal[0][0]
+        step = max(1, len(thermal) // TIMELINE_POINTS)
+        rows = self.aligned()
+        events = detect_throttle_events(rows, self.threshold)
+        for event in events:
+            # Segundos desde a primeira leitura, como na timeline
+            event['start'] = round(event['start'] - origin, 2)
+            event['end'] = round(event['end'] - origin, 2)
+
+        phases: Dict[str, Dict] = {}
+        for row in rows:
+            if row['temp_max'] is None:
+                continue
+            phase = phases.setdefault(row['phase'], {'temp_max': row['temp_max'], 'temp_sum': 0.0, 'windows': 0})
+            phase['temp_max'] = max(phase['temp_max'], row['temp_max'])
+            phase['temp_sum'] += row['temp_mean']
+            phase['windows'] += 1
+
+        return {
+            'available': True,
+            'sensor': self.sensor,
+            'samples': len(thermal),
+            'sample_interval': self.interval,
+            'min_temp': min(temps),
+            'max_temp': max(temps),
+            'mean_temp': round(sum(temps) / len(temps), 2),
+            'throttle_threshold': self.threshold,
+            'throttle_threshold_source': self.threshold_source,
+            'phases': {
+                name: {'temp_max': p['temp_max'], 'temp_mean': round(p['temp_sum'] / p['windows'], 2)}
+                for name, p in phases.items()
+            },
+            'throttle_events': events,
+            # [segundos desde o início, °C]
+            'timeline': [[round(t - origin, 2), temp] for t, temp in thermal[::step]],
+            'read_errors': self.errors,
+        }
+
+def workload_label(engine) -> str:
+    """Identifica a carga de um motor de I/O (padrão, operação, bloco e QD) para agrupar as janelas"""
+    pattern = 'seq' if isinstance(engine, SequentialIOEngine) else 'rand'
+    operation = {100: 'read', 0: 'write'}.get(engine.read_pct, f'rw{engine.read_pct}')
+    return f"{pattern}-{operation} bs={engine.block_size} qd={getattr(engine, 'queue_depth', 1)}"
+
+def detect_throttle_events(rows: List[Dict], threshold: float, margin: float = THROTTLE_MARGIN,
+                           drop_ratio: float = THROTTLE_DROP_RATIO) -> List[Dict]:
+    """
+    Janelas em que o throughput caiu abaixo de drop_ratio × mediana das janelas anteriores da
+    mesma carga enquanto a temperatura estava no limite; janelas consecutivas formam um evento.
+    A base recomeça sempre que a carga muda (QD1 depois de QD32 não é queda de throughput)
+    """
+    events = []
+    current = None
+    previous: List[float] = []
+    workload = None
+    for row in rows:
+        label = row.get('workload', row['phase'])
+        if label != workload:
+            workload = label
+            previous = []
+            current = None
+        baseline = median(previous[-BASELINE_WINDOWS:]) if len(previous) >= BASELINE_WINDOWS else None
+        hot = row['temp_max'] is not None and row['temp_max'] >= threshold - margin
+        throttled = hot and baseline and row['mb_per_s'] < baseline * drop_ratio
+        if throttled:
+            if current is None:
+                current = {
+                    'phase': row['phase'],
+                    'workload': label,
+                    'start': row['timestamp'] - row['interval'],
+                    'baseline_mb_per_s': round(baseline, 1),
+                    'min_mb_per_s': row['mb_per_s'],
+                    'peak_temp': row['temp_max'],
+                    'windows': 0,
+                }
+                events.append(current)
+            current['end'] = row['timestamp']
+            current['min_mb_per_s'] = min(current['min_mb_per_s'], row['mb_per_s'])
+            current['peak_temp'] = max(current['peak_temp'], row['temp_max'])
+            current['windows'] += 1
+        else:
+            current = None
+            # Janelas estranguladas não entram na base, para não mascarar um throttling longo
+            previous.append(row['mb_per_s'])
+
+    for event in events:
+        event['duration'] = round(event['end'] - event['start'], 2)
+        event['drop_pct'] = round(100 * (1 - event['min_mb_per_s'] / event['baseline_mb_per_s']), 1) \
+            if event['baseline_mb_per_s'] else None
+        event['min_mb_per_s'] = round(event['min_mb_per_s'], 1)
+    return events
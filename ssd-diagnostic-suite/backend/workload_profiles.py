@@ -0,0 +1,133 @@
+"""
+Perfis de Carga de Trabalho
+Define cargas nomeadas (misto leitura/escrita, varredura de tamanho de bloco, banco de dados)
+executadas pelo motor de I/O real, com resultado em matriz por ponto do perfil
+"""
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Union
+
+from io_engine import (
+    SequentialIOEngine, RandomIOEngine, IOEngine, validate_block_size, DEFAULT_READ_BLOCK_SIZE, MAX_QUEUE_DEPTH
+)
+
+logger = logging.getLogger(__name__)
+
+KB = 1024
+DEFAULT_POINT_DURATION = 5.0
+
+@dataclass
+class ProfilePoint:
+    """Um ponto do perfil: padrão de acesso, bloco, mistura de leitura e profundidade de fila"""
+    label: str
+    pattern: str  # 'random' | 'sequential'
+    block_size: int
+    read_pct: int = 100
+    queue_depth: int = 1
+
+def _size_label(size: int) -> str:
+    return f'{size // (KB * KB)}M' if size >= KB * KB else f'{size // KB}K'
+
+SWEEP_BLOCK_SIZES = [4 * KB << i for i in range(9)]  # 4K ... 1M
+
+WORKLOAD_PROFILES: Dict[str, Dict] = {
+    'mixed_70_30': {
+        'description': '4K aleatório, 70% leitura / 30% escrita, em profundidades de fila crescentes',
+        'points': [ProfilePoint(f'4K 70/30 QD{qd}', 'random', 4 * KB, 70, qd) for qd in (1, 4, 16, 32)]
+    },
+    'read_write_ratio_sweep': {
+        'description': '4K aleatório QD16 variando a proporção de leituras de 100% a 0%',
+        'points': [ProfilePoint(f'4K {pct}/{100 - pct} QD16', 'random', 4 * KB, pct, 16) for pct in (100, 90, 70, 50, 30, 0)]
+    },
+    'block_size_sweep': {
+        'description': 'Leitura aleatória QD4 de 4K a 1M',
+        'points': [ProfilePoint(f'{_size_label(bs)} leitura QD4', 'random', bs, 100, 4) for bs in SWEEP_BLOCK_SIZES]
+    },
+    'database_8k': {
+        'description': 'OLTP típico: 8K aleatório, 67% leitura / 33% escrita',
+        'points': [ProfilePoint(f'8K 67/33 QD{qd}', 'random', 8 * KB, 67, qd) for qd in (1, 8, 32)]
+    },
+    'sequential_streaming': {
+        'description': 'Leitura e escrita sequencial de 128K e 1M (backup, mídia, ETL)',
+        'points': [
+            ProfilePoint(f'{_size_label(bs)} seq {"leitura" if pct else "escrita"}', 'sequential', bs, pct, 1)
+            for bs in (128 * KB, 1024 * KB) for pct in (100, 0)
+        ]
+    },
+}
+
+def _int_field(raw: Dict, key: str, default: int) -> int:
+    value = raw.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or int(value) != value:
+        raise ValueError(f"{key} deve ser inteiro: {value!r}")
+    return int(value)
+
+def parse_profile(spec: Union[str, Dict]) -> Dict:
+    """
+    Resolve um perfil por nome ou definição customizada:
+    {'name': 'app', 'points': [{'pattern': 'random', 'block_size': 16384, 'read_pct': 80, 'queue_depth': 8}]}
+    ValueError para qualquer definição inválida
+    """
+    if isinstance(spec, str):
+        if spec not in WORKLOAD_PROFILES:
+            raise ValueError(f"Perfil desconhecido: {spec} (disponíveis: {', '.join(WORKLOAD_PROFILES)})")
+        return {'name': spec, **WORKLOAD_PROFILES[spec]}
+    if not isinstance(spec, dict):
+        raise ValueError(f"Perfil deve ser um nome ou um objeto: {spec!r}")
+    raw_points = spec.get('points', [])
+    if not isinstance(raw_points, list):
+        raise ValueError("points deve ser uma lista")
+
+    points = []
+    for raw in raw_points:
+        if not isinstance(raw, dict):
+            raise ValueError(f"Ponto do perfil deve ser um objeto: {raw!r}")
+        pattern = raw.get('pattern', 'random')
+        if pattern not in ('random', 'sequential'):
+            raise ValueError(f"Padrão inválido: {pattern}")
+        block_size = validate_block_size(_int_field(raw, 'block_size', 4 * KB))
+        read_pct = max(0, min(100, _int_field(raw, 'read_pct', 100)))
+        if pattern == 'sequential' and read_pct not in (0, 100):
+            raise ValueError("Perfis sequenciais devem ser só leitura (100) ou só escrita (0)")
+        queue_depth = max(1, _int_field(raw, 'queue_depth', 1))
+        if queue_depth > MAX_QUEUE_DEPTH:
+            raise ValueError(f"queue_depth {queue_depth} acima do máximo ({MAX_QUEUE_DEPTH})")
+        label = raw.get('label') or f'{_size_label(block_size)} {pattern} {read_pct}/{100 - read_pct} QD{queue_depth}'
+        points.append(ProfilePoint(label, pattern, block_size, read_pct, queue_depth))
+    if not points:
+        raise ValueError("Perfil customizado sem pontos")
+    return {'name': spec.get('name', 'custom'), 'description': spec.get('description', 'Perfil customizado'), 'points': points}
+
+def build_engine(path: str, point: ProfilePoint, sync: bool = False) -> IOEngine:
+    """Cria o motor de I/O correspondente ao ponto do perfil"""
+    if point.pattern == 'sequential':
+        return SequentialIOEngine(path, point.block_size, write=point.read_pct == 0, sync=sync)
+    return RandomIOEngine(path, point.block_size, point.queue_depth, sync=sync, read_pct=point.read_pct)
+
+def precondition(path: str, sync: bool = False):
+    """
+    Escreve o arquivo de teste inteiro uma vez (bloqueante)
+    Sem isso, leituras em extents pré-alocados e nunca escritos retornam zeros sem tocar o disco.
+    """
+    with SequentialIOEngine(path, DEFAULT_READ_BLOCK_SIZE, write=True, sync=sync) as engine:
+        while engine.total_bytes < engine.size:
+            engine.run_interval(1.0)
+    logger.info(f"Arquivo de teste pré-condicionado: {path}")
+
+def point_result(point: ProfilePoint, engine: IOEngine) -> Dict:
+    """Linha da matriz de resultados para um ponto"""
+    summary = engine.summary()
+    return {
+        **asdict(point),
+        'mb_per_s': summary['avg_mb_per_s'],
+        'iops': round(summary['total_ops'] / summary['duration']) if summary['duration'] else 0,
+        'latency': summary['latency'],
+        'direct_io': summary['direct_io']
+    }
+
+def list_profiles() -> List[Dict]:
+    """Perfis disponíveis e seus pontos"""
+    return [
+        {'name': name, 'description': profile['description'], 'points': [asdict(p) for p in profile['points']]}
+        for name, profile in WORKLOAD_PROFILES.items()
+    ]
@@ -9,6 +9,9 @@ import json
 import subprocess
 from pathlib import Path
 
+# Motor de I/O e compatibilidade com fio vêm do backend
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+
 def run_smartctl(device_path: str):
     """Executa smartctl para um dispositivo"""
     try:
@@ -51,14 +54,62 @@ def analyze_device(device_path: str, output_file: str = None):
     
     return smart_data
 
+def run_fio(jobfile: str, directory: str, output_file: str = None, sync: bool = False):
+    """Executa um job file do fio com o motor embutido e retorna o JSON no esquema do fio"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from fio_compat import parse_fio_jobfile, run_fio_job, fio_output, scratch_size, needs_layout
+    from io_engine import ScratchFile, DEFAULT_SCRATCH_SIZE
+    from workload_profiles import precondition
+
+    try:
+        spec = parse_fio_jobfile(Path(jobfile).read_text())
+    except (OSError, ValueError) as e:
+        print(f"❌ Job file inválido: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"🔍 Executando {len(spec['jobs'])} job(s) do fio em: {directory}", file=sys.stderr)
+    results = []
+    try:
+        with ScratchFile(directory, scratch_size(spec['jobs'], DEFAULT_SCRATCH_SIZE)) as scratch:
+            if needs_layout(spec['jobs']):
+                precondition(scratch.path, sync)
+            for job in spec['jobs']:
+                result = run_fio_job(job, scratch.path, sync)
+                results.append(result)
+                read, write = result['read'], result['write']
+                print(f"  {job.name}: read {read['bw'] / 1024:.1f} MiB/s {read['iops']:.0f} IOPS | "
+                      f"write {write['bw'] / 1024:.1f} MiB/s {write['iops']:.0f} IOPS", file=sys.stderr)
+    except (OSError, ValueError) as e:
+        print(f"❌ Erro ao executar jobs do fio: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    data = fio_output(spec['global'], results)
+    if output_file:
+        with open(output_file, 'w') as f:
+            json.dump(data, f, indent=2)
+        print(f"\n✅ Resultado (JSON do fio) salvo em: {output_file}", file=sys.stderr)
+    return data
+
 def main():
     parser = argparse.ArgumentParser(description='Disk Diagnostic Suite - CLI Tool')
-    parser.add_argument('device', help='Caminho do dispositivo (ex: /dev/sda)')
+    parser.add_argument('device', nargs='?', help='Caminho do dispositivo (ex: /dev/sda)')
     parser.add_argument('-o', '--output', help='Arquivo de saída JSON')
     parser.add_argument('-f', '--format', choices=['json', 'summary'], default='summary', help='Formato de saída')
+    parser.add_argument('--fio', metavar='JOBFILE', help='Executa um job file do fio (rw, bs, iodepth, size, runtime, numjobs)')
+    parser.add_argument('--directory', default='.', help='Diretório do arquivo de teste dos jobs do fio')
+    parser.add_argument('--sync', action='store_true', help='Escritas com O_DSYNC nos jobs do fio')
     
     args = parser.parse_args()
     
+    if args.fio:
+        data = run_fio(args.fio, args.directory, args.output, args.sync)
+        if args.format == 'json':
+            print(json.dumps(data, indent=2))
+        return
+    
+    if not args.device:
+        parser.error('informe o dispositivo ou --fio JOBFILE')
+    
     # Verificar se dispositivo existe
     if not Path(args.device).exists():
         print(f"❌ Dispositivo não encontrado: {args.device}", file=sys.stderr)
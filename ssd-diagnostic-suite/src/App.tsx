@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import {
   AppBar,
   Toolbar,
@@ -39,6 +39,8 @@ import { PhaseList, type Phase } from './components/PhaseList'
 import { connectSocket, disconnectSocket, getApiBase } from './api/socket'
 
 interface StatusPayload {
+  job_id?: string
+  device_path?: string
   phase?: string
   progress?: number
   message?: string
@@ -68,7 +70,36 @@ interface Metrics {
   bad_blocks: number
   wear_level: number
   avg_latency: number
+  latency_p50?: number
+  latency_p90?: number
+  latency_p99?: number
+  latency_p99_9?: number
+  latency_max?: number
   iops: number
+  job_id?: string
+}
+
+// Métricas codificadas em delta: snapshot completo ao conectar/ressincronizar, depois só campos alterados
+interface MetricsSnapshot {
+  job_id: string
+  device_path: string
+  seq: number
+  metrics: Partial<Metrics>
+}
+
+// Deltas mesclados no servidor: changed leva o estado de base_seq até seq
+interface MetricsDelta {
+  base_seq: number
+  seq: number
+  changed: Partial<Metrics>
+}
+
+// Um frame por tick com status e/ou métricas do job
+interface JobFrame {
+  job_id: string
+  device_path: string
+  status?: StatusPayload
+  metrics?: MetricsDelta
 }
 
 interface Config {
@@ -133,6 +164,10 @@ function App() {
   const [settingsOpen, setSettingsOpen] = useState(false)
   const [confirmOpen, setConfirmOpen] = useState(false)
   const [aiInsights, setAiInsights] = useState<string>('')
+  // Job deste cliente (sala 'job:<id>' no Socket.IO)
+  const jobIdRef = useRef<string | null>(null)
+  // Último seq de métricas aplicado; um delta fora de ordem pede novo snapshot
+  const metricsSeqRef = useRef(0)
   const [successMessage, setSuccessMessage] = useState<string | null>(null)
 
   useEffect(() => {
@@ -146,9 +181,15 @@ function App() {
     socket.on('connect', () => {
       setMessage('Conectado ao backend.')
       setError(null)
+      // Reconexão: as salas do Socket.IO não sobrevivem à sessão anterior
+      if (jobIdRef.current) {
+        socket.emit('subscribe', { job_id: jobIdRef.current })
+      }
     })
 
-    socket.on('status', (payload: StatusPayload) => {
+    const isOtherJob = (jobId?: string) => !!jobId && jobId !== jobIdRef.current
+
+    const applyStatus = (payload: StatusPayload) => {
       if (typeof payload.progress === 'number') {
         setProgress(payload.progress)
       }
@@ -167,10 +208,29 @@ function App() {
           return p
         }))
       }
+    }
+
+    const applyMetrics = (jobId: string, delta: MetricsDelta) => {
+      // Já coberto por um snapshot mais novo
+      if (delta.seq <= metricsSeqRef.current) return
+      if (delta.base_seq > metricsSeqRef.current) {
+        socket.emit('metrics_resync', { job_id: jobId })
+        return
+      }
+      metricsSeqRef.current = delta.seq
+      setMetrics(prev => ({ ...prev, ...delta.changed, job_id: jobId }))
+    }
+
+    socket.on('job_update', (frame: JobFrame) => {
+      if (isOtherJob(frame.job_id)) return
+      if (frame.status) applyStatus(frame.status)
+      if (frame.metrics) applyMetrics(frame.job_id, frame.metrics)
     })
 
-    socket.on('metrics_update', (metrics: Metrics) => {
-      setMetrics(metrics)
+    socket.on('metrics_snapshot', (snapshot: MetricsSnapshot) => {
+      if (isOtherJob(snapshot.job_id)) return
+      metricsSeqRef.current = snapshot.seq
+      setMetrics(prev => ({ ...prev, ...snapshot.metrics, job_id: snapshot.job_id }))
     })
 
     socket.on('phase_done', (phaseKey: string) => {
@@ -183,12 +243,21 @@ function App() {
     })
 
     socket.on('diagnostic_complete', (data: any) => {
+      if (isOtherJob(data.job_id)) return
       if (data.ai_insights) {
         setAiInsights(data.ai_insights)
       }
       setIsMonitoring(false)
     })
 
+    // Hotplug: backend publica a lista nova, sem necessidade de polling em /devices
+    socket.on('devices_changed', (change: { devices: Device[] }) => {
+      setDevices(change.devices)
+      setSelectedDevice(prev =>
+        change.devices.some(d => d.path === prev) ? prev : (change.devices[0]?.path ?? '')
+      )
+    })
+
     socket.on('error', (err: { message: string }) => {
       setError(err.message)
     })
@@ -227,7 +296,8 @@ function App() {
 
   async function loadMetrics() {
     try {
-      const response = await fetch(`${getApiBase()}/metrics`)
+      const query = jobIdRef.current ? `?job_id=${jobIdRef.current}` : ''
+      const response = await fetch(`${getApiBase()}/metrics${query}`)
       const data = await response.json()
       setMetrics(data)
     } catch (err: any) {
@@ -244,6 +314,11 @@ function App() {
     try {
       setError(null)
       setIsMonitoring(true)
+      if (jobIdRef.current) {
+        connectSocket().emit('unsubscribe', { job_id: jobIdRef.current })
+      }
+      jobIdRef.current = null
+      metricsSeqRef.current = 0
       setProgress(0)
       setMessage('Iniciando diagnóstico...')
       setAiInsights('')
@@ -267,6 +342,13 @@ function App() {
         throw new Error(errorData.error || 'Falha ao iniciar diagnóstico')
       }
       
+      const data = await response.json()
+      jobIdRef.current = data.job_id ?? null
+      // O backend só envia eventos do job às salas inscritas; a inscrição traz o estado atual
+      if (jobIdRef.current) {
+        connectSocket().emit('subscribe', { job_id: jobIdRef.current })
+      }
+      
       setMessage('Diagnóstico em execução...')
     } catch (err: any) {
       console.error('Erro no startDiagnostic:', err)
@@ -277,7 +359,8 @@ function App() {
 
   async function downloadReport() {
     try {
-      const response = await fetch(`${getApiBase()}/report`)
+      const query = jobIdRef.current ? `?job_id=${jobIdRef.current}` : ''
+      const response = await fetch(`${getApiBase()}/report${query}`)
       if (response.ok) {
         const data = await response.json()
         const timestamp = new Date().toISOString().replace(/[:.]/g, '-')
@@ -605,11 +688,16 @@ function App() {
                       <CardContent>
                         <MemoryIcon sx={{ fontSize: 40, color: 'secondary.main', mb: 1 }} />
                         <Typography variant="h5" color="secondary.main">
-                          {(metrics.avg_latency * 1000).toFixed(2)}ms
+                          {metrics.avg_latency.toFixed(3)}ms
                         </Typography>
                         <Typography variant="body2" color="text.secondary">
                           Latência Média
                         </Typography>
+                        {(metrics.latency_p99 ?? 0) > 0 && (
+                          <Typography variant="caption" color="text.secondary">
+                            p50 {metrics.latency_p50?.toFixed(3)}ms | p99 {metrics.latency_p99?.toFixed(3)}ms | p99.9 {metrics.latency_p99_9?.toFixed(3)}ms
+                          </Typography>
+                        )}
                       </CardContent>
                     </Card>
                   </Grid>